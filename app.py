@@ -1,25 +1,55 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
+import gc
 import os
 import sys
+import time
 
 # Add backend directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
+# Imported by its backend name, so the forecasting modules record into the same metrics registry
+from metrics import instrument
+
 # Import backend modules
 try:
     from backend.login import signup as login_signup_func, login as login_login_func
-    from backend.demand_forecast_model import get_forecast as forecast_func, inventory_recommendation as inventory_func
+    from backend.demand_forecast_model import get_forecast as forecast_func, get_forecast_batch as forecast_batch_func, inventory_recommendation as inventory_func, catalog_inventory_recommendation as catalog_inventory_func, ingest_observations as ingest_observations_func, get_online_forecast as online_forecast_func, upload_demand_history as upload_demand_history_func, forecast_schedule as forecast_schedule_func, submit_job as submit_job_func, job_status as job_status_func
+    from backend.supply_chain_data import list_products as products_func, list_inventory as inventory_list_func, list_suppliers as suppliers_func, saved_routes as saved_routes_func
     BACKEND_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Could not import backend modules: {e}")
     BACKEND_AVAILABLE = False
 
+def warm_start():
+    """Load the model libraries and demand data up front (WARM_START=true).
+
+    Backend modules import lazily, so a cold process starts fast and pays on its
+    first forecast request. A preforking server started with its app preloaded
+    (e.g. gunicorn --preload) runs this once in the master, and the workers share
+    the loaded pages copy-on-write. gc.freeze() keeps the collector from touching
+    those objects and un-sharing them.
+    """
+    if not BACKEND_AVAILABLE:
+        return
+    import forecast_service
+    started = time.perf_counter()
+    categories = forecast_service.warm_up()
+    gc.freeze()
+    print(f"Warm start: {categories} categories loaded in {time.perf_counter() - started:.2f}s")
+
+if os.environ.get('WARM_START', 'false').lower() == 'true':
+    warm_start()
+
 app = Flask(__name__, 
             static_folder='static',
             template_folder='templates')
 CORS(app)
 
+# Per-route latency histograms and GET /metrics
+instrument(app)
+STARTED_AT = time.time()
+
 # Configure static files
 @app.route('/static/<path:filename>')
 def static_files(filename):
@@ -79,6 +109,41 @@ def forecast():
         return jsonify({"error": "Forecasting service not available"}), 500
     return forecast_func()
 
+@app.route('/api/forecast/batch', methods=['GET', 'POST'])
+def forecast_batch():
+    """Multi-category forecasting endpoint (categories=a,b,c or all)"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return forecast_batch_func()
+
+@app.route('/api/forecast/observations', methods=['POST'])
+def forecast_observations():
+    """Append new demand observations and update the online forecast state"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return ingest_observations_func()
+
+@app.route('/api/forecast/online', methods=['GET'])
+def online_forecast():
+    """Forecast from the incrementally updated state"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return online_forecast_func()
+
+@app.route('/api/forecast/schedule', methods=['GET', 'POST'])
+def forecast_schedule():
+    """Forecast precompute status, or materialize all categories now (POST)"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return forecast_schedule_func()
+
+@app.route('/api/data/upload', methods=['POST'])
+def upload_demand_history():
+    """Stream a CSV/Parquet demand history into the columnar store"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return upload_demand_history_func()
+
 @app.route('/api/inventory-recommendation', methods=['GET'])
 def inventory_recommendation():
     """Inventory recommendation endpoint"""
@@ -86,6 +151,56 @@ def inventory_recommendation():
         return jsonify({"error": "Inventory service not available"}), 500
     return inventory_func()
 
+@app.route('/api/inventory-recommendation/catalog', methods=['GET'])
+def catalog_inventory_recommendation():
+    """Inventory recommendations for every category and service level"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Inventory service not available"}), 500
+    return catalog_inventory_func()
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Start a long forecasting computation in the background (202 with the job id)"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return submit_job_func()
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Poll a background job's status and result"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Forecasting service not available"}), 500
+    return job_status_func(job_id)
+
+# API Routes - Supply chain records (pooled database)
+@app.route('/api/products', methods=['GET'])
+def products():
+    """Product catalog"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Database service not available"}), 500
+    return products_func()
+
+@app.route('/api/inventory', methods=['GET'])
+def inventory_levels():
+    """Stock levels per product (low_stock=true for items at or below minimum)"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Database service not available"}), 500
+    return inventory_list_func()
+
+@app.route('/api/suppliers', methods=['GET'])
+def suppliers():
+    """Suppliers, best rated first"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Database service not available"}), 500
+    return suppliers_func()
+
+@app.route('/api/routes', methods=['GET', 'POST'])
+def saved_routes():
+    """Recently saved routes, or save one or many routes in a batch"""
+    if not BACKEND_AVAILABLE:
+        return jsonify({"error": "Database service not available"}), 500
+    return saved_routes_func()
+
 # Route Optimization (if available)
 @app.route('/route-optimizer')
 def route_optimizer():
@@ -121,14 +236,21 @@ def favicon():
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "services": {
-            "authentication": "available",
-            "demand_forecast": "available",
-            "route_optimizer": "available"
-        }
-    })
+    services = {
+        "authentication": "available" if BACKEND_AVAILABLE else "unavailable",
+        "demand_forecast": "available" if BACKEND_AVAILABLE else "unavailable",
+        "route_optimizer": "available"
+    }
+    response = {
+        "status": "healthy" if BACKEND_AVAILABLE else "degraded",
+        "services": services,
+        "uptime_seconds": round(time.time() - STARTED_AT, 1)
+    }
+    if BACKEND_AVAILABLE:
+        import forecast_service
+        response["forecast_pool"] = forecast_service.jobs.stats()
+        response["model_cache"] = forecast_service.model_registry.stats()
+    return jsonify(response)
 
 if __name__ == '__main__':
     # Create necessary directories
@@ -0,0 +1,211 @@
+"""Rolling-origin backtest of the forecasting models over the trends dataset.
+
+Every (configuration, category) pair is backtested in a process pool worker. For
+each origin the model is fitted on all years before it and scored on the next
+`--horizon` years. Per fold the worker records MAE/RMSE, fit and predict wall
+time and the peak memory traced during a repeat of the fit.
+
+Configurations are given as name:key=value,... with keys engine (statsmodels or
+numpy), trend (add, mul, none), seasonal (add, mul, none) and seasonal_periods:
+    python backend/benchmarks/backtest.py --horizon 3 \\
+        --config hw3:trend=add,seasonal=add,seasonal_periods=3 \\
+        --config hw4:trend=add,seasonal=add,seasonal_periods=4 \\
+        --config numpy3:engine=numpy --output backtest.json
+
+Results are written as JSON. Pass a previous run with --baseline to exit non-zero
+when mean error or fit time regresses past --tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import holt_winters_batch  # noqa: E402
+from category_index import CategoryIndex  # noqa: E402
+from demand_dataset import load_dataset  # noqa: E402
+from forecast_service import MODEL_PARAMS  # noqa: E402
+
+DEFAULT_CONFIGS = [
+    'production:' + ','.join(f'{key}={value}' for key, value in MODEL_PARAMS),
+    'numpy:engine=numpy',
+    'trend_only:trend=add,seasonal=none'
+]
+
+
+def parse_config(spec):
+    """Parse name:key=value,... into (name, settings) with the production settings as defaults."""
+    name, _, body = spec.partition(':')
+    settings = {'engine': 'statsmodels', **dict(MODEL_PARAMS)}
+    for item in filter(None, body.split(',')):
+        key, _, value = item.partition('=')
+        settings[key.strip()] = value.strip()
+
+    settings['seasonal_periods'] = int(settings['seasonal_periods'])
+    for key in ('trend', 'seasonal'):
+        if settings[key] in ('none', ''):
+            settings[key] = None
+
+    if settings['engine'] not in ('statsmodels', 'numpy'):
+        raise ValueError(f"{name}: engine must be statsmodels or numpy")
+    if settings['engine'] == 'numpy' and (settings['trend'], settings['seasonal']) != ('add', 'add'):
+        raise ValueError(f"{name}: the numpy engine only fits additive trend and seasonality")
+    return name or spec, settings
+
+
+def fit_and_predict(train, steps, settings):
+    """Fit one training window; returns (forecast, fit seconds, predict seconds)."""
+    if settings['engine'] == 'numpy':
+        started = time.perf_counter()
+        level, trend, seasonal, _ = holt_winters_batch.fit_states(train[None, :], settings['seasonal_periods'])
+        fitted = time.perf_counter()
+        forecast = holt_winters_batch.forecast_from_states(
+            level, trend, seasonal, steps, len(train) % settings['seasonal_periods']
+        )[0]
+        return forecast, fitted - started, time.perf_counter() - fitted
+
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    started = time.perf_counter()
+    model = ExponentialSmoothing(
+        train,
+        trend=settings['trend'],
+        seasonal=settings['seasonal'],
+        seasonal_periods=settings['seasonal_periods'] if settings['seasonal'] else None,
+        initialization_method='estimated'
+    )
+    fit = model.fit()
+    fitted = time.perf_counter()
+    forecast = np.clip(fit.forecast(steps), 0, None)
+    return forecast, fitted - started, time.perf_counter() - fitted
+
+
+def backtest_series(name, settings, category, demand, horizon, min_train, step):
+    """Worker entry point: every rolling origin for one configuration and category."""
+    warnings.filterwarnings('ignore')
+    folds = []
+    for origin in range(min_train, len(demand) - horizon + 1, step):
+        train, test = demand[:origin], demand[origin:origin + horizon]
+        fold = {'config': name, 'category': category, 'origin': origin, 'horizon': horizon}
+
+        try:
+            forecast, fit_seconds, predict_seconds = fit_and_predict(train, horizon, settings)
+        except Exception as e:
+            folds.append({**fold, 'error': str(e)})
+            continue
+
+        # Memory from a second, traced run: tracing slows allocation and would skew the timings
+        tracemalloc.start()
+        try:
+            fit_and_predict(train, horizon, settings)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        errors = test - forecast
+        folds.append({
+            **fold,
+            'mae': float(np.abs(errors).mean()),
+            'rmse': float(np.sqrt((errors ** 2).mean())),
+            'fit_seconds': fit_seconds,
+            'predict_seconds': predict_seconds,
+            'peak_memory_bytes': peak
+        })
+    return folds
+
+
+def summarize(folds):
+    """Mean metrics per configuration over every successful fold."""
+    summary = {}
+    for name in dict.fromkeys(fold['config'] for fold in folds):
+        scored = [fold for fold in folds if fold['config'] == name and 'error' not in fold]
+        failed = sum(1 for fold in folds if fold['config'] == name and 'error' in fold)
+        summary[name] = {
+            'folds': len(scored),
+            'failed_folds': failed,
+            **{
+                metric: float(np.mean([fold[metric] for fold in scored])) if scored else None
+                for metric in ('mae', 'rmse', 'fit_seconds', 'predict_seconds')
+            },
+            'peak_memory_bytes': max((fold['peak_memory_bytes'] for fold in scored), default=None)
+        }
+    return summary
+
+
+def regressions(summary, baseline, tolerance):
+    """Metrics that got worse than the baseline run by more than `tolerance` (a fraction)."""
+    found = []
+    for name, current in summary.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('mae', 'rmse', 'fit_seconds'):
+            if current[metric] is not None and previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                found.append(f"{name}.{metric}: {previous[metric]:.4g} -> {current[metric]:.4g}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', action='append', help='name:key=value,... (repeatable)')
+    parser.add_argument('--horizon', type=int, default=3, help='years forecast at every origin')
+    parser.add_argument('--min-train', type=int, default=12, help='years in the first training window')
+    parser.add_argument('--step', type=int, default=1, help='years between origins')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help='write fold results and summary as JSON')
+    parser.add_argument('--baseline', help='previous --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    configs = [parse_config(spec) for spec in (args.config or DEFAULT_CONFIGS)]
+    index = CategoryIndex(load_dataset())
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            pool.submit(backtest_series, name, settings, category, index.get(category).demand,
+                        args.horizon, args.min_train, args.step)
+            for name, settings in configs
+            for category in index.categories
+        ]
+        folds = [fold for future in futures for fold in future.result()]
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(folds)
+    print(f"{'config':<20}{'folds':>7}{'MAE':>9}{'RMSE':>9}{'fit ms':>9}{'pred ms':>9}{'peak KiB':>10}")
+    for name, row in summary.items():
+        if row['mae'] is None:
+            print(f"{name:<20}{0:>7}  all folds failed")
+            continue
+        print(f"{name:<20}{row['folds']:>7}{row['mae']:>9.3f}{row['rmse']:>9.3f}"
+              f"{row['fit_seconds'] * 1000:>9.2f}{row['predict_seconds'] * 1000:>9.2f}"
+              f"{row['peak_memory_bytes'] / 1024:>10.0f}")
+    print(f"{len(folds)} folds in {elapsed:.2f} s with {args.workers} workers")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'settings': {'horizon': args.horizon, 'min_train': args.min_train, 'step': args.step},
+                'configs': dict(configs),
+                'summary': summary,
+                'folds': folds
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(summary, json.load(file)['summary'], args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Statsmodels vs batched NumPy Holt-Winters: speed and accuracy.
+
+Accuracy is compared on the real categories of the trends dataset (same
+80/20 hold-out as /api/forecast). Speed is measured on synthetic SKUs
+built by perturbing the real series, so the catalog can be scaled up.
+
+Run from the repository root:
+    python backend/benchmarks/bench_holt_winters.py --skus 2000
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import holt_winters_batch  # noqa: E402
+from category_index import CategoryIndex  # noqa: E402
+from demand_dataset import load_dataset  # noqa: E402
+from forecast_service import optimized_forecast  # noqa: E402
+
+
+def split(values):
+    train_size = max(3, int(len(values) * 0.8))
+    return values[:train_size], values[train_size:]
+
+
+def mae(actual, predicted):
+    return float(np.mean(np.abs(np.asarray(actual) - np.asarray(predicted))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skus', type=int, default=1000, help='synthetic SKUs for the speed comparison')
+    parser.add_argument('--statsmodels-sample', type=int, default=100,
+                        help='SKUs actually fitted with statsmodels; its time is scaled up to --skus')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    index = CategoryIndex(load_dataset())
+
+    print('Accuracy on the real categories (hold-out MAE)')
+    print(f"{'category':<12}{'statsmodels':>14}{'numpy':>10}")
+    totals = [0.0, 0.0]
+    for category in index.categories:
+        train, test = split(index.get(category).demand)
+        reference = mae(test, optimized_forecast(train, len(test)))
+        batched = mae(test, holt_winters_batch.fit_forecast_many([train], [len(test)])[0])
+        totals[0] += reference
+        totals[1] += batched
+        print(f"{category:<12}{reference:>14.3f}{batched:>10.3f}")
+    count = len(index.categories)
+    print(f"{'mean':<12}{totals[0] / count:>14.3f}{totals[1] / count:>10.3f}")
+
+    # Synthetic catalog: real series scaled and jittered
+    rng = np.random.default_rng(7)
+    bases = np.vstack([index.get(category).demand for category in index.categories])
+    picks = rng.integers(0, len(bases), size=args.skus)
+    skus = bases[picks] * rng.uniform(0.5, 2.0, size=(args.skus, 1)) + rng.normal(0, 0.5, size=(args.skus, bases.shape[1]))
+    trains = skus[:, :max(3, int(skus.shape[1] * 0.8))]
+    steps = skus.shape[1] - trains.shape[1]
+
+    sample = min(args.statsmodels_sample, args.skus)
+    started = time.perf_counter()
+    for row in trains[:sample]:
+        optimized_forecast(row, steps)
+    statsmodels_time = (time.perf_counter() - started) * args.skus / sample
+
+    started = time.perf_counter()
+    holt_winters_batch.fit_forecast(trains, steps)
+    numpy_time = time.perf_counter() - started
+
+    print()
+    print(f"Fitting {args.skus} SKUs (statsmodels extrapolated from {sample})")
+    print(f"  statsmodels: {statsmodels_time:8.2f} s")
+    print(f"  numpy batch: {numpy_time:8.2f} s")
+    print(f"  speedup:     {statsmodels_time / numpy_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
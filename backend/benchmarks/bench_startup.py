@@ -0,0 +1,118 @@
+"""Startup cost of the web app: import time, first-request latency and warm start.
+
+Each measurement runs in a fresh interpreter (with the forecast scheduler
+disabled) so module caches do not carry over between runs:
+- cold:  import app, then time the first /api/forecast request
+- warm:  WARM_START=true import, the preforking-server path, then the same request
+The slowest imports of a cold start are listed from python -X importtime.
+
+Run from anywhere:
+    python backend/benchmarks/bench_startup.py --runs 5 --max-import-seconds 1.0
+
+--max-import-seconds makes the script exit non-zero when the median cold import
+is slower, so import-cost regressions can fail a build.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app
+imported = time.perf_counter()
+loaded = [name for name in ('pandas', 'scipy', 'statsmodels', 'sklearn') if name in sys.modules]
+response = app.app.test_client().get('/api/forecast?category=sofa')
+print(json.dumps({{
+    'import_seconds': imported - started,
+    'first_request_seconds': time.perf_counter() - imported,
+    'status': response.status_code,
+    'heavy_modules_at_import': loaded
+}}))
+'''
+
+
+def run_probe(warm):
+    # Scratch DATA_DIR per run: no store, and no forecasts materialized by an earlier run
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, 'FORECAST_SCHEDULE_INTERVAL': '0', 'DATA_DIR': data_dir,
+               'WARM_START': 'true' if warm else 'false'}
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', PROBE.format(root=ROOT)],
+            env=env, cwd=data_dir, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(count):
+    """Top-level-ish modules by cumulative import time (microseconds) for `import app`."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = {**os.environ, 'FORECAST_SCHEDULE_INTERVAL': '0', 'DATA_DIR': data_dir}
+        stderr = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import sys; sys.path.insert(0, {ROOT!r}); import app'],
+            env=env, cwd=data_dir, capture_output=True, text=True, check=True
+        ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def summarize(runs):
+    return {
+        key: statistics.median(run[key] for run in runs)
+        for key in ('import_seconds', 'first_request_seconds')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per mode')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--max-import-seconds', type=float, help='fail if the median cold import is slower')
+    args = parser.parse_args()
+
+    cold = [run_probe(False) for _ in range(args.runs)]
+    warm = [run_probe(True) for _ in range(args.runs)]
+    imports = slowest_imports(args.top)
+
+    results = {
+        'cold': summarize(cold),
+        'warm': summarize(warm),
+        'heavy_modules_at_cold_import': cold[0]['heavy_modules_at_import'],
+        'slowest_imports_us': dict((name, us) for us, name in imports)
+    }
+
+    print(f"{'mode':<8}{'import s':>10}{'first request s':>18}")
+    for mode in ('cold', 'warm'):
+        print(f"{mode:<8}{results[mode]['import_seconds']:>10.3f}{results[mode]['first_request_seconds']:>18.3f}")
+    print(f"heavy modules loaded by a cold import: {', '.join(results['heavy_modules_at_cold_import']) or 'none'}")
+    print('slowest imports (cumulative):')
+    for us, name in imports:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.max_import_seconds is not None and results['cold']['import_seconds'] > args.max_import_seconds:
+        print(f"REGRESSION cold import {results['cold']['import_seconds']:.3f}s > {args.max_import_seconds}s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+# Year-sorted columns for one furniture category
+CategorySeries = namedtuple('CategorySeries', ['years', 'demand', 'storage_capacity'])
+
+
+class CategoryIndex:
+    """Groups the trends dataset once into contiguous per-category NumPy arrays."""
+
+    def __init__(self, data):
+        import pandas as pd
+
+        codes, categories = pd.factorize(data['Furniture Category'], sort=True)
+        years = data['Year'].to_numpy(dtype=np.int64)
+        demand = data['Market Demand (Millions)'].to_numpy(dtype=float)
+        capacity = data['Storage Capacity (Millions)'].to_numpy(dtype=float)
+
+        # One sort for the whole dataset: by category, then by year
+        order = np.lexsort((years, codes))
+        codes = codes[order]
+        boundaries = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(codes)]))
+
+        years = years[order]
+        demand = demand[order]
+        capacity = capacity[order]
+
+        self._series = {}
+        for start, end in zip(starts, ends):
+            if start == end:
+                continue
+            category = categories[codes[start]]
+            self._series[category] = CategorySeries(
+                np.ascontiguousarray(years[start:end]),
+                np.ascontiguousarray(demand[start:end]),
+                np.ascontiguousarray(capacity[start:end])
+            )
+        self.categories = sorted(self._series)
+
+    def get(self, category):
+        """Return the CategorySeries for a category, or None if it is not in the dataset."""
+        return self._series.get(category)
+
+    def __contains__(self, category):
+        return category in self._series
+
+    def __len__(self):
+        return len(self._series)
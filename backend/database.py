@@ -0,0 +1,209 @@
+"""Pooled database connections for the tables in database/schema.sql.
+
+DB_BACKEND selects the engine:
+- sqlite (the default) keeps a local file under DATA_DIR and needs no server.
+  It is created from schema.sql on first use, with the MySQL-only syntax
+  rewritten.
+- mysql uses the Config.DB_* settings and needs pymysql installed.
+
+Connections are opened once and handed out from a bounded pool. Callers block
+for at most DB_POOL_TIMEOUT seconds when all of them are in use. SQL is written
+with ? placeholders and adapted for MySQL.
+"""
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    from config import Config
+except ImportError:  # backend started on its own, outside the project root
+    Config = None
+
+
+def _setting(name, default):
+    return getattr(Config, name) if Config is not None else os.environ.get(name, default)
+
+
+DB_BACKEND = os.environ.get('DB_BACKEND', 'sqlite')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(_setting('DATA_DIR', './data'), 'supply_chain_ai.db'))
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'schema.sql')
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the timeout."""
+
+
+def sqlite_schema(mysql_schema):
+    """Rewrite the MySQL schema.sql for SQLite (auto-increment keys, enums, ON UPDATE, USE)."""
+    statements = []
+    for statement in mysql_schema.split(';'):
+        statement = '\n'.join(line for line in statement.splitlines() if not line.strip().startswith('--')).strip()
+        if not statement or re.match(r'(CREATE DATABASE|USE)\b', statement, re.IGNORECASE):
+            continue
+        statement = re.sub(r'\bINT AUTO_INCREMENT PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT', statement)
+        statement = re.sub(r'\bENUM\([^)]*\)', 'TEXT', statement)
+        statement = re.sub(r'\s+ON UPDATE CURRENT_TIMESTAMP', '', statement)
+        statements.append(statement)
+    return statements
+
+
+class Database:
+    """A fixed-size pool of connections to one database."""
+
+    def __init__(self, backend=DB_BACKEND, pool_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, sqlite_path=SQLITE_PATH):
+        self.backend = backend
+        self.sqlite_path = sqlite_path
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+        if backend == 'sqlite':
+            self._placeholder = '?'
+            self._ensure_sqlite_schema()
+        elif backend == 'mysql':
+            self._placeholder = '%s'
+        else:
+            raise ValueError(f'Unknown DB_BACKEND: {backend}')
+
+    def _connect(self):
+        if self.backend == 'sqlite':
+            # Kept open for the life of the pool, so sqlite's per-connection statement cache stays warm
+            connection = sqlite3.connect(
+                self.sqlite_path, timeout=self.timeout, check_same_thread=False, cached_statements=256
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA foreign_keys = ON')
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            return connection
+
+        import pymysql
+        import pymysql.cursors
+        return pymysql.connect(
+            host=_setting('DB_HOST', 'localhost'),
+            port=int(_setting('DB_PORT', 3306)),
+            user=_setting('DB_USER', 'root'),
+            password=_setting('DB_PASSWORD', ''),
+            database=_setting('DB_NAME', 'supply_chain_ai'),
+            cursorclass=pymysql.cursors.DictCursor,
+            autocommit=False
+        )
+
+    def _ensure_sqlite_schema(self):
+        directory = os.path.dirname(self.sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.connection() as connection:
+            # Write lock first, so two processes starting together cannot both seed the sample rows
+            connection.execute('BEGIN IMMEDIATE')
+            fresh = not connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+            ).fetchone()
+            existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master")}
+
+            # Missing tables and indexes are added to older files; sample rows only go into a fresh one
+            with open(SCHEMA_PATH) as file:
+                for statement in sqlite_schema(file.read()):
+                    created = re.match(r'CREATE (?:TABLE IF NOT EXISTS|INDEX) (\w+)', statement)
+                    if (created and created.group(1) not in existing) or (not created and fresh):
+                        connection.execute(statement)
+
+    def sql(self, query):
+        """Adapt a ?-placeholder query to the backend's parameter style."""
+        return query if self._placeholder == '?' else query.replace('?', self._placeholder)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error, always returns it to the pool."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+            with self._lock:
+                if self._opened < self.pool_size:
+                    self._opened += 1
+                    opening = True
+                else:
+                    opening = False
+            if opening:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    connection = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(f'no database connection free after {self.timeout} s')
+
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self._idle.put(connection)
+
+    def fetch_all(self, query, params=()):
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(self.sql(query), params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def fetch_one(self, query, params=()):
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(self.sql(query), params)
+            row = cursor.fetchone()
+            return dict(row) if row is not None else None
+
+    def execute(self, query, params=()):
+        """Run one write; returns the new row id."""
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(self.sql(query), params)
+            return cursor.lastrowid
+
+    def execute_many(self, query, rows):
+        """Run one statement for many parameter rows in a single transaction; returns the row count."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(self.sql(query), rows)
+            return len(rows)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Process-wide pool, created on first use."""
+    global _database
+    with _database_lock:
+        if _database is None:
+            _database = Database()
+        return _database
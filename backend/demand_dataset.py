@@ -0,0 +1,77 @@
+"""Load-once access to the demand data the forecasting service reads.
+
+Nothing is read at import time. The bundled CSV (or the published ingest
+store) is loaded on first access. It is reloaded only when refresh()
+notices that the CSV or the store's CURRENT pointer changed.
+"""
+import os
+import threading
+
+import demand_store
+from category_index import CategoryIndex
+
+CSV_PATH = os.path.join(os.path.dirname(__file__), "Furniture_Trends_India_2000_2024.csv")
+
+
+def load_dataset(path=CSV_PATH):
+    """Read and preprocess the furniture trends CSV."""
+    import pandas as pd
+
+    data = pd.read_csv(path)
+
+    # Preprocessing
+    data = data.dropna()
+    data['Furniture Category'] = data['Furniture Category'].str.strip().str.lower()
+    data['Year'] = data['Year'].astype(int)
+    return data
+
+
+class DemandDataset:
+    """The trends DataFrame and per-category index, each built on first use."""
+
+    def __init__(self, registry, path=CSV_PATH):
+        self.path = path
+        self.registry = registry  # its source_changed() tracks the CSV
+        self._frame = None
+        self._index = None
+        self._store_signature = None
+        self._lock = threading.RLock()
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            with self._lock:
+                if self._frame is None:
+                    self._frame = load_dataset(self.path)
+        return self._frame
+
+    @property
+    def index(self):
+        """Ingested store if one has been published, else per-category arrays from the CSV."""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._store_signature = demand_store.current_signature()
+                    store = demand_store.open_current()
+                    self._index = store if store is not None else CategoryIndex(self.frame)
+        return self._index
+
+    @property
+    def loaded(self):
+        return self._index is not None
+
+    def refresh(self):
+        """Drop what changed on disk; the next access reloads it. Returns True if anything changed."""
+        csv_changed = self.registry.source_changed()  # also drops stale fits
+        signature = demand_store.current_signature()
+        store_changed = self._index is not None and signature != self._store_signature
+        if not (csv_changed or store_changed):
+            return False
+
+        with self._lock:
+            if store_changed:
+                self.registry.clear()
+            if csv_changed:
+                self._frame = None
+            self._index = None
+        return True
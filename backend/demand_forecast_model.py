@@ -1,93 +1,314 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import pandas as pd
-import numpy as np
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from scipy.stats import norm
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+import os
+import demand_store
+import forecast_service
+from forecast_scheduler import forecast_scheduler, materialize, read_forecast
+from job_queue import RETRY_AFTER_SECONDS, QueueFull
+from metrics import instrument
+from online_forecast import online_forecaster
 
 app = Flask(__name__)
 CORS(app)
+instrument(app)
 
-# Load dataset
-import os
-file_path = os.path.join(os.path.dirname(__file__), "Furniture_Trends_India_2000_2024.csv")
-df = pd.read_csv(file_path)
-
-# Preprocessing
-df = df.dropna()
-df['Furniture Category'] = df['Furniture Category'].str.strip().str.lower()
-df['Year'] = df['Year'].astype(int)
-
-def optimized_forecast(series, forecast_steps=5):
-    """Optimized Exponential Smoothing forecast."""
-    if len(series) < 3:
-        return np.array([series.mean()] * forecast_steps)
-    
-    model = ExponentialSmoothing(series, trend='add', seasonal='add', seasonal_periods=3, initialization_method='estimated')
-    fit = model.fit()
-    forecast = fit.forecast(forecast_steps)
-    return forecast.clip(lower=0)
+def requested_engine(value=None):
+    """Forecasting engine from the ?engine= parameter, or the given value (None if unknown)."""
+    engine = str(value or request.args.get('engine', forecast_service.DEFAULT_ENGINE)).strip().lower()
+    return engine if engine in forecast_service.ENGINES else None
+
+def unknown_engine():
+    return jsonify({'error': f"engine must be one of: {', '.join(forecast_service.ENGINES)}"}), 400
+
+def overloaded():
+    """Fit pool or job table is full: tell the client when to come back."""
+    response = jsonify({'error': 'Forecasting is at capacity, please retry'})
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response, 429
+
+def requested_categories(requested):
+    """Normalized category list from a comma-separated string or a list; 'all' expands to every category."""
+    if isinstance(requested, str):
+        requested = requested.split(',')
+    categories = [str(c).strip().lower() for c in requested if c and str(c).strip()]
+    if 'all' in categories:
+        forecast_service.refresh_dataset()
+        return list(forecast_service.dataset.index.categories)
+    return list(dict.fromkeys(categories))
+
+def batch_forecast(categories, engine):
+    results, errors = forecast_service.forecast_many(categories, engine)
+    return {
+        'forecasts': results,
+        'errors': errors,
+        'model_used': forecast_service.ENGINES[engine],
+        'workers': forecast_service.FORECAST_POOL_WORKERS
+    }
+
+def catalog_recommendation(service_levels, storage_capacity, engine):
+    categories, safety_stock, reorder_point, errors = forecast_service.catalog_inventory(
+        service_levels, storage_capacity, engine
+    )
+    return {
+        'service_levels': service_levels,
+        'storage_capacity': storage_capacity,
+        'recommendations': {
+            category: {
+                str(level): {
+                    'safety_stock': round(float(safety_stock[row, col]), 2),
+                    'reorder_point': round(float(reorder_point[row, col]), 2)
+                }
+                for col, level in enumerate(service_levels)
+            }
+            for row, category in enumerate(categories)
+        },
+        'errors': errors
+    }
+
+def forecast_or_fail(category, engine):
+    result = read_forecast(category, engine)
+    if result is None:
+        raise ValueError('Category not found')
+    return result
 
 @app.route('/forecast', methods=['GET'])
 def get_forecast():
     category = request.args.get('category', '').strip().lower()
     if not category:
         return jsonify({'error': 'category parameter is required'}), 400
-    
-    category_data = df[df['Furniture Category'] == category]
-    if category_data.empty:
+
+    engine = requested_engine()
+    if engine is None:
+        return unknown_engine()
+
+    # Precomputed by the scheduler when fresh; fitted (and stored) on demand otherwise
+    try:
+        result = read_forecast(category, engine)
+    except QueueFull:
+        return overloaded()
+    if result is None:
         return jsonify({'error': 'Category not found'}), 404
-    
-    demand_series = category_data.sort_values('Year')['Market Demand (Millions)']
-    train_size = max(3, int(len(demand_series) * 0.8))
-    train, test = demand_series[:train_size], demand_series[train_size:]
-    
-    forecast = optimized_forecast(train, len(test))
-    
-    # Calculate accuracy metrics
-    mae = mean_absolute_error(test, forecast)
-    mse = mean_squared_error(test, forecast)
-    rmse = np.sqrt(mse)
-    
-    return jsonify({
-        'category': category,
-        'forecast': forecast.tolist(),
-        'accuracy_metrics': {
-            'MAE': mae,
-            'MSE': mse,
-            'RMSE': rmse
-        },
-        'model_used': 'Exponential Smoothing'
-    })
+
+    return jsonify(result)
+
+@app.route('/forecast/batch', methods=['GET', 'POST'])
+def get_forecast_batch():
+    if request.method == 'POST':
+        requested = (request.get_json(silent=True) or {}).get('categories', [])
+    else:
+        requested = request.args.get('categories', '')
+
+    categories = requested_categories(requested)
+    if not categories:
+        return jsonify({'error': 'categories parameter is required'}), 400
+
+    engine = requested_engine()
+    if engine is None:
+        return unknown_engine()
+
+    try:
+        return jsonify(batch_forecast(categories, engine))
+    except QueueFull:
+        return overloaded()
+
+@app.route('/forecast/observations', methods=['POST'])
+def ingest_observations():
+    payload = request.get_json(silent=True) or {}
+    category = str(payload.get('category', '')).strip().lower()
+    if not category:
+        return jsonify({'error': 'category is required'}), 400
+
+    # One {"year", "demand"} observation or a list of them under "observations"
+    rows = payload.get('observations', [payload] if 'year' in payload else [])
+    try:
+        observations = [(int(row['year']), float(row['demand'])) for row in rows]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'observations need numeric year and demand'}), 400
+    if not observations:
+        return jsonify({'error': 'at least one observation is required'}), 400
+
+    try:
+        status = online_forecaster.observe(category, observations)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    if status is None:
+        return jsonify({'error': 'Category not found'}), 404
+
+    return jsonify(status)
+
+@app.route('/forecast/online', methods=['GET'])
+def get_online_forecast():
+    category = request.args.get('category', '').strip().lower()
+    if not category:
+        return jsonify({'error': 'category parameter is required'}), 400
+
+    steps = request.args.get('steps', 5, type=int)
+    if steps is None or steps < 1:
+        return jsonify({'error': 'steps must be a positive integer'}), 400
+
+    result = online_forecaster.forecast(category, steps)
+    if result is None:
+        return jsonify({'error': 'Category not found'}), 404
+
+    return jsonify(result)
+
+@app.route('/data/upload', methods=['POST'])
+def upload_demand_history():
+    mode = request.args.get('mode', 'append')
+    if mode not in ('append', 'replace'):
+        return jsonify({'error': 'mode must be append or replace'}), 400
+
+    # Multipart file field or a raw request body; both are read as a stream
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    filename = (upload.filename if upload else '') or ''
+    data_format = request.args.get('format') or (
+        'parquet' if filename.endswith('.parquet') or 'parquet' in (request.content_type or '') else 'csv'
+    )
+    if data_format not in ('csv', 'parquet'):
+        return jsonify({'error': 'format must be csv or parquet'}), 400
+
+    if not demand_store.ingest_lock.acquire(blocking=False):
+        return jsonify({'error': 'Another upload is being ingested'}), 409
+
+    spooled = None
+    try:
+        if data_format == 'parquet':
+            # Parquet needs random access: copy to UPLOAD_DIR first, then read row batches
+            spooled = demand_store.spool_upload(stream, '.parquet')
+            chunks = demand_store.read_parquet_chunks(spooled)
+        else:
+            chunks = demand_store.read_csv_chunks(stream)
+        summary = forecast_service.ingest_history(chunks, replace=(mode == 'replace'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid upload: {e}'}), 400
+    finally:
+        demand_store.ingest_lock.release()
+        if spooled:
+            os.remove(spooled)
+
+    return jsonify(summary), 201
 
 @app.route('/inventory_recommendation', methods=['GET'])
 def inventory_recommendation():
     category = request.args.get('category', '').strip().lower()
-    storage_capacity = float(request.args.get('storage_capacity', 1000))
-    service_level = float(request.args.get('service_level', 0.95))
-    
-    forecast_response = get_forecast()
-    if forecast_response.status_code != 200:
-        return forecast_response
-    
-    data = forecast_response.get_json()
-    forecast = data['forecast']
-    lead_time_demand = sum(forecast[:2])
-    demand_std = np.std(forecast[:2])
-    
-    z_score = norm.ppf(service_level)
-    safety_stock = max(z_score * demand_std, 1)
-    reorder_point = min(lead_time_demand + safety_stock, storage_capacity)
-    
+    try:
+        storage_capacity = float(request.args.get('storage_capacity', 1000))
+        service_level = float(request.args.get('service_level', 0.95))
+    except ValueError:
+        return jsonify({'error': 'service_level and storage_capacity must be numeric'}), 400
+
+    if not category:
+        return jsonify({'error': 'category parameter is required'}), 400
+    if not 0 < service_level < 1:
+        return jsonify({'error': 'service_level must be between 0 and 1'}), 400
+
+    engine = requested_engine()
+    if engine is None:
+        return unknown_engine()
+
+    # Same keyed read the /forecast endpoint serves; no response round trip
+    try:
+        data = read_forecast(category, engine)
+    except QueueFull:
+        return overloaded()
+    if data is None:
+        return jsonify({'error': 'Category not found'}), 404
+
+    safety_stock, reorder_point = forecast_service.inventory_levels(
+        [data['forecast']], service_level, storage_capacity
+    )
+
     return jsonify({
         **data,
         'inventory_recommendations': {
-            'safety_stock': round(float(safety_stock), 2),
-            'reorder_point': round(float(reorder_point), 2),
-            'storage_capacity': storage_capacity
+            'safety_stock': round(float(safety_stock[0, 0]), 2),
+            'reorder_point': round(float(reorder_point[0, 0]), 2),
+            'storage_capacity': storage_capacity,
+            'recorded_storage_capacity': forecast_service.latest_storage_capacity(category)
         }
     })
 
+@app.route('/inventory_recommendation/catalog', methods=['GET'])
+def catalog_inventory_recommendation():
+    try:
+        storage_capacity = float(request.args.get('storage_capacity', 1000))
+        service_levels = [float(level) for level in request.args.get('service_levels', '0.95').split(',') if level.strip()]
+    except ValueError:
+        return jsonify({'error': 'service_levels and storage_capacity must be numeric'}), 400
+    if not service_levels or not all(0 < level < 1 for level in service_levels):
+        return jsonify({'error': 'service_levels must be between 0 and 1'}), 400
+
+    engine = requested_engine()
+    if engine is None:
+        return unknown_engine()
+
+    try:
+        return jsonify(catalog_recommendation(service_levels, storage_capacity, engine))
+    except QueueFull:
+        return overloaded()
+
+@app.route('/forecast/schedule', methods=['GET', 'POST'])
+def forecast_schedule():
+    # POST materializes every category now, in addition to the background schedule
+    if request.method == 'POST':
+        engine = requested_engine()
+        if engine is None:
+            return unknown_engine()
+        try:
+            return jsonify({'materialized': materialize([engine])})
+        except QueueFull:
+            return overloaded()
+    return jsonify(forecast_scheduler.status())
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Run a long forecasting computation in the background; poll GET /jobs/<id> for the result."""
+    payload = request.get_json(silent=True) or {}
+    kind = payload.get('type')
+    engine = requested_engine(payload.get('engine'))
+    if engine is None:
+        return unknown_engine()
+
+    if kind == 'forecast':
+        category = str(payload.get('category', '')).strip().lower()
+        if not category:
+            return jsonify({'error': 'category is required'}), 400
+        call = (forecast_or_fail, category, engine)
+    elif kind == 'forecast_batch':
+        categories = requested_categories(payload.get('categories', []))
+        if not categories:
+            return jsonify({'error': 'categories are required'}), 400
+        call = (batch_forecast, categories, engine)
+    elif kind == 'inventory_catalog':
+        try:
+            service_levels = [float(level) for level in payload.get('service_levels', [0.95])]
+            storage_capacity = float(payload.get('storage_capacity', 1000))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'service_levels and storage_capacity must be numeric'}), 400
+        if not service_levels or not all(0 < level < 1 for level in service_levels):
+            return jsonify({'error': 'service_levels must be between 0 and 1'}), 400
+        call = (catalog_recommendation, service_levels, storage_capacity, engine)
+    elif kind == 'materialize':
+        call = (materialize, [engine])
+    else:
+        return jsonify({'error': 'type must be one of: forecast, forecast_batch, inventory_catalog, materialize'}), 400
+
+    try:
+        job_id = forecast_service.jobs.start_job(kind, *call)
+    except QueueFull:
+        return overloaded()
+
+    response = jsonify(forecast_service.jobs.job(job_id))
+    response.headers['Location'] = f'{request.path}/{job_id}'
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = forecast_service.jobs.job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 if __name__ == '__main__':
     app.run(debug=True)
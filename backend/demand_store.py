@@ -0,0 +1,297 @@
+"""Columnar, memory-mapped store for bulk-ingested demand history.
+
+Uploads are read in bounded chunks, normalized the same way as the bundled CSV,
+and appended per category to flat binary column files:
+
+    DATA_DIR/demand_store/<version>/<category dir>/{year,demand,capacity}.bin
+    DATA_DIR/demand_store/<version>/manifest.json
+    DATA_DIR/demand_store/CURRENT  (name of the live version)
+
+A version is written to a staging directory and published by atomically
+replacing CURRENT, so readers never see a half-written upload. DemandStore
+has the CategoryIndex interface. It memory-maps a category's columns only
+when that category is first requested, then sorts them by year and sums
+duplicate years.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from category_index import CategorySeries
+
+try:
+    from config import Config
+    DATA_DIR, UPLOAD_DIR = Config.DATA_DIR, Config.UPLOAD_DIR
+except ImportError:  # backend started on its own, outside the project root
+    DATA_DIR = os.environ.get('DATA_DIR', './data')
+    UPLOAD_DIR = os.environ.get('UPLOAD_DIR', './uploads')
+
+STORE_DIR = os.path.join(DATA_DIR, 'demand_store')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+# Rows parsed per chunk; bounds ingest memory regardless of upload size
+CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', 200_000))
+COPY_BUFFER_BYTES = 1 << 20
+
+# Canonical dataset columns, keyed by their whitespace/case-normalized header
+COLUMNS = {
+    'year': 'Year',
+    'furniture category': 'Furniture Category',
+    'market demand (millions)': 'Market Demand (Millions)',
+    'storage capacity (millions)': 'Storage Capacity (Millions)'
+}
+
+# Column file name and dtype for each stored column
+COLUMN_FILES = (
+    ('Year', 'year.bin', np.int64),
+    ('Market Demand (Millions)', 'demand.bin', np.float64),
+    ('Storage Capacity (Millions)', 'capacity.bin', np.float64)
+)
+
+
+def normalize_header(name):
+    return ' '.join(str(name).split()).lower()
+
+
+def normalize_chunk(chunk):
+    """Rename columns to the canonical names, coerce types and drop invalid rows.
+
+    Returns (clean frame, rejected row count). Raises ValueError if a required
+    column is missing.
+    """
+    import pandas as pd
+
+    chunk = chunk.rename(columns=lambda name: COLUMNS.get(normalize_header(name), name))
+    missing = [name for name in COLUMNS.values() if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+
+    chunk = chunk[list(COLUMNS.values())].copy()
+    chunk['Furniture Category'] = chunk['Furniture Category'].astype('string').str.strip().str.lower()
+    for column in ('Year', 'Market Demand (Millions)', 'Storage Capacity (Millions)'):
+        chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+
+    valid = chunk.notna().all(axis=1) & (chunk['Furniture Category'] != '')
+    clean = chunk[valid]
+    clean = clean.astype({'Year': np.int64, 'Furniture Category': object})
+    return clean, int((~valid).sum())
+
+
+def read_csv_chunks(stream):
+    """Parse a CSV stream chunk by chunk, reading only the dataset columns."""
+    import pandas as pd
+
+    return pd.read_csv(stream, chunksize=CHUNK_ROWS, usecols=lambda name: normalize_header(name) in COLUMNS)
+
+
+def read_parquet_chunks(path):
+    """Iterate a Parquet file in row batches (requires pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError('Parquet uploads need pyarrow installed')
+
+    parquet = pq.ParquetFile(path)
+    columns = [name for name in parquet.schema_arrow.names if normalize_header(name) in COLUMNS]
+    for batch in parquet.iter_batches(batch_size=CHUNK_ROWS, columns=columns):
+        yield batch.to_pandas()
+
+
+def spool_upload(stream, suffix):
+    """Copy an upload stream to UPLOAD_DIR in fixed-size blocks; returns the file path."""
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f'{uuid.uuid4().hex}{suffix}')
+    with open(path, 'wb') as file:
+        shutil.copyfileobj(stream, file, COPY_BUFFER_BYTES)
+    return path
+
+
+def current_signature(root=STORE_DIR):
+    """Cheap change marker for the published version (None when there is no store)."""
+    try:
+        stat = os.stat(os.path.join(root, CURRENT_FILE))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def open_current(root=STORE_DIR):
+    """Open the published store version, or None if nothing has been ingested."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as file:
+            version = file.read().strip()
+    except FileNotFoundError:
+        return None
+    return DemandStore(os.path.join(root, version))
+
+
+class DemandStore:
+    """Read side of one store version; same interface as CategoryIndex."""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = os.path.basename(path)
+        with open(os.path.join(path, MANIFEST_FILE)) as file:
+            self._manifest = json.load(file)
+        self._series = {}
+        self._lock = threading.Lock()
+        self.categories = sorted(self._manifest['categories'])
+
+    def columns(self, category):
+        """Raw memory-mapped columns for a category, in ingest order."""
+        entry = self._manifest['categories'][category]
+        directory = os.path.join(self.path, entry['directory'])
+        return {
+            column: np.memmap(os.path.join(directory, filename), dtype=dtype, mode='r', shape=(entry['rows'],))
+            for column, filename, dtype in COLUMN_FILES
+        }
+
+    def get(self, category):
+        """Year-aggregated CategorySeries for a category, or None if it is not in the store."""
+        if category not in self._manifest['categories']:
+            return None
+
+        series = self._series.get(category)
+        if series is None:
+            with self._lock:
+                series = self._series.get(category)
+                if series is None:
+                    series = self._series[category] = self._aggregate(category)
+        return series
+
+    def _aggregate(self, category):
+        # Several rows for one year (e.g. per-channel sales) add up; capacity keeps the year's maximum
+        columns = self.columns(category)
+        order = np.argsort(columns['Year'], kind='stable')
+        years = np.asarray(columns['Year'])[order]
+        starts = np.flatnonzero(np.r_[True, np.diff(years) != 0])
+        return CategorySeries(
+            years[starts],
+            np.add.reduceat(np.asarray(columns['Market Demand (Millions)'])[order], starts),
+            np.maximum.reduceat(np.asarray(columns['Storage Capacity (Millions)'])[order], starts)
+        )
+
+    def __contains__(self, category):
+        return category in self._manifest['categories']
+
+    def __len__(self):
+        return len(self.categories)
+
+
+class StoreWriter:
+    """Stages a new store version; appends normalized chunks column by column."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self.version = f"v{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.staging = os.path.join(root, f'.staging-{self.version}')
+        os.makedirs(self.staging)
+        self._categories = {}
+        self.rows = 0
+
+    def _entry(self, category):
+        entry = self._categories.get(category)
+        if entry is None:
+            entry = self._categories[category] = {'directory': f'c{len(self._categories):05d}', 'rows': 0}
+            os.makedirs(os.path.join(self.staging, entry['directory']))
+        return entry
+
+    def append(self, chunk):
+        """Append one normalized chunk (see normalize_chunk)."""
+        for category, group in chunk.groupby('Furniture Category', sort=False):
+            entry = self._entry(category)
+            directory = os.path.join(self.staging, entry['directory'])
+            for column, filename, dtype in COLUMN_FILES:
+                with open(os.path.join(directory, filename), 'ab') as file:
+                    group[column].to_numpy(dtype=dtype).tofile(file)
+            entry['rows'] += len(group)
+            self.rows += len(group)
+
+    def copy_from(self, store):
+        """Carry every category of an existing version over, block by block."""
+        for category in store.categories:
+            source = os.path.join(store.path, store._manifest['categories'][category]['directory'])
+            entry = self._entry(category)
+            directory = os.path.join(self.staging, entry['directory'])
+            for _, filename, _ in COLUMN_FILES:
+                with open(os.path.join(source, filename), 'rb') as src, \
+                        open(os.path.join(directory, filename), 'ab') as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER_BYTES)
+            rows = store._manifest['categories'][category]['rows']
+            entry['rows'] += rows
+            self.rows += rows
+
+    def commit(self):
+        """Publish the staged version and remove all but the previous one."""
+        with open(os.path.join(self.staging, MANIFEST_FILE), 'w') as file:
+            json.dump({'version': self.version, 'rows': self.rows, 'categories': self._categories}, file)
+
+        final = os.path.join(self.root, self.version)
+        os.rename(self.staging, final)
+
+        pointer = os.path.join(self.root, CURRENT_FILE)
+        previous = open_current(self.root)
+        with open(pointer + '.tmp', 'w') as file:
+            file.write(self.version)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(pointer + '.tmp', pointer)
+
+        # Readers may still map the previous version; older ones are unreachable
+        keep = {self.version, previous.version if previous else None}
+        for name in os.listdir(self.root):
+            if name.startswith('v') and name not in keep:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        return open_current(self.root)
+
+    def abort(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+
+# One ingest at a time per process
+ingest_lock = threading.Lock()
+
+
+def ingest(chunks, append_to=None, seed=None):
+    """Write a new version from an iterable of raw chunks.
+
+    append_to is an existing DemandStore to carry over; seed is a DataFrame
+    written first when there is no store yet (the bundled CSV). Returns
+    (store, summary). Raises ValueError for unusable input.
+    """
+    writer = StoreWriter()
+    rejected = 0
+    started = time.perf_counter()
+    try:
+        if append_to is not None:
+            writer.copy_from(append_to)
+        elif seed is not None:
+            writer.append(normalize_chunk(seed)[0])
+        carried = writer.rows
+
+        for chunk in chunks:
+            clean, dropped = normalize_chunk(chunk)
+            rejected += dropped
+            writer.append(clean)
+
+        if writer.rows == carried:
+            raise ValueError('upload contained no valid rows')
+        store = writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+
+    return store, {
+        'version': store.version,
+        'rows_ingested': writer.rows - carried,
+        'rows_rejected': rejected,
+        'total_rows': writer.rows,
+        'categories': len(store),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
@@ -0,0 +1,209 @@
+"""Background precomputation of forecasts into the category_forecasts table.
+
+A daemon thread refits every category every FORECAST_SCHEDULE_INTERVAL
+seconds (0 disables it). Each run stores the hold-out forecast rows with the
+model name, the confidence level and the inventory levels at that level.
+Request handlers then read the stored rows by (category, engine). They fall
+back to an on-demand fit, which is written through, when the rows are
+missing, older than FORECAST_MAX_AGE, or fitted on another dataset version.
+"""
+import calendar
+import datetime
+import os
+import threading
+import time
+
+import forecast_service
+from metrics import registry as metrics
+from repositories import CategoryForecastRepository
+
+SCHEDULE_INTERVAL = float(os.environ.get('FORECAST_SCHEDULE_INTERVAL', 3600))
+MAX_AGE = float(os.environ.get('FORECAST_MAX_AGE', 2 * SCHEDULE_INTERVAL or 7200))
+
+# Inventory levels stored alongside each forecast (the /inventory_recommendation defaults)
+CONFIDENCE_LEVEL = float(os.environ.get('FORECAST_CONFIDENCE_LEVEL', 0.95))
+STORAGE_CAPACITY = float(os.environ.get('FORECAST_STORAGE_CAPACITY', 1000))
+
+# Engines precomputed on every run
+SCHEDULE_ENGINES = [
+    engine.strip() for engine in os.environ.get('FORECAST_SCHEDULE_ENGINES', forecast_service.DEFAULT_ENGINE).split(',')
+    if engine.strip() in forecast_service.ENGINES
+]
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FORECAST_READS = metrics.counter('forecast_reads_total', 'Forecast reads by source (materialized rows or an on-demand fit)', ('source',))
+MATERIALIZE_SECONDS = metrics.histogram('forecast_materialize_seconds', 'Full precompute run time', ('engine',))
+
+
+def _epoch(value):
+    """created_at as epoch seconds (SQLite returns text, MySQL a datetime; both UTC)."""
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+    return calendar.timegm(time.strptime(str(value), TIMESTAMP_FORMAT))
+
+
+def _iso(epoch):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
+
+
+def forecast_rows(category, result, engine, version, generated_at):
+    """category_forecasts rows for one /forecast result, one per forecast year."""
+    forecast = result['forecast']
+    if not forecast:
+        return []
+
+    series = forecast_service.dataset.index.get(category)
+    years = series.years[-len(forecast):]
+    safety_stock, reorder_point = forecast_service.inventory_levels([forecast], CONFIDENCE_LEVEL, STORAGE_CAPACITY)
+    metrics = result['accuracy_metrics']
+    return [
+        {
+            'category': category,
+            'engine': engine,
+            'dataset_version': version,
+            'forecast_date': f'{int(year)}-01-01',
+            'predicted_demand': float(value),
+            'confidence_level': CONFIDENCE_LEVEL,
+            'model_used': result['model_used'],
+            'mae': metrics['MAE'],
+            'mse': metrics['MSE'],
+            'rmse': metrics['RMSE'],
+            'safety_stock': float(safety_stock[0, 0]),
+            'reorder_point': float(reorder_point[0, 0]),
+            'created_at': time.strftime(TIMESTAMP_FORMAT, time.gmtime(generated_at))
+        }
+        for year, value in zip(years, forecast)
+    ]
+
+
+def store_results(results, engine):
+    """Write /forecast results ({category: result}) for one engine; returns the row count."""
+    version = forecast_service.dataset_version()
+    generated_at = time.time()
+    return CategoryForecastRepository().replace_many({
+        (category, engine): forecast_rows(category, result, engine, version, generated_at)
+        for category, result in results.items()
+    })
+
+
+def materialize(engines=None):
+    """Fit every category with each engine and replace the stored rows.
+
+    Fits go through the pool's background lane, so a run never takes the
+    headroom live requests are admitted against.
+    """
+    forecast_service.refresh_dataset()
+    summary = {}
+    for engine in engines or SCHEDULE_ENGINES:
+        started = time.perf_counter()
+        with forecast_service.jobs.background():
+            results, errors = forecast_service.forecast_many(list(forecast_service.dataset.index.categories), engine)
+        summary[engine] = {
+            'categories': len(results),
+            'rows': store_results(results, engine),
+            'errors': errors,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+        MATERIALIZE_SECONDS.observe(time.perf_counter() - started, engine=engine)
+    return summary
+
+
+def materialized_forecast(category, engine):
+    """Stored result shaped like /forecast plus freshness fields; None if missing or stale."""
+    rows = CategoryForecastRepository().latest(category, engine)
+    if not rows:
+        return None
+
+    first = rows[0]
+    generated_at = _epoch(first['created_at'])
+    age = time.time() - generated_at
+    if age > MAX_AGE or first['dataset_version'] != forecast_service.dataset_version():
+        return None
+
+    metrics = {name: first[column] for name, column in (('MAE', 'mae'), ('MSE', 'mse'), ('RMSE', 'rmse'))}
+    return {
+        'category': category,
+        'forecast': [float(row['predicted_demand']) for row in rows],
+        'accuracy_metrics': {name: float(value) if value is not None else None for name, value in metrics.items()},
+        'model_used': first['model_used'],
+        'confidence_level': float(first['confidence_level']),
+        'generated_at': _iso(generated_at),
+        'age_seconds': round(age, 1),
+        'source': 'materialized'
+    }
+
+
+def read_forecast(category, engine):
+    """Keyed read of a category's forecast, fitting (and storing) it on demand when needed.
+
+    Returns None if the category is unknown.
+    """
+    # Background precompute starts with the first forecast read, after any server fork
+    forecast_scheduler.start()
+    forecast_service.refresh_dataset()
+    try:
+        stored = materialized_forecast(category, engine)
+    except Exception as e:
+        print(f"Error reading materialized forecasts: {e}")
+        stored = None
+    if stored is not None:
+        FORECAST_READS.inc(source='materialized')
+        return stored
+
+    FORECAST_READS.inc(source='on_demand')
+    result = forecast_service.forecast_category(category, engine)
+    if result is None:
+        return None
+
+    try:
+        store_results({category: result}, engine)
+    except Exception as e:
+        print(f"Error storing forecast for {category}: {e}")
+    return {**result, 'generated_at': _iso(time.time()), 'age_seconds': 0.0, 'source': 'on_demand'}
+
+
+class ForecastScheduler:
+    """Runs materialize() now and then every `interval` seconds on a daemon thread."""
+
+    def __init__(self, interval=SCHEDULE_INTERVAL):
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.last_run = None
+        self.last_summary = None
+        self.last_error = None
+
+    def start(self):
+        with self._lock:
+            if self.interval <= 0 or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='forecast-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.last_summary = materialize()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error materializing forecasts: {e}")
+            self.last_run = time.time()
+            self._stop.wait(self.interval)
+
+    def status(self):
+        return {
+            'interval_seconds': self.interval,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_run': _iso(self.last_run) if self.last_run else None,
+            'last_summary': self.last_summary,
+            'last_error': self.last_error
+        }
+
+
+forecast_scheduler = ForecastScheduler()
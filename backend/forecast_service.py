@@ -0,0 +1,273 @@
+"""In-process forecasting service shared by the forecast and inventory endpoints.
+
+Everything here returns plain Python/NumPy data; the Flask routes in
+demand_forecast_model.py only parse requests and serialize results.
+statsmodels, scipy and scikit-learn are imported on first use (or by warm_up()),
+so importing this module stays cheap.
+"""
+import os
+import time
+
+import numpy as np
+
+import demand_store
+import holt_winters_batch
+from demand_dataset import CSV_PATH, DemandDataset
+from job_queue import JobQueue
+from metrics import registry as metrics
+from model_registry import ModelRegistry
+
+file_path = CSV_PATH
+
+# Exponential Smoothing settings, part of every registry key
+MODEL_PARAMS = (('trend', 'add'), ('seasonal', 'add'), ('seasonal_periods', 3))
+MODEL_NAME = 'Exponential Smoothing'
+
+# Forecasting engines: per-series statsmodels fits, or one batched NumPy Holt-Winters pass
+ENGINES = {
+    'statsmodels': MODEL_NAME,
+    'numpy': 'Holt-Winters (NumPy batch)'
+}
+DEFAULT_ENGINE = os.environ.get('FORECAST_ENGINE', 'statsmodels')
+
+# Fitted forecasts are reused until they expire or the CSV changes
+model_registry = ModelRegistry(
+    file_path,
+    max_entries=int(os.environ.get('FORECAST_CACHE_SIZE', 256)),
+    ttl_seconds=float(os.environ.get('FORECAST_CACHE_TTL', 3600))
+)
+
+# Dataset and per-category, year-sorted arrays, loaded on first use; every lookup reads dataset.index
+dataset = DemandDataset(model_registry, file_path)
+
+# Pool fits are timed from the request side, so they include any wait for a free worker
+FIT_SECONDS = metrics.histogram('forecast_fit_seconds', 'Model fit time (one series, or a whole batch)', ('engine', 'mode'))
+FILTER_SECONDS = metrics.histogram('dataset_filter_seconds', 'Time to select and split one category of the dataset')
+metrics.callback(
+    'forecast_model_cache_requests_total', 'Fitted-model registry lookups by result',
+    lambda: {('hit',): model_registry.hits, ('miss',): model_registry.misses}, ('result',), kind='counter'
+)
+
+def refresh_dataset():
+    """Reload the dataset if the CSV changed on disk or a new store version was published."""
+    dataset.refresh()
+
+def warm_up():
+    """Import the model libraries and load the dataset now instead of on the first request.
+
+    Meant for preforking servers: called in the parent, the loaded data is shared
+    with every worker copy-on-write.
+    """
+    import scipy.stats  # noqa: F401
+    import sklearn.metrics  # noqa: F401
+    import statsmodels.tsa.holtwinters  # noqa: F401
+
+    index = dataset.index
+    for category in index.categories:
+        index.get(category)
+    return len(index)
+
+def dataset_version():
+    """Identifier of the data forecasts are currently fitted on (store version or CSV hash)."""
+    index = dataset.index
+    if isinstance(index, demand_store.DemandStore):
+        return f'store:{index.version}'
+    return f'csv:{model_registry.source_hash[:16]}'
+
+def ingest_history(chunks, replace=False):
+    """Write uploaded chunks as a new store version and switch forecasting over to it.
+
+    Appends to the current store by default (seeded from the bundled CSV the first
+    time); replace=True starts the store from the upload alone.
+    """
+    current = demand_store.open_current()
+    seed = dataset.frame if current is None and not replace else None
+    _, summary = demand_store.ingest(chunks, append_to=None if replace else current, seed=seed)
+    refresh_dataset()
+    return summary
+
+def optimized_forecast(series, forecast_steps=5):
+    """Optimized Exponential Smoothing forecast."""
+    # Seasonal initialization needs two full cycles; uploaded categories can be shorter
+    if len(series) < holt_winters_batch.min_fit_length(dict(MODEL_PARAMS)['seasonal_periods']):
+        return np.array([series.mean()] * forecast_steps)
+
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    model = ExponentialSmoothing(series, initialization_method='estimated', **dict(MODEL_PARAMS))
+    fit = model.fit()
+    forecast = fit.forecast(forecast_steps)
+    return np.clip(forecast, 0, None)
+
+def prepare_category(category, engine=DEFAULT_ENGINE):
+    """Split a category's demand into train/test and build its registry key (None if unknown)."""
+    with FILTER_SECONDS.time():
+        return _prepare_category(category, engine)
+
+def _prepare_category(category, engine):
+    series = dataset.index.get(category)
+    if series is None:
+        return None
+
+    demand_series = series.demand
+    train_size = max(3, int(len(demand_series) * 0.8))
+    train, test = demand_series[:train_size], demand_series[train_size:]
+
+    years = series.years
+    window = (int(years[0]), int(years[min(train_size, len(years)) - 1]))
+    cache_key = (category, window, len(test), MODEL_PARAMS, engine)
+    return train, test, cache_key
+
+def build_forecast_result(category, test, forecast, engine=DEFAULT_ENGINE):
+    """Score a hold-out forecast and shape it like the /forecast response."""
+    # Calculate accuracy metrics (none without a hold-out, e.g. a freshly uploaded short series)
+    if len(test):
+        from sklearn.metrics import mean_absolute_error, mean_squared_error
+        mae = mean_absolute_error(test, forecast)
+        mse = mean_squared_error(test, forecast)
+        rmse = np.sqrt(mse)
+    else:
+        mae = mse = rmse = None
+
+    return {
+        'category': category,
+        'forecast': np.asarray(forecast).tolist(),
+        'accuracy_metrics': {
+            'MAE': mae,
+            'MSE': mse,
+            'RMSE': rmse
+        },
+        'model_used': ENGINES[engine]
+    }
+
+def fit_series(train, forecast_steps, engine=DEFAULT_ENGINE):
+    """Fit one training series with the chosen engine and forecast ahead."""
+    with FIT_SECONDS.time(engine=engine, mode='single'):
+        if engine == 'numpy':
+            return holt_winters_batch.fit_forecast_many([train], [forecast_steps])[0]
+        # statsmodels fits run in the pool, off the request thread; raises QueueFull when it is saturated
+        return jobs.submit(_fit_in_worker, np.asarray(train, dtype=float), forecast_steps).result()
+
+def forecast_category(category, engine=DEFAULT_ENGINE):
+    """Forecast one category (registry first, then fit); None if the category is unknown."""
+    refresh_dataset()
+    prepared = prepare_category(category, engine)
+    if prepared is None:
+        return None
+
+    train, test, cache_key = prepared
+    result = model_registry.get(cache_key)
+
+    if result is None:
+        forecast = fit_series(train, len(test), engine)
+        result = build_forecast_result(category, test, forecast, engine)
+        model_registry.put(cache_key, result)
+
+    return result
+
+# Process pool for model fits (created on first use); bounded so a burst of fits gets a 429
+FORECAST_POOL_WORKERS = int(os.environ.get('FORECAST_POOL_WORKERS', os.cpu_count() or 1))
+jobs = JobQueue(FORECAST_POOL_WORKERS, preload=['statsmodels.tsa.holtwinters'])
+jobs.register_metrics(metrics, 'forecast_pool')
+
+def _fit_in_worker(train_values, forecast_steps):
+    """Pool entry point: plain arrays in and out so the payload pickles cheaply."""
+    forecast = optimized_forecast(train_values, forecast_steps)
+    return np.asarray(forecast, dtype=float)
+
+def forecast_many(categories, engine=DEFAULT_ENGINE):
+    """Forecast several categories, fitting registry misses in parallel (process pool or NumPy batch)."""
+    refresh_dataset()
+    results = {}
+    errors = {}
+    pending = {}
+
+    for category in categories:
+        prepared = prepare_category(category, engine)
+        if prepared is None:
+            errors[category] = 'Category not found'
+            continue
+
+        train, test, cache_key = prepared
+        cached = model_registry.get(cache_key)
+        if cached is not None:
+            results[category] = cached
+            continue
+
+        if len(categories) == 1:
+            # Not worth a round trip to the pool for a single fit
+            results[category] = build_forecast_result(category, test, fit_series(train, len(test), engine), engine)
+            model_registry.put(cache_key, results[category])
+            continue
+
+        pending[category] = (test, cache_key, train)
+
+    if pending and engine == 'numpy':
+        # Every miss in one vectorized fit
+        names = list(pending)
+        with FIT_SECONDS.time(engine=engine, mode='batch'):
+            forecasts = holt_winters_batch.fit_forecast_many(
+                [pending[name][2] for name in names], [len(pending[name][0]) for name in names]
+            )
+        for category, forecast in zip(names, forecasts):
+            test, cache_key, _ = pending[category]
+            results[category] = build_forecast_result(category, test, forecast, engine)
+            model_registry.put(cache_key, results[category])
+
+    elif pending:
+        started = time.perf_counter()
+        futures = dict(zip(pending, jobs.map(_fit_in_worker, [
+            (train_values, len(test)) for test, cache_key, train_values in pending.values()
+        ])))
+        for category, future in futures.items():
+            test, cache_key, _ = pending[category]
+            try:
+                forecast = future.result()
+            except Exception as e:
+                errors[category] = f'Model fit failed: {e}'
+                continue
+            results[category] = build_forecast_result(category, test, forecast, engine)
+            model_registry.put(cache_key, results[category])
+        FIT_SECONDS.observe(time.perf_counter() - started, engine=engine, mode='batch')
+
+    return results, errors
+
+# Number of forecast periods covered by the replenishment lead time
+LEAD_TIME_PERIODS = 2
+
+def inventory_levels(forecasts, service_levels, storage_capacity):
+    """Safety stock and reorder points for every (forecast row, service level) pair in one pass.
+
+    forecasts is a (categories, periods) array (NaN-padded if ragged); returns two
+    (categories, service levels) arrays.
+    """
+    from scipy.stats import norm
+
+    lead_time = np.atleast_2d(np.asarray(forecasts, dtype=float))[:, :LEAD_TIME_PERIODS]
+    lead_time_demand = np.nansum(lead_time, axis=1)[:, None]
+    demand_std = np.nanstd(lead_time, axis=1)[:, None]
+
+    z_scores = norm.ppf(np.atleast_1d(np.asarray(service_levels, dtype=float)))[None, :]
+    safety_stock = np.maximum(z_scores * demand_std, 1)
+    reorder_point = np.minimum(lead_time_demand + safety_stock, storage_capacity)
+    return safety_stock, reorder_point
+
+def latest_storage_capacity(category):
+    """Latest storage capacity on record for a category, read from the index."""
+    series = dataset.index.get(category)
+    return float(series.storage_capacity[-1]) if series is not None else None
+
+def catalog_inventory(service_levels, storage_capacity, engine=DEFAULT_ENGINE):
+    """Forecast every category and compute inventory levels for all of them at every service level."""
+    refresh_dataset()
+    results, errors = forecast_many(list(dataset.index.categories), engine)
+    categories = sorted(results)
+
+    horizon = max((len(results[c]['forecast']) for c in categories), default=0)
+    forecasts = np.full((len(categories), max(horizon, LEAD_TIME_PERIODS)), np.nan)
+    for row, category in enumerate(categories):
+        values = results[category]['forecast']
+        forecasts[row, :len(values)] = values
+
+    safety_stock, reorder_point = inventory_levels(forecasts, service_levels, storage_capacity)
+    return categories, safety_stock, reorder_point, errors
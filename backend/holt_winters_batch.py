@@ -0,0 +1,170 @@
+"""Additive Holt-Winters fitted for many series at once with NumPy.
+
+Series of equal length are stacked into a (series, time) array. The
+smoothing recursions then run over time only, vectorized across every
+series and every candidate (alpha, beta, gamma) on a parameter grid.
+"""
+import itertools
+
+import numpy as np
+
+# Candidate smoothing parameters; every combination is scored per series
+PARAMETER_GRID = np.round(np.arange(0.05, 1.0, 0.15), 2)
+
+# Second pass: offsets tried around each series' best coarse-grid parameters
+REFINE_OFFSETS = np.array([-0.1, -0.05, 0.0, 0.05, 0.1])
+
+# Upper bound on series x parameter cells processed together, to bound memory
+MAX_BATCH_CELLS = 2_000_000
+
+# Full seasons a series needs before either engine fits it (statsmodels seeds its seasonal terms from two)
+MIN_FIT_SEASONS = 2
+
+
+def min_fit_length(season_length):
+    """Shortest series the forecasting engines fit; shorter ones are forecast as their mean."""
+    return max(3, MIN_FIT_SEASONS * season_length)
+
+
+def _parameter_combinations(grid):
+    combos = np.array(list(itertools.product(grid, grid, grid)), dtype=float)
+    return combos[:, 0], combos[:, 1], combos[:, 2]
+
+
+def _initial_states(values, season_length):
+    """Start values from a least-squares line through the series plus mean per-slot residuals.
+
+    The level is placed one step before the first smoothed observation, so the
+    recursions start at t = season_length.
+    """
+    length = values.shape[1]
+    time_index = np.arange(length, dtype=float)
+    centred = time_index - time_index.mean()
+    trend = (values * centred).sum(axis=1) / (centred ** 2).sum()
+    intercept = values.mean(axis=1) - trend * time_index.mean()
+
+    residuals = values - (intercept[:, None] + trend[:, None] * time_index)
+    seasonal = np.stack([residuals[:, slot::season_length].mean(axis=1) for slot in range(season_length)], axis=1)
+    seasonal -= seasonal.mean(axis=1, keepdims=True)
+
+    level = intercept + trend * (season_length - 1)
+    return level, trend, seasonal
+
+
+def _smooth(values, season_length, alpha, beta, gamma):
+    """Run the additive recursions; parameters broadcast against the series axis.
+
+    values is (S, T); alpha/beta/gamma are (S, P) or (P,). Returns the final
+    level, trend and seasonal states plus the one-step-ahead SSE, all with a
+    trailing parameter axis.
+    """
+    level0, trend0, seasonal0 = _initial_states(values, season_length)
+    shape = np.broadcast_shapes((values.shape[0], 1), np.shape(alpha))
+
+    level = np.broadcast_to(level0[:, None], shape).copy()
+    trend = np.broadcast_to(trend0[:, None], shape).copy()
+    seasonal = np.broadcast_to(seasonal0[:, :, None], (values.shape[0], season_length, shape[1])).copy()
+    sse = np.zeros(shape)
+
+    for t in range(season_length, values.shape[1]):
+        observed = values[:, t][:, None]
+        slot = t % season_length
+        season = seasonal[:, slot]
+
+        error = observed - (level + trend + season)
+        sse += error ** 2
+
+        previous_level = level
+        level = alpha * (observed - season) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonal[:, slot] = gamma * (observed - level) + (1 - gamma) * season
+
+    return level, trend, seasonal, sse
+
+
+def fit_states(values, season_length=3, grid=PARAMETER_GRID):
+    """Pick smoothing parameters for every row of an (S, T) array and return its final states.
+
+    Returns (level (S,), trend (S,), seasonal (S, season_length), parameters (S, 3)).
+    seasonal is indexed by t % season_length, so the next slot is T % season_length.
+    """
+    values = np.asarray(values, dtype=float)
+    series_count = values.shape[0]
+    level = np.zeros(series_count)
+    trend = np.zeros(series_count)
+    seasonal = np.zeros((series_count, season_length))
+    parameters = np.zeros((series_count, 3))
+
+    alphas, betas, gammas = _parameter_combinations(grid)
+    offset_alpha, offset_beta, offset_gamma = _parameter_combinations(REFINE_OFFSETS)
+    chunk = max(1, MAX_BATCH_CELLS // len(alphas))
+
+    for start in range(0, series_count, chunk):
+        block = values[start:start + chunk]
+        rows = slice(start, start + len(block))
+
+        # Grid search: every series x every parameter combination in one pass
+        _, _, _, sse = _smooth(block, season_length, alphas, betas, gammas)
+        best = sse.argmin(axis=1)
+
+        # Refine around each series' best point (per-series (S, P) parameter grid)
+        local_alpha = np.clip(alphas[best][:, None] + offset_alpha, 0.01, 0.99)
+        local_beta = np.clip(betas[best][:, None] + offset_beta, 0.01, 0.99)
+        local_gamma = np.clip(gammas[best][:, None] + offset_gamma, 0.01, 0.99)
+        _, _, _, sse = _smooth(block, season_length, local_alpha, local_beta, local_gamma)
+        picks = np.arange(len(block))
+        best = sse.argmin(axis=1)
+        alpha = local_alpha[picks, best][:, None]
+        beta = local_beta[picks, best][:, None]
+        gamma = local_gamma[picks, best][:, None]
+
+        # Refit with each series' own best parameters to get its final states
+        block_level, block_trend, block_seasonal, _ = _smooth(block, season_length, alpha, beta, gamma)
+        level[rows] = block_level[:, 0]
+        trend[rows] = block_trend[:, 0]
+        seasonal[rows] = block_seasonal[:, :, 0]
+        parameters[rows] = np.stack([alpha[:, 0], beta[:, 0], gamma[:, 0]], axis=1)
+
+    return level, trend, seasonal, parameters
+
+
+def forecast_from_states(level, trend, seasonal, steps, next_slot):
+    """Project fitted states `steps` periods ahead; next_slot is the seasonal index of the first step."""
+    season_length = seasonal.shape[-1]
+    horizon = np.arange(1, steps + 1)
+    slots = (next_slot + horizon - 1) % season_length
+    forecasts = np.asarray(level)[..., None] + np.asarray(trend)[..., None] * horizon + seasonal[..., slots]
+    return np.clip(forecasts, 0, None)
+
+
+def fit_forecast(values, steps, season_length=3, grid=PARAMETER_GRID):
+    """Fit every row of an (S, T) array and forecast `steps` periods ahead.
+
+    Returns (forecasts (S, steps), parameters (S, 3)) with forecasts clipped at 0.
+    """
+    values = np.asarray(values, dtype=float)
+    series_count, length = values.shape
+
+    # Too short to seed a season: repeat the mean, at the same length as forecast_service.optimized_forecast
+    if length < min_fit_length(season_length):
+        forecasts = np.repeat(values.mean(axis=1)[:, None], steps, axis=1)
+        return np.clip(forecasts, 0, None), np.zeros((series_count, 3))
+
+    level, trend, seasonal, parameters = fit_states(values, season_length, grid)
+    return forecast_from_states(level, trend, seasonal, steps, length % season_length), parameters
+
+
+def fit_forecast_many(series_list, steps_list, season_length=3, grid=PARAMETER_GRID):
+    """Forecast ragged series: rows are grouped by (length, steps) and each group is fitted in one batch."""
+    forecasts = [None] * len(series_list)
+    groups = {}
+    for position, (series, steps) in enumerate(zip(series_list, steps_list)):
+        groups.setdefault((len(series), steps), []).append(position)
+
+    for (_, steps), positions in groups.items():
+        stacked = np.vstack([np.asarray(series_list[p], dtype=float) for p in positions])
+        group_forecasts, _ = fit_forecast(stacked, steps, season_length, grid)
+        for row, position in enumerate(positions):
+            forecasts[position] = group_forecasts[row]
+
+    return forecasts
@@ -1,17 +1,15 @@
 from flask import Flask, render_template, request, jsonify
-import csv
+from user_store import UserStore
 
 app = Flask(__name__)
 
-# Function to check if the user already exists in the CSV
+# Users are loaded once from log.csv and indexed by email; signups append to the same file
+user_store = UserStore("log.csv")
+
+# Function to check if the user already exists (emails are unique)
 def user_exists(name, email):
     try:
-        with open("log.csv", mode="r") as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if row[0] == name and row[1] == email:  # Check name and email match
-                    return True
-        return False
+        return user_store.exists(email)
     except Exception as e:
         print(f"Error reading the CSV file: {e}")
         return False
@@ -19,12 +17,7 @@ def user_exists(name, email):
 # Function to check user credentials (login)
 def validate_user(email, password):
     try:
-        with open("log.csv", mode="r") as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if row[1] == email and row[2] == password:  # Check email and password match
-                    return True
-        return False
+        return user_store.validate(email, password)
     except Exception as e:
         print(f"Error reading the CSV file: {e}")
         return False
@@ -46,9 +39,8 @@ def signup():
 
     # Add user to CSV
     try:
-        with open("log.csv", mode="a", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow([name, email, password])
+        if not user_store.add(name, email, password):
+            return jsonify({"success": False, "message": "User already exists."}), 400
         return jsonify({"success": True, "message": "Account registered successfully!"}), 200
     except Exception as e:
         print(f"Error details: {e}")
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cache of fitted forecast results keyed by (category, training window, horizon, model params)
+class ModelRegistry:
+    """LRU/TTL store of fitted forecasts that is cleared when the source dataset changes."""
+
+    def __init__(self, source_path, max_entries=256, ttl_seconds=3600):
+        self.source_path = source_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stat_signature = None
+        self._content_hash = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.source_changed()
+
+    # Hash the dataset file so a touch without edits does not clear the cache
+    def _hash_source(self):
+        digest = hashlib.sha256()
+        with open(self.source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def source_changed(self):
+        """Return True (and drop every entry) if the dataset file changed since the last check."""
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            return False
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._stat_signature:
+            return False
+
+        with self._lock:
+            if signature == self._stat_signature:
+                return False
+            content_hash = self._hash_source()
+            first_check = self._content_hash is None
+            changed = not first_check and content_hash != self._content_hash
+            self._stat_signature = signature
+            self._content_hash = content_hash
+            if changed:
+                self._entries.clear()
+                self.invalidations += 1
+            return changed
+
+    @property
+    def source_hash(self):
+        """sha256 of the dataset file as of the last check."""
+        return self._content_hash
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'content_hash': self._content_hash
+            }
@@ -0,0 +1,198 @@
+"""Online Holt-Winters updates for demand observations that arrive after the CSV was loaded.
+
+Each category keeps its smoothing state (level, trend, seasonal slots and the
+fitted alpha/beta/gamma). A new observation advances that state in O(1). A full
+refit over the whole history runs only when one of these holds:
+- REFIT_EVERY observations have arrived since the last fit
+- REFIT_INTERVAL seconds have passed since the last fit
+- the recent one-step MAE/RMSE drifts more than DRIFT_THRESHOLD above the category's
+  hold-out metrics from the NumPy engine
+Everything runs in-process, so these endpoints never wait on the fit pool.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import forecast_service
+import holt_winters_batch
+
+# Same seasonality as the batch models
+SEASON_LENGTH = dict(forecast_service.MODEL_PARAMS)['seasonal_periods']
+
+# Refit schedule: every N ingested observations or every N seconds, whichever comes first
+REFIT_EVERY = int(os.environ.get('ONLINE_REFIT_EVERY', 12))
+REFIT_INTERVAL = float(os.environ.get('ONLINE_REFIT_INTERVAL', 24 * 3600))
+
+# Drift trigger: recent error more than this fraction above the baseline, over at least DRIFT_MIN_OBSERVATIONS
+DRIFT_THRESHOLD = float(os.environ.get('ONLINE_DRIFT_THRESHOLD', 0.5))
+DRIFT_WINDOW = int(os.environ.get('ONLINE_DRIFT_WINDOW', 6))
+DRIFT_MIN_OBSERVATIONS = 3
+
+
+class SmoothingState:
+    """Additive Holt-Winters state for one category, advanced one observation at a time."""
+
+    def __init__(self, history, baseline):
+        self.baseline = baseline
+        self.refit(history)
+
+    def refit(self, history):
+        history = np.asarray(history, dtype=float)
+        level, trend, seasonal, parameters = holt_winters_batch.fit_states(history[None, :], SEASON_LENGTH)
+        self.level = float(level[0])
+        self.trend = float(trend[0])
+        self.seasonal = seasonal[0].copy()
+        self.alpha, self.beta, self.gamma = (float(p) for p in parameters[0])
+        self.length = len(history)
+        self.fitted_at = time.time()
+        self.observations_since_fit = 0
+        self.errors = deque(maxlen=DRIFT_WINDOW)
+
+    def update(self, value):
+        """Advance the recursions by one observation and record its one-step-ahead error."""
+        slot = self.length % SEASON_LENGTH
+        season = self.seasonal[slot]
+        self.errors.append(value - (self.level + self.trend + season))
+
+        previous_level = self.level
+        self.level = self.alpha * (value - season) + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (self.level - previous_level) + (1 - self.beta) * self.trend
+        self.seasonal[slot] = self.gamma * (value - self.level) + (1 - self.gamma) * season
+
+        self.length += 1
+        self.observations_since_fit += 1
+
+    def forecast(self, steps):
+        return holt_winters_batch.forecast_from_states(
+            self.level, self.trend, self.seasonal, steps, self.length % SEASON_LENGTH
+        )
+
+    def recent_metrics(self):
+        if not self.errors:
+            return None
+        errors = np.asarray(self.errors)
+        return {'MAE': float(np.abs(errors).mean()), 'RMSE': float(np.sqrt((errors ** 2).mean()))}
+
+    def refit_reason(self):
+        """Why this state should be refitted now (None if it should not)."""
+        if self.observations_since_fit >= REFIT_EVERY:
+            return 'schedule'
+        if self.observations_since_fit and time.time() - self.fitted_at >= REFIT_INTERVAL:
+            return 'interval'
+
+        recent = self.recent_metrics()
+        if recent and len(self.errors) >= DRIFT_MIN_OBSERVATIONS:
+            for metric in ('MAE', 'RMSE'):
+                if self.baseline[metric] is not None and recent[metric] > self.baseline[metric] * (1 + DRIFT_THRESHOLD):
+                    return 'drift'
+        return None
+
+
+class OnlineForecaster:
+    """Ingested observations and smoothing states per category, on top of the CSV history."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._observations = {}  # category -> [(year, demand)] newer than the CSV
+        self._states = {}
+        self._index = None
+        self.refits = {'schedule': 0, 'interval': 0, 'drift': 0}
+
+    def _sync_dataset(self):
+        # A changed CSV rebuilds every state; ingested years it now covers are dropped
+        forecast_service.refresh_dataset()
+        index = forecast_service.dataset.index
+        if index is not self._index:
+            self._index = index
+            self._states.clear()
+            for category, rows in self._observations.items():
+                series = index.get(category)
+                if series is not None:
+                    last_year = int(series.years[-1])
+                    self._observations[category] = [row for row in rows if row[0] > last_year]
+
+    def _history(self, category):
+        series = self._index.get(category)
+        ingested = [demand for _, demand in self._observations.get(category, [])]
+        return np.concatenate([series.demand, np.asarray(ingested, dtype=float)])
+
+    def _last_year(self, category):
+        rows = self._observations.get(category)
+        return rows[-1][0] if rows else int(self._index.get(category).years[-1])
+
+    def _state(self, category):
+        state = self._states.get(category)
+        if state is None:
+            # Baseline from the in-process NumPy engine, so it never queues behind the fit pool
+            baseline = forecast_service.forecast_category(category, 'numpy')['accuracy_metrics']
+            state = SmoothingState(self._history(category), baseline)
+            self._states[category] = state
+        return state
+
+    def observe(self, category, observations):
+        """Append (year, demand) observations for a category and update its state.
+
+        Returns a status dict, or None if the category is unknown. Raises ValueError,
+        before anything is applied, if a year repeats or is not after the latest year
+        already on record.
+        """
+        observations = sorted(observations)
+        with self._lock:
+            self._sync_dataset()
+            if category not in self._index:
+                return None
+
+            # Check the whole batch first so a rejected one leaves the state untouched
+            last_year = self._last_year(category)
+            for position, (year, _) in enumerate(observations):
+                if position and year == observations[position - 1][0]:
+                    raise ValueError(f'year {year} appears more than once')
+                if year <= last_year:
+                    raise ValueError(f'year {year} is not after the latest recorded year {last_year}')
+
+            state = self._state(category)
+            refit = None
+            for year, demand in observations:
+                self._observations.setdefault(category, []).append((year, demand))
+                state.update(demand)
+
+                reason = state.refit_reason()
+                if reason:
+                    state.refit(self._history(category))
+                    self.refits[reason] += 1
+                    refit = reason
+
+            return {**self._describe(category, state), 'refit': refit}
+
+    def forecast(self, category, steps):
+        """Forecast from the current state; None if the category is unknown."""
+        with self._lock:
+            self._sync_dataset()
+            if category not in self._index:
+                return None
+
+            state = self._state(category)
+            first_year = self._last_year(category) + 1
+            return {
+                **self._describe(category, state),
+                'forecast': state.forecast(steps).tolist(),
+                'years': list(range(first_year, first_year + steps))
+            }
+
+    def _describe(self, category, state):
+        return {
+            'category': category,
+            'last_year': self._last_year(category),
+            'ingested_observations': len(self._observations.get(category, [])),
+            'observations_since_refit': state.observations_since_fit,
+            'last_refit': state.fitted_at,
+            'recent_metrics': state.recent_metrics(),
+            'baseline_metrics': state.baseline,
+            'smoothing_parameters': {'alpha': state.alpha, 'beta': state.beta, 'gamma': state.gamma}
+        }
+
+
+online_forecaster = OnlineForecaster()
@@ -0,0 +1,83 @@
+"""Table-level queries over the pooled database (see database.py).
+
+Each repository owns the SQL for one schema.sql table. Bulk writes go
+through a single executemany in one transaction.
+"""
+from database import get_database
+
+
+class Repository:
+    def __init__(self, database=None):
+        self.database = database or get_database()
+
+    def _insert_many(self, table, columns, rows):
+        """One executemany for all rows; keys missing from a row are stored as NULL."""
+        return self.database.execute_many(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            ([row.get(column) for column in columns] for row in rows)
+        )
+
+
+class ProductRepository(Repository):
+    def list(self, category=None):
+        if category:
+            return self.database.fetch_all(
+                'SELECT * FROM products WHERE LOWER(category) = ? ORDER BY id', (category.strip().lower(),)
+            )
+        return self.database.fetch_all('SELECT * FROM products ORDER BY id')
+
+
+class InventoryRepository(Repository):
+    def list(self, low_stock_only=False):
+        query = (
+            'SELECT i.id, i.product_id, p.name AS product_name, p.category, i.quantity, '
+            'i.min_stock_level, i.max_stock_level, i.last_updated '
+            'FROM inventory i JOIN products p ON p.id = i.product_id'
+        )
+        if low_stock_only:
+            query += ' WHERE i.quantity <= i.min_stock_level'
+        return self.database.fetch_all(query + ' ORDER BY i.id')
+
+
+class SupplierRepository(Repository):
+    def list(self):
+        return self.database.fetch_all('SELECT * FROM suppliers ORDER BY rating DESC, id')
+
+
+class RouteRepository(Repository):
+    COLUMNS = ('route_name', 'start_location', 'end_location', 'distance_km', 'estimated_time_minutes', 'cost')
+
+    def add_many(self, rows):
+        """Insert route rows (dicts with COLUMNS keys) in one batch; returns the row count."""
+        return self._insert_many('routes', self.COLUMNS, rows)
+
+    def recent(self, limit=50):
+        return self.database.fetch_all('SELECT * FROM routes ORDER BY id DESC LIMIT ?', (limit,))
+
+
+class CategoryForecastRepository(Repository):
+    """Materialized per-category forecasts; each (category, engine) keeps only its latest run."""
+    COLUMNS = (
+        'category', 'engine', 'dataset_version', 'forecast_date', 'predicted_demand', 'confidence_level',
+        'model_used', 'mae', 'mse', 'rmse', 'safety_stock', 'reorder_point', 'created_at'
+    )
+
+    def replace_many(self, runs):
+        """Swap in new runs ({(category, engine): [row, ...]}) in one transaction; returns the row count."""
+        keys = list(runs)
+        rows = [[row.get(column) for column in self.COLUMNS] for key in keys for row in runs[key]]
+        with self.database.connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(self.database.sql('DELETE FROM category_forecasts WHERE category = ? AND engine = ?'), keys)
+            if rows:
+                cursor.executemany(self.database.sql(
+                    f"INSERT INTO category_forecasts ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})"
+                ), rows)
+        return len(rows)
+
+    def latest(self, category, engine):
+        return self.database.fetch_all(
+            'SELECT * FROM category_forecasts WHERE category = ? AND engine = ? ORDER BY forecast_date',
+            (category, engine)
+        )
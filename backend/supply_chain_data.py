@@ -0,0 +1,54 @@
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from database import PoolTimeout
+from repositories import InventoryRepository, ProductRepository, RouteRepository, SupplierRepository
+
+app = Flask(__name__)
+CORS(app)
+
+def busy():
+    return jsonify({'error': 'Database busy, please retry'}), 503
+
+@app.route('/products', methods=['GET'])
+def list_products():
+    try:
+        return jsonify({'products': ProductRepository().list(request.args.get('category'))})
+    except PoolTimeout:
+        return busy()
+
+@app.route('/inventory', methods=['GET'])
+def list_inventory():
+    low_stock_only = request.args.get('low_stock', 'false').lower() == 'true'
+    try:
+        return jsonify({'inventory': InventoryRepository().list(low_stock_only)})
+    except PoolTimeout:
+        return busy()
+
+@app.route('/suppliers', methods=['GET'])
+def list_suppliers():
+    try:
+        return jsonify({'suppliers': SupplierRepository().list()})
+    except PoolTimeout:
+        return busy()
+
+@app.route('/routes', methods=['GET', 'POST'])
+def saved_routes():
+    try:
+        if request.method == 'GET':
+            return jsonify({'routes': RouteRepository().recent(request.args.get('limit', 50, type=int))})
+
+        # One route object or a list of them; saved in a single batch
+        payload = request.get_json(silent=True)
+        routes = payload if isinstance(payload, list) else [payload] if payload else []
+        if not routes or not all(
+            isinstance(route, dict) and route.get('route_name') and route.get('start_location') and route.get('end_location')
+            for route in routes
+        ):
+            return jsonify({'error': 'each route needs route_name, start_location and end_location'}), 400
+
+        return jsonify({'saved': RouteRepository().add_many(routes)}), 201
+    except PoolTimeout:
+        return busy()
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+# Point every data, upload and log path at a scratch directory before any backend module reads its settings
+_scratch = tempfile.mkdtemp(prefix='backend-tests-')
+os.environ.setdefault('DATA_DIR', os.path.join(_scratch, 'data'))
+os.environ.setdefault('UPLOAD_DIR', os.path.join(_scratch, 'uploads'))
+os.environ.setdefault('LOG_DIR', os.path.join(_scratch, 'logs'))
+os.environ.setdefault('SQLITE_PATH', os.path.join(_scratch, 'supply_chain_ai.db'))
+os.environ.setdefault('FORECAST_SCHEDULE_INTERVAL', '0')
+for name in ('DATA_DIR', 'UPLOAD_DIR', 'LOG_DIR'):
+    os.makedirs(os.environ[name], exist_ok=True)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
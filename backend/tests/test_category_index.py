@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from category_index import CategoryIndex
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'Year': [2021, 2019, 2020, 2020, 2019, 2021],
+        'Furniture Category': ['sofa', 'sofa', 'sofa', 'bed', 'bed', 'bed'],
+        'Market Demand (Millions)': [3.0, 1.0, 2.0, 20.0, 10.0, 30.0],
+        'Storage Capacity (Millions)': [30.0, 10.0, 20.0, 200.0, 100.0, 300.0]
+    })
+
+
+def test_series_are_grouped_and_sorted_by_year(frame):
+    index = CategoryIndex(frame)
+    assert index.categories == ['bed', 'sofa']
+    assert len(index) == 2 and 'sofa' in index and 'desk' not in index
+
+    sofa = index.get('sofa')
+    np.testing.assert_array_equal(sofa.years, [2019, 2020, 2021])
+    np.testing.assert_array_equal(sofa.demand, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(sofa.storage_capacity, [10.0, 20.0, 30.0])
+
+
+def test_slices_match_a_pandas_filter(frame):
+    index = CategoryIndex(frame)
+    for category in index.categories:
+        expected = frame[frame['Furniture Category'] == category].sort_values('Year')
+        series = index.get(category)
+        np.testing.assert_array_equal(series.years, expected['Year'])
+        np.testing.assert_array_equal(series.demand, expected['Market Demand (Millions)'])
+        assert series.demand.flags['C_CONTIGUOUS']
+
+
+def test_unknown_category_is_none(frame):
+    assert CategoryIndex(frame).get('desk') is None
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from demand_store import StoreWriter, current_signature, normalize_chunk, open_current
+
+
+def chunk(rows):
+    return pd.DataFrame(rows, columns=[' year ', 'Furniture Category', 'Market Demand (Millions)',
+                                       'Storage  Capacity (Millions)'])
+
+
+@pytest.fixture
+def root(tmp_path):
+    return str(tmp_path / 'demand_store')
+
+
+def write_version(root, *chunks, base=None):
+    writer = StoreWriter(root)
+    if base is not None:
+        writer.copy_from(base)
+    for rows in chunks:
+        writer.append(normalize_chunk(chunk(rows))[0])
+    return writer.commit()
+
+
+def test_normalize_chunk_renames_and_drops_invalid_rows():
+    clean, rejected = normalize_chunk(chunk([
+        [2020, ' Sofa ', 1.5, 10], ['bad', 'sofa', 2, 10], [2021, '', 2, 10], [2022, 'bed', None, 10]
+    ]))
+    assert rejected == 3
+    assert clean['Furniture Category'].tolist() == ['sofa']
+    assert clean['Year'].dtype == np.int64
+
+
+def test_staged_version_is_invisible_until_commit(root):
+    writer = StoreWriter(root)
+    writer.append(normalize_chunk(chunk([[2020, 'sofa', 1.0, 10.0]]))[0])
+    assert open_current(root) is None
+    assert os.path.isdir(writer.staging)
+
+    store = writer.commit()
+    assert not os.path.exists(writer.staging)
+    assert open_current(root).version == store.version == writer.version
+
+
+def test_commit_swaps_current_and_keeps_only_the_previous_version(root):
+    first = write_version(root, [[2020, 'sofa', 1.0, 10.0]])
+    signature = current_signature(root)
+    second = write_version(root, [[2021, 'sofa', 2.0, 20.0]], base=first)
+    assert current_signature(root) != signature
+    assert open_current(root).version == second.version
+
+    third = write_version(root, [[2022, 'bed', 3.0, 30.0]], base=second)
+    versions = sorted(name for name in os.listdir(root) if name.startswith('v'))
+    assert versions == sorted([second.version, third.version])
+
+    np.testing.assert_array_equal(third.get('sofa').years, [2020, 2021])
+    assert third.categories == ['bed', 'sofa']
+
+
+def test_aborted_ingest_leaves_current_alone(root):
+    first = write_version(root, [[2020, 'sofa', 1.0, 10.0]])
+    writer = StoreWriter(root)
+    writer.append(normalize_chunk(chunk([[2021, 'sofa', 2.0, 20.0]]))[0])
+    writer.abort()
+    assert not os.path.exists(writer.staging)
+    assert open_current(root).version == first.version
+
+
+def test_duplicate_years_are_summed(root):
+    store = write_version(root, [[2021, 'sofa', 2.0, 20.0], [2020, 'sofa', 1.0, 10.0]],
+                          [[2021, 'sofa', 0.5, 25.0]])
+    series = store.get('sofa')
+    np.testing.assert_array_equal(series.years, [2020, 2021])
+    np.testing.assert_array_equal(series.demand, [1.0, 2.5])
+    np.testing.assert_array_equal(series.storage_capacity, [10.0, 25.0])
+    assert store.get('desk') is None
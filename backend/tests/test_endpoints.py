@@ -0,0 +1,65 @@
+import pytest
+
+import demand_forecast_model
+import forecast_service
+from job_queue import QueueFull
+
+
+@pytest.fixture
+def client():
+    return demand_forecast_model.app.test_client()
+
+
+@pytest.mark.parametrize('query, error', [
+    ('service_levels=abc', 'service_levels and storage_capacity must be numeric'),
+    ('storage_capacity=lots', 'service_levels and storage_capacity must be numeric'),
+    ('service_levels=0.9,1.5', 'service_levels must be between 0 and 1'),
+    ('service_levels=0', 'service_levels must be between 0 and 1'),
+])
+def test_catalog_recommendation_rejects_bad_parameters(client, query, error):
+    response = client.get(f'/inventory_recommendation/catalog?{query}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+@pytest.mark.parametrize('query, error', [
+    ('service_level=high', 'service_level and storage_capacity must be numeric'),
+    ('storage_capacity=lots', 'service_level and storage_capacity must be numeric'),
+    ('service_level=1.2', 'service_level must be between 0 and 1'),
+    ('service_level=0', 'service_level must be between 0 and 1'),
+    ('service_level=nan', 'service_level must be between 0 and 1'),
+])
+def test_inventory_recommendation_rejects_bad_parameters(client, query, error):
+    category = forecast_service.dataset.index.categories[0]
+    response = client.get(f'/inventory_recommendation?category={category}&{query}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_inventory_recommendation(client):
+    category = forecast_service.dataset.index.categories[0]
+    response = client.get(f'/inventory_recommendation?category={category}&service_level=0.9&engine=numpy')
+    assert response.status_code == 200
+    levels = response.get_json()['inventory_recommendations']
+    assert levels['safety_stock'] >= 1 and levels['reorder_point'] > 0
+
+
+def test_catalog_recommendation(client):
+    response = client.get('/inventory_recommendation/catalog?service_levels=0.9,0.95&engine=numpy')
+    assert response.status_code == 200
+    recommendations = response.get_json()['recommendations']
+    assert set(recommendations) == set(forecast_service.dataset.index.categories)
+    for levels in recommendations.values():
+        assert set(levels) == {'0.9', '0.95'}
+
+
+def test_saturated_pool_returns_429(client, monkeypatch):
+    def saturated(*args):
+        raise QueueFull('full')
+
+    monkeypatch.setattr(forecast_service.jobs, 'map', saturated)
+    forecast_service.model_registry.clear()
+
+    response = client.get('/forecast/batch?categories=all&engine=statsmodels')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+import forecast_service
+import holt_winters_batch
+
+SEASON_LENGTH = dict(forecast_service.MODEL_PARAMS)['seasonal_periods']
+
+
+@pytest.fixture
+def series():
+    # Trend plus a period-3 season plus a little noise, 24 points
+    rng = np.random.default_rng(5)
+    t = np.arange(24)
+    return 50 + 1.5 * t + np.tile([6.0, -2.0, -4.0], 8) + rng.normal(0, 0.5, 24)
+
+
+def test_numpy_engine_tracks_statsmodels(series):
+    train, steps = series[:20], 4
+    numpy_forecast, parameters = holt_winters_batch.fit_forecast(train[None, :], steps, SEASON_LENGTH)
+    statsmodels_forecast = forecast_service.optimized_forecast(train, steps)
+
+    assert numpy_forecast.shape == (1, steps)
+    assert np.all((parameters > 0) & (parameters < 1))
+    # Grid search vs. numerical optimizer: close to each other and to the held-out values
+    np.testing.assert_allclose(numpy_forecast[0], statsmodels_forecast, rtol=0.05)
+    np.testing.assert_allclose(numpy_forecast[0], series[20:], rtol=0.05)
+
+
+def test_batch_fit_matches_single_fits(series):
+    batch = holt_winters_batch.fit_forecast_many([series[:20], series[:17], series[:20] * 2], [3, 3, 3])
+    for values, forecast in zip([series[:20], series[:17], series[:20] * 2], batch):
+        single, _ = holt_winters_batch.fit_forecast(values[None, :], 3, SEASON_LENGTH)
+        np.testing.assert_allclose(forecast, single[0])
+
+
+@pytest.mark.parametrize('length', range(1, 8))
+def test_engines_share_the_short_series_fallback(series, length):
+    values = series[:length]
+    numpy_forecast, _ = holt_winters_batch.fit_forecast(values[None, :], 2, SEASON_LENGTH)
+    statsmodels_forecast = forecast_service.optimized_forecast(values, 2)
+
+    short = length < holt_winters_batch.min_fit_length(SEASON_LENGTH)
+    assert np.allclose(numpy_forecast[0], values.mean()) == short
+    assert np.allclose(statsmodels_forecast, values.mean()) == short
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+import forecast_service
+from job_queue import JobQueue, QueueFull
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(1, max_pending=2, max_background=1)
+    yield queue
+    if queue._pool is not None:
+        queue._pool.shutdown(wait=True)
+
+
+def test_foreground_tasks_get_429_when_the_queue_is_full(queue):
+    futures = queue.map(time.sleep, [(0.2,), (0.2,)])
+    with pytest.raises(QueueFull):
+        queue.submit(time.sleep, 0)
+    for future in futures:
+        future.result()
+    assert queue.submit(time.sleep, 0).result() is None
+
+
+def test_background_map_keeps_request_headroom(queue):
+    done = threading.Event()
+
+    def scheduled():
+        with queue.background():
+            futures = queue.map(time.sleep, [(0.1,)] * 8)
+        for future in futures:
+            future.result()
+        done.set()
+
+    thread = threading.Thread(target=scheduled)
+    thread.start()
+    while queue.stats()['background_tasks'] == 0:
+        time.sleep(0.01)
+
+    assert queue.stats()['background_tasks'] <= queue.max_background
+    queue.submit(time.sleep, 0).result()
+    assert not done.is_set()
+    thread.join()
+    assert queue.stats()['background_tasks'] == 0
+    assert queue.stats()['pending_tasks'] == 0
+
+
+def test_forecast_request_succeeds_during_materialize(monkeypatch):
+    import demand_forecast_model
+    import forecast_scheduler
+
+    queue = JobQueue(1, max_pending=2, max_background=1, preload=['statsmodels.tsa.holtwinters'])
+    monkeypatch.setattr(forecast_service, 'jobs', queue)
+    forecast_service.model_registry.clear()
+    categories = list(forecast_service.dataset.index.categories)
+    assert len(categories) > queue.max_pending
+
+    summary = {}
+    thread = threading.Thread(target=lambda: summary.update(forecast_scheduler.materialize(['statsmodels'])))
+    thread.start()
+    try:
+        # Wait until the run's fits are in the pool
+        while not (queue.stats()['background_tasks'] or queue.stats()['pending_tasks']):
+            time.sleep(0.01)
+        response = demand_forecast_model.app.test_client().get(f'/forecast?category={categories[-1]}')
+        assert response.status_code == 200
+        assert response.get_json()['category'] == categories[-1]
+    finally:
+        thread.join()
+        queue._pool.shutdown(wait=True)
+    assert summary['statsmodels']['categories'] == len(categories)
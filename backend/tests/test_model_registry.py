@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import model_registry
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'trends.csv'
+    path.write_text('Year,Demand\n2020,1\n')
+    return path
+
+
+def test_get_and_put_count_hits_and_misses(source):
+    registry = ModelRegistry(str(source))
+    assert registry.get('key') is None
+    registry.put('key', {'forecast': [1.0]})
+    assert registry.get('key') == {'forecast': [1.0]}
+    assert (registry.hits, registry.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(source):
+    registry = ModelRegistry(str(source), max_entries=2)
+    registry.put('a', 1)
+    registry.put('b', 2)
+    registry.get('a')
+    registry.put('c', 3)
+    assert registry.get('b') is None
+    assert registry.get('a') == 1 and registry.get('c') == 3
+
+
+def test_entries_expire_after_the_ttl(source, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(model_registry.time, 'monotonic', lambda: now[0])
+    registry = ModelRegistry(str(source), ttl_seconds=60)
+    registry.put('key', 1)
+
+    now[0] += 59
+    assert registry.get('key') == 1
+    now[0] += 2
+    assert registry.get('key') is None
+    assert registry.stats()['entries'] == 0
+
+
+def test_changed_source_clears_the_registry(source):
+    registry = ModelRegistry(str(source))
+    registry.put('key', 1)
+
+    # Same bytes, new mtime: a touch keeps the cache
+    os.utime(source, ns=(1, 1))
+    assert registry.source_changed() is False
+    assert registry.get('key') == 1
+
+    source.write_text('Year,Demand\n2020,2\n')
+    assert registry.source_changed() is True
+    assert registry.get('key') is None
+    assert registry.invalidations == 1
+    assert registry.source_changed() is False
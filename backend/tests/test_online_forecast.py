@@ -0,0 +1,55 @@
+import pytest
+
+import forecast_service
+from job_queue import QueueFull
+from online_forecast import OnlineForecaster
+
+
+@pytest.fixture
+def forecaster():
+    return OnlineForecaster()
+
+
+@pytest.fixture
+def category():
+    return forecast_service.dataset.index.categories[0]
+
+
+def last_csv_year(category):
+    return int(forecast_service.dataset.index.get(category).years[-1])
+
+
+def test_observe_advances_the_state(forecaster, category):
+    year = last_csv_year(category)
+    status = forecaster.observe(category, [(year + 2, 40.0), (year + 1, 35.0)])
+    assert status['last_year'] == year + 2
+    assert status['ingested_observations'] == 2
+
+    result = forecaster.forecast(category, 3)
+    assert result['years'] == [year + 3, year + 4, year + 5]
+    assert len(result['forecast']) == 3
+
+
+@pytest.mark.parametrize('offsets', [[1, 2, 0], [1, 2, 2]])
+def test_rejected_batch_leaves_no_partial_update(forecaster, category, offsets):
+    year = last_csv_year(category)
+    before = forecaster.forecast(category, 3)
+
+    with pytest.raises(ValueError):
+        forecaster.observe(category, [(year + offset, 30.0 + offset) for offset in offsets])
+
+    after = forecaster.forecast(category, 3)
+    assert after['last_year'] == year
+    assert after['ingested_observations'] == 0
+    assert after['forecast'] == before['forecast']
+
+
+def test_online_forecast_does_not_use_the_fit_pool(monkeypatch, forecaster, category):
+    def saturated(*args):
+        raise QueueFull('full')
+
+    monkeypatch.setattr(forecast_service.jobs, 'submit', saturated)
+    monkeypatch.setattr(forecast_service.jobs, 'map', saturated)
+    forecast_service.model_registry.clear()
+
+    assert forecaster.forecast(category, 2)['baseline_metrics']['MAE'] is not None
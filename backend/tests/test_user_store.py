@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from user_store import UserStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'log.csv')
+
+
+def test_add_and_validate(path):
+    store = UserStore(path, fsync_interval=0)
+    assert store.add('Asha', 'asha@example.com', 'secret')
+    assert store.exists('asha@example.com')
+    assert store.validate('asha@example.com', 'secret')
+    assert not store.validate('asha@example.com', 'wrong')
+    assert not store.exists('ravi@example.com')
+
+
+def test_instances_on_the_same_file_see_each_others_signups(path):
+    first = UserStore(path, fsync_interval=0)
+    second = UserStore(path, fsync_interval=0)
+    assert first.add('Asha', 'asha@example.com', 'secret')
+    assert second.add('Ravi', 'ravi@example.com', 'hunter2')
+
+    assert second.validate('asha@example.com', 'secret')
+    assert first.validate('ravi@example.com', 'hunter2')
+    assert len(UserStore(path)) == 2
+
+
+def test_duplicate_email_is_rejected_across_instances(path):
+    stores = [UserStore(path, fsync_interval=0) for _ in range(4)]
+    results = []
+
+    def signup(store):
+        results.append(store.add('Asha', 'asha@example.com', 'secret'))
+
+    threads = [threading.Thread(target=signup, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, False, False, True]
+    with open(path) as file:
+        assert file.read().count('asha@example.com') == 1
+
+
+def test_partial_last_line_is_not_indexed_until_its_newline_arrives(path):
+    store = UserStore(path, fsync_interval=0)
+    with open(path, 'ab') as file:
+        file.write(b'Asha,asha@example.com,sec')
+    assert not store.exists('asha@example.com')
+
+    with open(path, 'ab') as file:
+        file.write(b'ret\n')
+    assert store.validate('asha@example.com', 'secret')
+
+
+def test_add_after_a_torn_row_starts_on_a_new_line(path):
+    with open(path, 'ab') as file:
+        file.write(b'Asha,asha@exa')
+    store = UserStore(path, fsync_interval=0)
+    assert store.add('Ravi', 'ravi@example.com', 'hunter2')
+    assert store.add('Meera', 'meera@example.com', 'pw')
+
+    reopened = UserStore(path)
+    assert reopened.validate('ravi@example.com', 'hunter2')
+    assert reopened.validate('meera@example.com', 'pw')
+    assert not reopened.exists('asha@exa')
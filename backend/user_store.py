@@ -0,0 +1,131 @@
+import csv
+import io
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locks, in-process locking still applies
+    fcntl = None
+
+
+# Users indexed by email in memory, persisted to an append-only CSV log (name, email, password)
+class UserStore:
+    """Hash index over log.csv with locked appends and batched fsync (group commit)."""
+
+    def __init__(self, path, fsync_interval=0.05):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self._users = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+
+        # Group commit state: writers wait until the flusher has synced past their write
+        self._sync_cond = threading.Condition()
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._flusher = None
+
+        with self._lock:
+            self._read_new_rows()
+
+    # Index rows appended since the last read (by this or another process); never re-reads the whole file
+    def _read_new_rows(self):
+        try:
+            with open(self.path, mode="rb") as file:
+                file.seek(self._offset)
+                data = file.read()
+        except FileNotFoundError:
+            return
+
+        # Only consume complete lines; a concurrent writer may be mid-row
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return
+        self._offset += end
+
+        for row in csv.reader(io.StringIO(data[:end].decode("utf-8"))):
+            if len(row) >= 3:
+                self._users.setdefault(row[1], []).append((row[0], row[2]))
+
+    def _lookup(self, email):
+        rows = self._users.get(email)
+        if rows is None:
+            # Unknown here; another worker process may have registered it since
+            with self._lock:
+                self._read_new_rows()
+                rows = self._users.get(email)
+        return rows or []
+
+    def exists(self, email):
+        return bool(self._lookup(email))
+
+    def validate(self, email, password):
+        return any(stored == password for _, stored in self._lookup(email))
+
+    def add(self, name, email, password):
+        """Append a user; returns False if the email is already registered."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow([name, email, password])
+        line = buffer.getvalue().encode("utf-8")
+
+        with self._lock:
+            with open(self.path, mode="ab") as file:
+                if fcntl:
+                    fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    # Re-check under the file lock so concurrent signups cannot both win
+                    self._read_new_rows()
+                    if email in self._users:
+                        return False
+                    # A writer that died mid-row left a partial line; terminate it so ours starts clean
+                    if file.seek(0, os.SEEK_END) > self._offset:
+                        file.write(b"\n")
+                    file.write(line)
+                    file.flush()
+                    self._offset = file.tell()
+                finally:
+                    if fcntl:
+                        fcntl.flock(file, fcntl.LOCK_UN)
+            self._users.setdefault(email, []).append((name, password))
+
+        self._wait_for_sync()
+        return True
+
+    def _wait_for_sync(self):
+        with self._sync_cond:
+            self._written_seq += 1
+            seq = self._written_seq
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+            self._sync_cond.notify_all()
+            while self._synced_seq < seq:
+                self._sync_cond.wait()
+
+    # One fsync per interval covers every append made during it
+    def _flush_loop(self):
+        while True:
+            with self._sync_cond:
+                while self._synced_seq == self._written_seq:
+                    self._sync_cond.wait()
+            time.sleep(self.fsync_interval)
+
+            with self._sync_cond:
+                target = self._written_seq
+            try:
+                fd = os.open(self.path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"Error syncing the user log: {e}")
+
+            with self._sync_cond:
+                self._synced_seq = target
+                self._sync_cond.notify_all()
+
+    def __len__(self):
+        return len(self._users)
@@ -61,6 +61,27 @@ CREATE TABLE IF NOT EXISTS demand_forecasts (
     FOREIGN KEY (product_id) REFERENCES products(id) ON DELETE CASCADE
 );
 
+-- Forecasts materialized per furniture category by the background scheduler
+-- (demand_forecasts columns, keyed by category instead of product)
+CREATE TABLE IF NOT EXISTS category_forecasts (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    category VARCHAR(50) NOT NULL,
+    engine VARCHAR(20) NOT NULL,
+    dataset_version VARCHAR(80) NOT NULL,
+    forecast_date DATE NOT NULL,
+    predicted_demand DECIMAL(12,4) NOT NULL,
+    confidence_level DECIMAL(3,2) DEFAULT 0.95,
+    model_used VARCHAR(50),
+    mae DECIMAL(12,6),
+    mse DECIMAL(12,6),
+    rmse DECIMAL(12,6),
+    safety_stock DECIMAL(12,4),
+    reorder_point DECIMAL(12,4),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_category_forecasts_key ON category_forecasts (category, engine);
+
 -- Routes table for optimization
 CREATE TABLE IF NOT EXISTS routes (
     id INT AUTO_INCREMENT PRIMARY KEY,
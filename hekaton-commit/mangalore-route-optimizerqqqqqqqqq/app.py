@@ -1,18 +1,35 @@
-from flask import Flask, request, jsonify, send_from_directory
-import math
-import random
+from flask import Flask, Response, request, jsonify, send_from_directory
 import os
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+import numpy as np
+
+import geo
+from assignment import assign_orders, order_blocks
+from job_queue import RETRY_AFTER_SECONDS, JobQueue, QueueFull
+from location_search import LocationSearchIndex
+from route_cache import RouteCache, route_key
+from metrics import instrument, registry as metrics
+from spatial_index import GridIndex
+from road_graph import load_road_graph
+import vrp
+from traffic_stream import TrafficFeed
+from traffic import TrafficOverlay, TrafficProfiles, travel_minutes
+
 app = Flask(__name__, static_folder='./')
+instrument(app)
 
 # Mangalore center coordinates
 MANGALORE_CENTER = [12.8698, 74.8439]
 
 # Load Mangalore locations from a JSON file or create if doesn't exist
 def load_or_create_locations():
-    locations_file = Path('mangalore_locations.json')
+    locations_file = Path(LOCATIONS_FILE)
 
     if locations_file.exists():
         with open(locations_file, 'r') as f:
@@ -58,102 +75,198 @@ def load_or_create_locations():
 
         return locations
 
-# Traffic data for Mangalore
-def get_traffic_data():
-    # Major roads with traffic factors (1.0 = no traffic, 2.0 = heavy traffic)
-    return {
-        "MG Road": {"factor": random.uniform(1.3, 1.7), "coordinates": [[12.8703, 74.8428], [12.8772, 74.8442]]},
-        "KS Rao Road": {"factor": random.uniform(1.4, 1.8), "coordinates": [[12.8674, 74.8432], [12.8620, 74.8458]]},
-        "NH-66 (North)": {"factor": random.uniform(1.2, 1.6), "coordinates": [[12.8909, 74.8276], [12.9615, 74.8900]]},
-        "NH-66 (South)": {"factor": random.uniform(1.3, 1.7), "coordinates": [[12.8492, 74.8399], [12.8183, 74.8436]]},
-        "NH-75": {"factor": random.uniform(1.1, 1.5), "coordinates": [[12.8744, 74.8433], [12.8155, 74.9265]]},
-        "Jail Road": {"factor": random.uniform(1.0, 1.4), "coordinates": [[12.8703, 74.8428], [12.8610, 74.8419]]},
-        "PVS-Jyothi Circle": {"factor": random.uniform(1.5, 1.9), "coordinates": [[12.8654, 74.8417], [12.8674, 74.8432]]},
-        "Bejai-Lalbagh": {"factor": random.uniform(1.3, 1.7), "coordinates": [[12.8781, 74.8355], [12.8901, 74.8553]]},
-        "Surathkal Highway": {"factor": random.uniform(1.1, 1.5), "coordinates": [[12.9456, 74.8003], [13.0103, 74.7946]]},
-        "Airport Road": {"factor": random.uniform(1.2, 1.6), "coordinates": [[12.8909, 74.8276], [12.9615, 74.8900]]}
-    }
-
-# Calculate distance between two points using Haversine formula
-def calculate_distance(coord1, coord2):
-    lat1, lon1 = coord1
-    lat2, lon2 = coord2
-
-    # Earth's radius in kilometers
-    R = 6371.0
-
-    # Convert degrees to radians
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    # Difference in coordinates
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-
-    # Haversine formula
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-
-    return distance
-
-# Calculate bearing between two points
-def calculate_bearing(coord1, coord2):
-    lat1, lon1 = map(math.radians, coord1)
-    lat2, lon2 = map(math.radians, coord2)
-
-    dlon = lon2 - lon1
-
-    y = math.sin(dlon) * math.cos(lat2)
-    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-
-    bearing = math.degrees(math.atan2(y, x))
-
-    # Normalize to 0-360
-    bearing = (bearing + 360) % 360
-
-    return bearing
-
-# Check if a route segment is near a traffic area
-def is_segment_near_traffic(seg_start, seg_end, road_start, road_end, tolerance=0.005):
-    d1 = calculate_distance(seg_start, road_start)
-    d2 = calculate_distance(seg_start, road_end)
-    d3 = calculate_distance(seg_end, road_start)
-    d4 = calculate_distance(seg_end, road_end)
-
-    return min(d1, d2, d3, d4) < tolerance
-
-# Calculate traffic factor for a route
-def get_traffic_factor(route_coordinates, traffic_data):
-    max_factor = 1.0
-
-    for i in range(len(route_coordinates) - 1):
-        seg_start = route_coordinates[i]
-        seg_end = route_coordinates[i + 1]
-
-        for road_name, data in traffic_data.items():
-            road_start, road_end = data["coordinates"]
-
-            if is_segment_near_traffic(seg_start, seg_end, road_start, road_end):
-                max_factor = max(max_factor, data["factor"])
-
-    return max_factor
-
-# Generate route between points
-def generate_route(start_coords, end_coords, waypoints=None, route_type="fastest"):
+# Spatial and name indexes over the locations, built on first use and rebuilt when the file changes
+LOCATIONS_FILE = 'mangalore_locations.json'
+_locations = None  # (file signature, locations, GridIndex, LocationSearchIndex), swapped as one
+_locations_lock = threading.Lock()
+
+def _locations_signature():
+    try:
+        stat = os.stat(LOCATIONS_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _current_locations():
+    global _locations
+    signature = _locations_signature()
+    if _locations is None or _locations[0] != signature:
+        with _locations_lock:
+            if _locations is None or _locations[0] != _locations_signature():
+                locations = load_or_create_locations()
+                points = [loc["coordinates"] for loc in locations]
+                _locations = (
+                    _locations_signature(), locations, GridIndex(points),
+                    LocationSearchIndex([loc["name"] for loc in locations], points)
+                )
+                # Cached directions name landmarks from the old file
+                route_cache.clear()
+    return _locations
+
+def get_location_index():
+    _, locations, location_index, _ = _current_locations()
+    return location_index, locations
+
+# Autocomplete results returned when the request sets no limit
+DEFAULT_SEARCH_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 20))
+
+def get_search_index():
+    _, locations, _, search_index = _current_locations()
+    return search_index, locations
+
+# Road network (CSV edge list or .osm extract); routes fall back to the simulation when it is missing
+ROAD_NETWORK_FILE = os.environ.get('ROAD_NETWORK_FILE', os.path.join('data', 'mangalore_roads.csv'))
+ROAD_GRAPH_LANDMARKS = int(os.environ.get('ROAD_GRAPH_LANDMARKS', 8))
+_road_graph = None
+_road_graph_loaded = False
+_road_graph_lock = threading.Lock()
+
+def get_road_graph():
+    global _road_graph, _road_graph_loaded
+    if not _road_graph_loaded:
+        # Concurrent first requests wait for one load instead of seeing no graph (or loading it twice)
+        with _road_graph_lock:
+            if not _road_graph_loaded:
+                if os.path.exists(ROAD_NETWORK_FILE):
+                    graph = load_road_graph(ROAD_NETWORK_FILE, ROAD_GRAPH_LANDMARKS)
+                    if len(graph):
+                        graph.prepare()
+                        _road_graph = graph
+                _road_graph_loaded = True
+    return _road_graph
+
+# Route every leg over the road graph; returns (coordinates, minutes) or None if a leg is unreachable
+def route_on_graph(graph, all_points, weight):
+    route_coordinates = []
+    minutes = 0.0
+
+    for start, end in zip(all_points[:-1], all_points[1:]):
+        leg = graph.route(start, end, weight)
+        if leg is None:
+            return None
+
+        # Consecutive legs share their joining point
+        route_coordinates.extend(leg["coordinates"] if not route_coordinates else leg["coordinates"][1:])
+        minutes += leg["duration"]
+
+    return route_coordinates, minutes
+
+# Major roads in Mangalore with their traffic factor range, off-peak to peak (1.0 = no traffic, 2.0 = heavy traffic)
+MANGALORE_ROADS = {
+    "MG Road": {"factor_range": (1.3, 1.7), "coordinates": [[12.8703, 74.8428], [12.8772, 74.8442]]},
+    "KS Rao Road": {"factor_range": (1.4, 1.8), "coordinates": [[12.8674, 74.8432], [12.8620, 74.8458]]},
+    "NH-66 (North)": {"factor_range": (1.2, 1.6), "coordinates": [[12.8909, 74.8276], [12.9615, 74.8900]]},
+    "NH-66 (South)": {"factor_range": (1.3, 1.7), "coordinates": [[12.8492, 74.8399], [12.8183, 74.8436]]},
+    "NH-75": {"factor_range": (1.1, 1.5), "coordinates": [[12.8744, 74.8433], [12.8155, 74.9265]]},
+    "Jail Road": {"factor_range": (1.0, 1.4), "coordinates": [[12.8703, 74.8428], [12.8610, 74.8419]]},
+    "PVS-Jyothi Circle": {"factor_range": (1.5, 1.9), "coordinates": [[12.8654, 74.8417], [12.8674, 74.8432]]},
+    "Bejai-Lalbagh": {"factor_range": (1.3, 1.7), "coordinates": [[12.8781, 74.8355], [12.8901, 74.8553]]},
+    "Surathkal Highway": {"factor_range": (1.1, 1.5), "coordinates": [[12.9456, 74.8003], [13.0103, 74.7946]]},
+    "Airport Road": {"factor_range": (1.2, 1.6), "coordinates": [[12.8909, 74.8276], [12.9615, 74.8900]]}
+}
+
+# Traffic is versioned in epochs: one snapshot per TRAFFIC_EPOCH_SECONDS window, the same in every process
+TRAFFIC_EPOCH_SECONDS = int(os.environ.get('TRAFFIC_EPOCH_SECONDS', 300))
+_traffic_snapshot = None  # (epoch, traffic data)
+
+def traffic_epoch(now=None):
+    return int((time.time() if now is None else now) // TRAFFIC_EPOCH_SECONDS)
+
+# Start of an epoch; routes planned in it are timed from here, so cached results are stable
+def epoch_start(epoch):
+    return epoch * TRAFFIC_EPOCH_SECONDS
+
+# Per-road congestion by day of week and 15-minute slot, memory-mapped from TRAFFIC_PROFILE_FILE.
+# Without the file, profiles are synthesized from MANGALORE_ROADS in memory; they are only
+# saved when TRAFFIC_PROFILE_FILE was set explicitly, so a default run never writes into the tree
+DEFAULT_TRAFFIC_PROFILE_FILE = os.path.join('data', 'traffic_profiles.npy')
+TRAFFIC_PROFILE_FILE = os.environ.get('TRAFFIC_PROFILE_FILE')
+# Profile slots are in Mangalore local time (IST, UTC+5:30)
+TRAFFIC_UTC_OFFSET_MINUTES = int(os.environ.get('TRAFFIC_UTC_OFFSET_MINUTES', 330))
+_traffic_profiles = None  # (TrafficProfiles, profile row of each overlay road)
+
+def get_traffic_profiles():
+    global _traffic_profiles
+    if _traffic_profiles is None:
+        path = TRAFFIC_PROFILE_FILE or DEFAULT_TRAFFIC_PROFILE_FILE
+        if os.path.exists(path):
+            profiles = TrafficProfiles.load(path, TRAFFIC_UTC_OFFSET_MINUTES)
+        else:
+            profiles = TrafficProfiles.synthetic(
+                {name: road["factor_range"] for name, road in MANGALORE_ROADS.items()}, TRAFFIC_UTC_OFFSET_MINUTES
+            )
+            if TRAFFIC_PROFILE_FILE:
+                os.makedirs(os.path.dirname(TRAFFIC_PROFILE_FILE) or '.', exist_ok=True)
+                profiles.save(TRAFFIC_PROFILE_FILE)
+        _traffic_profiles = (profiles, profiles.rows(get_traffic_overlay().names))
+    return _traffic_profiles
+
+# Traffic data for Mangalore: every road's profile factor at the start of the epoch
+def get_traffic_data(epoch=None):
+    global _traffic_snapshot
+    if epoch is None:
+        epoch = traffic_epoch()
+
+    snapshot = _traffic_snapshot
+    if snapshot is None or snapshot[0] != epoch:
+        profiles, rows = get_traffic_profiles()
+        factors = np.ones(len(rows))
+        known = rows >= 0
+        factors[known] = profiles.factors(rows[known], np.full(known.sum(), epoch_start(epoch)))
+        snapshot = (epoch, {
+            name: {"factor": round(float(factor), 2), "coordinates": road["coordinates"]}
+            for (name, road), factor in zip(MANGALORE_ROADS.items(), factors)
+        })
+        _traffic_snapshot = snapshot
+    return snapshot[1]
+
+# Spatial index over the road geometry, built once; traffic snapshots only change the factors
+_traffic_overlay = None
+
+def get_traffic_overlay():
+    global _traffic_overlay
+    if _traffic_overlay is None:
+        _traffic_overlay = TrafficOverlay({name: road["coordinates"] for name, road in MANGALORE_ROADS.items()})
+    return _traffic_overlay
+
+# (route segment, profile row) pairs for the profiled roads near each segment of a route
+def route_traffic_pairs(route_coordinates):
+    _, rows = get_traffic_profiles()
+
+    # Only roads the overlay finds near each segment are considered
+    segments, roads = get_traffic_overlay().near_pairs(route_coordinates)
+    profile_rows = rows[roads]
+    known = profile_rows >= 0
+    return segments[known], profile_rows[known]
+
+# Minutes per route segment under the time-of-day profiles, starting at departure (Unix seconds)
+def route_travel_minutes(route_coordinates, free_minutes, departure, scale=1.0):
+    segments, profile_rows = route_traffic_pairs(route_coordinates)
+    return travel_minutes(free_minutes, segments, profile_rows, get_traffic_profiles()[0], departure, scale)
+
+# Generate route between points, leaving at departure (Unix seconds, default now); leg_distances can be shared across variants
+def generate_route(start_coords, end_coords, waypoints=None, route_type="fastest", departure=None, leg_distances=None):
     if waypoints is None:
         waypoints = []
 
     all_points = [start_coords] + waypoints + [end_coords]
     route_coordinates = []
 
-    # Traffic data
-    traffic_data = get_traffic_data()
+    if departure is None:
+        departure = time.time()
+
+    # Real shortest paths over the road network when one is loaded
+    graph = get_road_graph()
+    graph_route = None
+    if graph is not None and route_type in ("fastest", "shortest"):
+        graph_route = route_on_graph(graph, all_points, "time" if route_type == "fastest" else "distance")
 
     # Generate route based on type
-    if route_type == "fastest":
+    if graph_route is not None:
+        # A* with landmark (ALT) bounds over the road graph
+        route_coordinates, graph_minutes = graph_route
+
+    elif route_type == "fastest":
         # A* algorithm simulation
         for i in range(len(all_points) - 1):
             start = all_points[i]
@@ -209,20 +322,29 @@ def generate_route(start_coords, end_coords, waypoints=None, route_type="fastest
         # Slower speed for alternative route (30 km/h)
         avg_speed = 30
 
-    # Calculate distance
-    total_distance = 0
-    for i in range(len(route_coordinates) - 1):
-        total_distance += calculate_distance(route_coordinates[i], route_coordinates[i + 1])
+    # Calculate distance (the simulated shortest route is exactly the straight legs)
+    if graph_route is None and route_type == "shortest" and leg_distances is not None:
+        segment_lengths = np.asarray(leg_distances, dtype=float)
+    else:
+        segment_lengths = geo.segment_lengths(route_coordinates)
+    total_distance = float(np.sum(segment_lengths))
 
-    # Calculate traffic factor
-    traffic_factor = get_traffic_factor(route_coordinates, traffic_data)
+    # Free-flow minutes per segment; graph time is spread over the segments by length
+    if graph_route is not None:
+        free_minutes = segment_lengths * (graph_minutes / total_distance if total_distance > 0 else 0.0)
+    else:
+        free_minutes = segment_lengths / avg_speed * 60
 
+    # Each segment is slowed by the congestion when the vehicle reaches it
     # For alternative routes, traffic is less of an issue
-    if route_type == "alternative":
-        traffic_factor = max(1.0, traffic_factor * 0.8)
+    minutes, _ = route_travel_minutes(
+        route_coordinates, free_minutes, departure, 0.8 if route_type == "alternative" else 1.0
+    )
 
-    # Calculate duration (in minutes)
-    duration = (total_distance / avg_speed) * 60 * traffic_factor
+    # Calculate duration (in minutes); the traffic factor is the overall slowdown
+    duration = float(np.sum(minutes))
+    free_duration = float(np.sum(free_minutes))
+    traffic_factor = duration / free_duration if free_duration > 0 else 1.0
 
     # Generate directions
     directions = generate_directions(route_coordinates)
@@ -232,26 +354,122 @@ def generate_route(start_coords, end_coords, waypoints=None, route_type="fastest
         "distance": total_distance,
         "duration": duration,
         "traffic_factor": traffic_factor,
-        "directions": directions
+        "directions": directions,
+        "routing_engine": "road_graph" if graph_route is not None else "simulated"
     }
 
+ROUTE_TYPES = ("fastest", "shortest", "alternative")
+
+# Computed routes keyed by snapped stops, route type and traffic epoch; a repeat query within an epoch is a hit
+ROUTE_CACHE_SIZE = int(os.environ.get('ROUTE_CACHE_SIZE', 1024))
+route_cache = RouteCache(ROUTE_CACHE_SIZE)
+route_cache.register_metrics(metrics, 'route_cache')
+
+# Variants are evaluated side by side; NumPy work releases the GIL
+_route_executor = ThreadPoolExecutor(max_workers=len(ROUTE_TYPES))
+
+# Plan every route variant from one set of shared inputs and report per-variant timings (ms).
+# Routes are timed from the start of the departure's traffic epoch (default now)
+def plan_routes(start_coords, end_coords, waypoints=None, departure=None):
+    started = time.perf_counter()
+    waypoints = waypoints or []
+    all_points = [start_coords] + waypoints + [end_coords]
+
+    # Shared inputs: the departure epoch, the leg distances, and warm indexes
+    epoch = traffic_epoch(departure)
+    leg_distances = geo.pairwise_distances(all_points[:-1], all_points[1:])
+    get_location_index()
+    get_traffic_profiles()
+    get_road_graph()
+    timings = {"shared_ms": (time.perf_counter() - started) * 1000}
+
+    def timed_route(route_type, key):
+        route_started = time.perf_counter()
+        route = generate_route(start_coords, end_coords, waypoints, route_type, epoch_start(epoch), leg_distances)
+        route["traffic_epoch"] = epoch
+        route_cache.put(key, route)
+        return {**route, "cache_hit": False}, (time.perf_counter() - route_started) * 1000
+
+    # Only cache misses are computed
+    routes, futures = {}, {}
+    for route_type in ROUTE_TYPES:
+        lookup_started = time.perf_counter()
+        key = route_key(start_coords, end_coords, waypoints, route_type, epoch)
+        cached = route_cache.get(key)
+        if cached is not None:
+            routes[route_type] = {**cached, "cache_hit": True}
+            timings[f"{route_type}_ms"] = (time.perf_counter() - lookup_started) * 1000
+        else:
+            futures[route_type] = _route_executor.submit(timed_route, route_type, key)
+    for route_type, future in futures.items():
+        routes[route_type], timings[f"{route_type}_ms"] = future.result()
+    routes = {route_type: routes[route_type] for route_type in ROUTE_TYPES}
+
+    timings["total_ms"] = (time.perf_counter() - started) * 1000
+    return routes, timings
+
+# Pushed traffic updates: the snapshot and followed routes' ETAs are recomputed once per epoch for all subscribers
+TRAFFIC_STREAM_KEEPALIVE = float(os.environ.get('TRAFFIC_STREAM_KEEPALIVE', 15))
+TRAFFIC_WATCH_TTL = float(os.environ.get('TRAFFIC_WATCH_TTL', 3600))
+
+# What a followed route needs to be re-timed: free-flow minutes per segment and its nearby profiled roads.
+# Free-flow time is proportional to segment length for every engine, so it is recovered from the route itself
+def route_watch_state(route, route_type):
+    lengths = geo.segment_lengths(route["coordinates"])
+    free_duration = route["duration"] / route["traffic_factor"] if route["traffic_factor"] else route["duration"]
+    free_minutes = lengths * (free_duration / route["distance"] if route["distance"] > 0 else 0.0)
+    segments, profile_rows = route_traffic_pairs(route["coordinates"])
+    return free_minutes, segments, profile_rows, 0.8 if route_type == "alternative" else 1.0
+
+# Duration of a followed route when leaving at the start of the epoch
+def route_eta(state, epoch):
+    free_minutes, segments, profile_rows, scale = state
+    minutes, _ = travel_minutes(free_minutes, segments, profile_rows, get_traffic_profiles()[0], epoch_start(epoch), scale)
+    duration = float(np.sum(minutes))
+    free_duration = float(np.sum(free_minutes))
+    return {
+        "departure_time": local_time(epoch_start(epoch)),
+        "duration": round(duration, 2),
+        "traffic_factor": round(duration / free_duration if free_duration > 0 else 1.0, 3)
+    }
+
+traffic_feed = TrafficFeed(
+    traffic_epoch, get_traffic_data, route_eta, keepalive=TRAFFIC_STREAM_KEEPALIVE, watch_ttl=TRAFFIC_WATCH_TTL
+)
+traffic_feed.register_metrics(metrics, 'traffic_stream')
+
+# Register every route variant of a response with the feed; ids go in "watch_ids" per plan
+def watch_routes(payload):
+    for plan in payload.get("vehicles", [payload]):
+        if plan.get("idle"):
+            continue
+        plan["watch_ids"] = {
+            route_type: traffic_feed.watch(route_watch_state(plan[route_type], route_type))
+            for route_type in ROUTE_TYPES
+        }
+
 # Generate turn-by-turn directions
 def generate_directions(coordinates):
     directions = []
     directions.append("Start from your location.")
 
-    # Load locations to find nearby landmarks
-    locations = load_or_create_locations()
+    # Spatial index of landmarks
+    location_index, locations = get_location_index()
 
-    for i in range(1, len(coordinates) - 1):
-        prev = coordinates[i-1]
-        curr = coordinates[i]
-        next_coord = coordinates[i+1]
+    if len(coordinates) > 2:
+        points = np.asarray(coordinates, dtype=float)
+        interior = points[1:-1]
+
+        # Bearing change at every interior vertex in one pass
+        initial_bearings = geo.pairwise_bearings(points[:-2], interior)
+        final_bearings = geo.pairwise_bearings(interior, points[2:])
+        bearing_diffs = (final_bearings - initial_bearings + 360) % 360
 
-        # Calculate bearing change to determine turn direction
-        initial_bearing = calculate_bearing(prev, curr)
-        final_bearing = calculate_bearing(curr, next_coord)
-        bearing_diff = (final_bearing - initial_bearing + 360) % 360
+        # Nearest landmark within 500m of every interior vertex
+        nearest_indices, nearest_distances = location_index.nearest_within(interior, 0.5)
+
+    for i in range(1, len(coordinates) - 1):
+        bearing_diff = bearing_diffs[i - 1]
 
         if bearing_diff < 20 or bearing_diff > 340:
             direction = "Continue straight"
@@ -262,13 +480,8 @@ def generate_directions(coordinates):
 
         # Find nearest landmark
         nearest_location = None
-        min_distance = float('inf')
-
-        for location in locations:
-            distance = calculate_distance(curr, location["coordinates"])
-            if distance < min_distance and distance < 0.5:  # Within 500m
-                min_distance = distance
-                nearest_location = location["name"]
+        if nearest_distances[i - 1] < 0.5:  # Within 500m
+            nearest_location = locations[nearest_indices[i - 1]]["name"]
 
         if nearest_location:
             directions.append(f"{direction} near {nearest_location}.")
@@ -288,52 +501,394 @@ def index():
 def serve_static(path):
     return send_from_directory('./', path)
 
-# API endpoint for location search
+# API endpoint for location search: ranked name autocomplete, optionally around lat/lng
 @app.route('/api/locations/search')
 def search_locations():
-    query = request.args.get('q', '').lower()
-    locations = load_or_create_locations()
-
-    if query:
-        filtered_locations = [loc for loc in locations if query in loc["name"].lower()]
-        return jsonify(filtered_locations)
+    query = request.args.get('q', '')
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    limit = request.args.get('limit', type=int)
+
+    # Proximity search: radius (km) or k nearest around lat/lng, optionally filtered by name
+    if lat is not None and lng is not None:
+        radius = request.args.get('radius', type=float)
+        k = request.args.get('k', 10, type=int)
+
+        if query.strip():
+            search_index, locations = get_search_index()
+            indices, _, distances = search_index.search(
+                query, limit if limit is not None else (None if radius is not None else k), [lat, lng], radius
+            )
+        else:
+            location_index, locations = get_location_index()
+            if radius is not None:
+                indices, distances = location_index.radius([lat, lng], radius)
+                indices, distances = indices[:limit], distances[:limit]
+            else:
+                indices, distances = location_index.nearest([lat, lng], k)
+
+        return jsonify([
+            {**locations[index], "distance": round(float(distance), 3)}
+            for index, distance in zip(indices, distances)
+        ])
+
+    search_index, locations = get_search_index()
+
+    if query.strip():
+        indices, _, _ = search_index.search(query, limit if limit is not None else DEFAULT_SEARCH_LIMIT)
+        return jsonify([locations[index] for index in indices])
     else:
-        return jsonify(locations)
+        return jsonify(locations[:limit])
 
-# API endpoint for route calculation
-@app.route('/api/route', methods=['POST'])
-def calculate_route():
-    data = request.json
+TRAFFIC_TIMEZONE = timezone(timedelta(minutes=TRAFFIC_UTC_OFFSET_MINUTES))
+
+# Unix seconds from an ISO 8601 string (local Mangalore time if it has no offset) or a number
+def parse_departure(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    moment = datetime.fromisoformat(str(value))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=TRAFFIC_TIMEZONE)
+    return moment.timestamp()
+
+def local_time(timestamp):
+    return datetime.fromtimestamp(timestamp, TRAFFIC_TIMEZONE).isoformat(timespec='seconds')
 
+# Departure and arrival clock times, added outside the cache since departures within an epoch share routes
+def with_arrival(routes, departure):
+    return {
+        route_type: {**route, "arrival_time": local_time(departure + route["duration"] * 60)}
+        for route_type, route in routes.items()
+    }
+
+# Upper bound on the solver time a request may ask for
+MAX_TIME_BUDGET_MS = float(os.environ.get('ROUTE_MAX_TIME_BUDGET_MS', 5000))
+
+# Route computation for one /api/route body; returns (payload, status). Runs in a pool worker for optimized requests
+def route_response(data):
     start_coords = data.get('start')
     end_coords = data.get('end')
     waypoints = data.get('waypoints', [])
 
     if not start_coords or not end_coords:
-        return jsonify({"error": "Start and end coordinates are required"}), 400
+        return {"error": "Start and end coordinates are required"}, 400
+
+    # Optional departure time; travel times follow the time-of-day traffic profiles
+    try:
+        departure = parse_departure(data['departure_time']) if data.get('departure_time') is not None else time.time()
+    except ValueError:
+        return {"error": "departure_time must be an ISO 8601 time or Unix seconds"}, 400
+
+    # Optional stop ordering / multi-vehicle split; the time budget is capped at MAX_TIME_BUDGET_MS
+    try:
+        vehicles = int(data.get('vehicles', 1))
+        time_budget_ms = min(float(data.get('time_budget_ms', 200)), MAX_TIME_BUDGET_MS)
+    except (TypeError, ValueError):
+        return {"error": "vehicles and time_budget_ms must be numeric"}, 400
+    if vehicles < 1 or not time_budget_ms > 0:
+        return {"error": "vehicles and time_budget_ms must be positive"}, 400
+
+    if data.get('optimize') and waypoints:
+        if vehicles > 1:
+            try:
+                assignments, summary = vrp.solve_vehicle_routes(
+                    start_coords, end_coords, waypoints, vehicles,
+                    data.get('capacity'), data.get('demands'), time_budget_ms
+                )
+            except ValueError as e:
+                return {"error": str(e)}, 400
+
+            # Vehicles left without stops stay at the depot and get no route
+            vehicle_routes = []
+            for stops, load in zip(assignments, summary["loads"]):
+                if not stops:
+                    vehicle_routes.append({"waypoint_order": [], "load": load, "idle": True})
+                    continue
+                routes, timings = plan_routes(start_coords, end_coords, [waypoints[i] for i in stops], departure)
+                vehicle_routes.append({
+                    "waypoint_order": stops, "load": load, **with_arrival(routes, departure), "timings": timings
+                })
+
+            return {
+                "departure_time": local_time(departure),
+                "vehicles": vehicle_routes,
+                "optimization": optimization_summary(summary, summary["distance_before"])
+            }, 200
+
+        order, summary = vrp.optimize_order(start_coords, end_coords, waypoints, time_budget_ms)
+        waypoints = [waypoints[i] for i in order]
+        optimization = optimization_summary(summary, summary["distance_before"])
+        optimization["waypoint_order"] = order
+    else:
+        optimization = None
 
     # Calculate routes
-    fastest_route = generate_route(start_coords, end_coords, waypoints, "fastest")
-    shortest_route = generate_route(start_coords, end_coords, waypoints, "shortest")
-    alternative_route = generate_route(start_coords, end_coords, waypoints, "alternative")
+    routes, timings = plan_routes(start_coords, end_coords, waypoints, departure)
+
+    response = {**with_arrival(routes, departure), "departure_time": local_time(departure), "timings": timings}
+    if optimization is not None:
+        response["optimization"] = optimization
+    return response, 200
+
+# Load the shared inputs once per pool worker instead of on its first route
+def warm_route_worker():
+    get_location_index()
+    get_traffic_profiles()
+    get_road_graph()
+
+# Stop-order and multi-vehicle solves go to worker processes; plain routing stays in the request thread
+ROUTE_POOL_WORKERS = int(os.environ.get('ROUTE_POOL_WORKERS', os.cpu_count() or 1))
+route_jobs = JobQueue(ROUTE_POOL_WORKERS, initializer=warm_route_worker)
+route_jobs.register_metrics(metrics, 'route_pool')
+
+ROUTE_STAGE_SECONDS = metrics.histogram('route_stage_seconds', 'Route planning time by stage (shared inputs, each variant, total)', ('stage',))
+ROUTE_SOLVE_SECONDS = metrics.histogram('route_solve_seconds', 'Stop-order / multi-vehicle solver time', ('mode',))
+
+# Stage timings are read from the response, so solves that ran in a pool worker are counted here too
+def record_route_metrics(payload):
+    for plan in payload.get("vehicles", [payload]):
+        for name, ms in plan.get("timings", {}).items():
+            ROUTE_STAGE_SECONDS.observe(ms / 1000, stage=name[:-len("_ms")])
+    optimization = payload.get("optimization")
+    if optimization is not None:
+        mode = "vehicles" if "vehicles" in payload else "order"
+        ROUTE_SOLVE_SECONDS.observe(optimization["solve_time_ms"] / 1000, mode=mode)
+
+def pooled_route_response(data):
+    return route_jobs.submit(route_response, data).result()
+
+def route_job(data):
+    payload, status = pooled_route_response(data)
+    if status == 200:
+        record_route_metrics(payload)
+        if data.get('watch'):
+            watch_routes(payload)
+    return payload, status
+
+def at_capacity():
+    response = jsonify({"error": "Route optimizer is at capacity, please retry"})
+    response.headers['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response, 429
+
+# API endpoint for route calculation; "async": true returns a job to poll at /api/jobs/<id>
+@app.route('/api/route', methods=['POST'])
+def calculate_route():
+    data = request.json
+
+    try:
+        if data.get('async'):
+            job_id = route_jobs.start_job('route', route_job, data)
+            response = jsonify(route_jobs.job(job_id))
+            response.headers['Location'] = f'/api/jobs/{job_id}'
+            return response, 202
 
+        if data.get('optimize') and data.get('waypoints'):
+            payload, status = pooled_route_response(data)
+        else:
+            payload, status = route_response(data)
+    except QueueFull:
+        return at_capacity()
+
+    if status == 200:
+        record_route_metrics(payload)
+        if data.get('watch'):
+            watch_routes(payload)
+    return jsonify(payload), status
+
+# Poll a background route job; a finished job's result holds the /api/route payload and status
+@app.route('/api/jobs/<job_id>')
+def route_job_status(job_id):
+    job = route_jobs.job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["result"] is not None:
+        payload, status = job["result"]
+        job["result"] = {"status": status, "response": payload}
+    return jsonify(job)
+
+# Solver gain in straight-line km and in minutes at the fastest-route average speed (40 km/h)
+def optimization_summary(summary, distance_before):
+    distance_after = summary["distance_after"]
+    return {
+        "solve_time_ms": round(summary["solve_time_ms"], 3),
+        "distance_before": distance_before,
+        "distance_after": distance_after,
+        "distance_saved": distance_before - distance_after,
+        "duration_before": distance_before / 40 * 60,
+        "duration_after": distance_after / 40 * 60,
+        "duration_saved": (distance_before - distance_after) / 40 * 60
+    }
+
+# Bulk order assignment: responses above this many orders are streamed as NDJSON, one line per block of orders
+ASSIGN_STREAM_THRESHOLD = int(os.environ.get('ASSIGN_STREAM_THRESHOLD', 50000))
+ASSIGN_STREAM_BLOCK = int(os.environ.get('ASSIGN_STREAM_BLOCK', 10000))
+ASSIGN_SOLVE_SECONDS = metrics.histogram('assignment_solve_seconds', 'Bulk order-to-facility assignment time', ('mode',))
+
+# (names, coordinates) of facilities given as [lat, lng], a location name or {"name", "coordinates"};
+# every known location when none are given
+def resolve_facilities(entries):
+    _, locations = get_location_index()
+    if entries is None:
+        return [loc["name"] for loc in locations], np.array([loc["coordinates"] for loc in locations], dtype=float)
+
+    by_name = {loc["name"].lower(): loc for loc in locations}
+    names, coordinates = [], []
+    for entry in entries:
+        if isinstance(entry, str):
+            location = by_name.get(entry.strip().lower())
+            if location is None:
+                raise ValueError(f"unknown facility: {entry}")
+            names.append(location["name"])
+            coordinates.append(location["coordinates"])
+        elif isinstance(entry, dict):
+            names.append(entry.get("name"))
+            coordinates.append(entry.get("coordinates"))
+        else:
+            names.append(None)
+            coordinates.append(entry)
+    return names, coordinate_array(coordinates, "facilities")
+
+def coordinate_array(points, field):
+    try:
+        points = np.array(points, dtype=float)
+    except (TypeError, ValueError):
+        points = None
+    if points is None or points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"{field} must be a list of [lat, lng] pairs")
+    return points
+
+# One block of per-order results: facility index, straight-line km and (with a rate) cost
+def assignment_block(start, assignment, distance, cost_per_km):
+    block = {"offset": start, "assignments": assignment.tolist(), "distances": np.round(distance, 3).tolist()}
+    if cost_per_km is not None:
+        block["costs"] = np.round(distance * cost_per_km, 2).tolist()
+    return block
+
+# Per-facility counts, load and distance, plus totals; minutes at the fastest-route average speed (40 km/h)
+def assignment_summary(names, coordinates, counts, loads, distances, capacities, cost_per_km):
+    facilities = []
+    for i, name in enumerate(names):
+        facility = {
+            "name": name, "coordinates": coordinates[i].tolist(), "orders": int(counts[i]),
+            "load": float(loads[i]), "distance": round(float(distances[i]), 3)
+        }
+        if capacities is not None:
+            facility["capacity"] = float(capacities[i])
+        facilities.append(facility)
+
+    total_distance = float(np.sum(distances))
+    summary = {
+        "facilities": facilities,
+        "total_distance": round(total_distance, 3),
+        "total_duration": round(total_distance / 40 * 60, 2)
+    }
+    if cost_per_km is not None:
+        summary["total_cost"] = round(total_distance * cost_per_km, 2)
+    return summary
+
+# Nearest-facility blocks are solved as they are written; capacity-balanced ones are solved up front
+def stream_assignment(orders, names, coordinates, capacities, demands, cost_per_km, solved=None):
+    facility_count = len(coordinates)
+    counts, loads, distances = np.zeros(facility_count), np.zeros(facility_count), np.zeros(facility_count)
+    for start, end in order_blocks(len(orders), facility_count, ASSIGN_STREAM_BLOCK):
+        if solved is None:
+            block_demands = None if demands is None else demands[start:end]
+            with ASSIGN_SOLVE_SECONDS.time(mode="nearest"):
+                assignment, distance, _ = assign_orders(orders[start:end], coordinates, demands=block_demands)
+        else:
+            assignment, distance = solved[0][start:end], solved[1][start:end]
+
+        counts += np.bincount(assignment, minlength=facility_count)
+        loads += np.bincount(
+            assignment, weights=None if demands is None else demands[start:end], minlength=facility_count
+        )
+        distances += np.bincount(assignment, weights=distance, minlength=facility_count)
+        yield json.dumps(assignment_block(start, assignment, distance, cost_per_km)) + '\n'
+
+    summary = assignment_summary(names, coordinates, counts, loads, distances, capacities, cost_per_km)
+    yield json.dumps({"summary": summary}) + '\n'
+
+# Bulk nearest-depot / supplier assignment for a batch of orders, optionally under facility capacities
+@app.route('/api/assign', methods=['POST'])
+def assign_facilities():
+    data = request.get_json(silent=True) or {}
+
+    try:
+        orders = coordinate_array(data.get('orders'), "orders")
+        names, coordinates = resolve_facilities(data.get('facilities'))
+        capacities = None if data.get('capacities') is None else np.asarray(data['capacities'], dtype=float)
+        demands = None if data.get('demands') is None else np.asarray(data['demands'], dtype=float)
+        cost_per_km = None if data.get('cost_per_km') is None else float(data['cost_per_km'])
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if demands is not None and len(demands) != len(orders):
+        return jsonify({"error": "demands must have one entry per order"}), 400
+
+    stream = bool(data.get('stream', len(orders) > ASSIGN_STREAM_THRESHOLD))
+    solved = None
+    if capacities is not None or not stream:
+        mode = "capacity" if capacities is not None else "nearest"
+        try:
+            with ASSIGN_SOLVE_SECONDS.time(mode=mode):
+                solved = assign_orders(orders, coordinates, capacities, demands)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    if stream:
+        return Response(
+            stream_assignment(orders, names, coordinates, capacities, demands, cost_per_km, solved),
+            mimetype='application/x-ndjson'
+        )
+
+    assignment, distance, loads = solved
+    facility_count = len(coordinates)
     return jsonify({
-        "fastest": fastest_route,
-        "shortest": shortest_route,
-        "alternative": alternative_route
+        **assignment_block(0, assignment, distance, cost_per_km),
+        "summary": assignment_summary(
+            names, coordinates, np.bincount(assignment, minlength=facility_count), loads,
+            np.bincount(assignment, weights=distance, minlength=facility_count), capacities, cost_per_km
+        )
     })
 
-# API endpoint for traffic updates
+# API endpoint for traffic updates; the snapshot only changes when the epoch does
 @app.route('/api/traffic')
 def get_traffic():
-    return jsonify(get_traffic_data())
+    now = time.time()
+    epoch = traffic_epoch(now)
+    response = jsonify(get_traffic_data(epoch))
+    response.headers['X-Traffic-Epoch'] = str(epoch)
+    response.headers['Cache-Control'] = f'max-age={int((epoch + 1) * TRAFFIC_EPOCH_SECONDS - now)}'
+    return response
+
+# Server-Sent Events: a full snapshot, then traffic deltas and ETAs of the ?watch= routes whenever the epoch changes them
+@app.route('/api/traffic/stream')
+def stream_traffic():
+    watch_ids = [watch_id for watch_id in request.args.get('watch', '').split(',') if watch_id]
+    return Response(
+        traffic_feed.subscribe(watch_ids), mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Route cache occupancy and hit/miss counts
+@app.route('/api/route/cache')
+def route_cache_stats():
+    return jsonify({**route_cache.stats(), "traffic_epoch": traffic_epoch(), "epoch_seconds": TRAFFIC_EPOCH_SECONDS})
+
+# Drop every cached route in this process, e.g. after the road network or traffic profiles are replaced
+@app.route('/api/route/cache', methods=['DELETE'])
+def clear_route_cache():
+    route_cache.clear()
+    return route_cache_stats()
 
 if __name__ == '__main__':
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
 
-    # Make sure locations are loaded
-    load_or_create_locations()
+    # Make sure locations are loaded and indexed
+    get_location_index()
+
+    # Load the road network and run landmark preprocessing before serving
+    get_road_graph()
 
     # Run the app
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+
+import geo
+from spatial_index import KM_PER_DEGREE
+
+# Order x facility distances are worked out in blocks of about this many cells
+ASSIGN_BLOCK_CELLS = 1 << 22
+# Nearest facilities kept per order when capacities force some orders further away
+CANDIDATES_PER_ORDER = 8
+# Extra planar candidates re-ranked by the Haversine, so near-ties come out exact
+RERANK_CANDIDATES = 2
+
+
+def _planar(points, reference_lat):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return np.stack([points[:, 1] * math.cos(math.radians(reference_lat)), points[:, 0]], axis=1) * KM_PER_DEGREE
+
+
+def order_blocks(order_count, facility_count, max_orders=None):
+    """(start, end) slices of the orders so each block's distance matrix stays bounded."""
+    size = max(1, ASSIGN_BLOCK_CELLS // max(facility_count, 1))
+    if max_orders is not None:
+        size = min(size, max_orders)
+    return [(start, min(start + size, order_count)) for start in range(0, order_count, size)]
+
+
+def nearest_facilities(orders, facilities, k=1):
+    """Indices and Haversine distances (km) of the k nearest facilities to each order, nearest first, as (N, k) arrays.
+
+    Candidates are ranked by planar distance, one matrix product per block (|o|^2 + |f|^2 - 2 o.f);
+    a few more than k are kept and re-ranked by their Haversine distance.
+    """
+    orders = np.asarray(orders, dtype=float).reshape(-1, 2)
+    facilities = np.asarray(facilities, dtype=float).reshape(-1, 2)
+    k = min(k, len(facilities))
+    indices = np.zeros((len(orders), k), dtype=np.int64)
+    distances = np.zeros((len(orders), k))
+    if not len(orders) or not k:
+        return indices, distances
+
+    reference_lat = float(facilities[:, 0].mean())
+    planar_facilities = _planar(facilities, reference_lat)
+    facility_norms = (planar_facilities ** 2).sum(axis=1)
+    kept = min(k + RERANK_CANDIDATES, len(facilities))
+
+    for start, end in order_blocks(len(orders), len(facilities)):
+        block = _planar(orders[start:end], reference_lat)
+        squared = facility_norms[None, :] - 2 * block @ planar_facilities.T
+        if kept < len(facilities):
+            nearest = np.argpartition(squared, kept - 1, axis=1)[:, :kept]
+        else:
+            nearest = np.broadcast_to(np.arange(kept), (end - start, kept))
+
+        candidate_distances = geo.pairwise_distances(
+            np.repeat(orders[start:end], kept, axis=0), facilities[nearest.ravel()]
+        ).reshape(-1, kept)
+        ranked = candidate_distances.argsort(axis=1, kind='stable')[:, :k]
+        indices[start:end] = np.take_along_axis(nearest, ranked, axis=1)
+        distances[start:end] = np.take_along_axis(candidate_distances, ranked, axis=1)
+    return indices, distances
+
+
+def assign_orders(orders, facilities, capacities=None, demands=None, candidates=CANDIDATES_PER_ORDER):
+    """Assign every order to a facility: the nearest one, or the nearest with room left when capacities are given.
+
+    Returns (facility index per order, distance km per order, load per facility), or raises
+    ValueError when the demands cannot fit.
+    """
+    orders = np.asarray(orders, dtype=float).reshape(-1, 2)
+    facilities = np.asarray(facilities, dtype=float).reshape(-1, 2)
+    if not len(facilities):
+        raise ValueError("at least one facility is required")
+
+    demands = np.ones(len(orders)) if demands is None else np.asarray(demands, dtype=float)
+    if len(demands) != len(orders):
+        raise ValueError("demands must have one entry per order")
+
+    if capacities is None:
+        indices, distances = nearest_facilities(orders, facilities)
+        assignment, distance = indices[:, 0], distances[:, 0]
+        return assignment, distance, np.bincount(assignment, weights=demands, minlength=len(facilities))
+
+    capacities = np.asarray(capacities, dtype=float)
+    if len(capacities) != len(facilities):
+        raise ValueError("capacities must have one entry per facility")
+    if (demands > capacities.max()).any() or demands.sum() > capacities.sum():
+        raise ValueError("order demands exceed the facility capacity")
+
+    indices, distances = nearest_facilities(orders, facilities, candidates)
+
+    # Regret order: orders that lose the most by missing their nearest facility are placed first
+    regret = distances[:, 1] - distances[:, 0] if indices.shape[1] > 1 else np.zeros(len(orders))
+    placement = np.argsort(-regret, kind='stable')
+
+    # First choices in one pass: per facility, the prefix of its orders (in regret order) that fits
+    first = indices[placement, 0]
+    by_facility = placement[np.argsort(first, kind='stable')]
+    facility_of = indices[by_facility, 0]
+    cumulative = np.cumsum(demands[by_facility])
+    group_start = np.searchsorted(facility_of, np.arange(len(facilities)))
+    before_group = np.concatenate([[0.0], cumulative])[group_start]
+    fits = cumulative - before_group[facility_of] <= capacities[facility_of]
+
+    assignment = np.full(len(orders), -1, dtype=np.int64)
+    distance = np.zeros(len(orders))
+    placed = by_facility[fits]
+    assignment[placed] = indices[placed, 0]
+    distance[placed] = distances[placed, 0]
+    remaining = capacities - np.bincount(assignment[placed], weights=demands[placed], minlength=len(facilities))
+
+    # The overflow, still in regret order: nearest candidate with room, else the nearest open facility
+    for order in placement[assignment[placement] < 0]:
+        demand = demands[order]
+        for facility, facility_distance in zip(indices[order], distances[order]):
+            if remaining[facility] >= demand:
+                break
+        else:
+            # Every nearby facility is full: nearest of those with room left
+            open_facilities = np.flatnonzero(remaining >= demand)
+            if not len(open_facilities):
+                raise ValueError("order demands exceed the facility capacity")
+            open_distances = geo.distance_matrix(orders[order:order + 1], facilities[open_facilities])[0]
+            nearest = int(open_distances.argmin())
+            facility, facility_distance = open_facilities[nearest], open_distances[nearest]
+
+        assignment[order] = facility
+        distance[order] = facility_distance
+        remaining[facility] -= demand
+
+    return assignment, distance, capacities - remaining
@@ -0,0 +1,66 @@
+"""Scalar vs vectorized Haversine benchmark.
+
+Times two workloads at 30, 1,000 and 10,000 points around Mangalore:
+  - points x landmarks distance matrix (the generate_directions lookup)
+  - polyline length (the generate_route distance sum)
+
+Run from the route optimizer directory:
+    python benchmarks/bench_geo.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import geo  # noqa: E402
+from app import MANGALORE_CENTER, load_or_create_locations  # noqa: E402
+
+SIZES = [30, 1000, 10000]
+
+
+# The per-pair math.* Haversine the app used before geo, kept as the baseline
+def scalar_distance(coord1, coord2):
+    lat1, lon1 = map(math.radians, coord1)
+    lat2, lon2 = map(math.radians, coord2)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return geo.EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def best_of(func, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def random_points(n, rng):
+    offsets = rng.uniform(-0.15, 0.15, size=(n, 2))
+    return (np.array(MANGALORE_CENTER) + offsets).tolist()
+
+
+def main():
+    rng = np.random.default_rng(42)
+    os.chdir(os.path.join(os.path.dirname(__file__), '..'))
+    landmarks = [loc["coordinates"] for loc in load_or_create_locations()]
+
+    print(f"{'workload':<22}{'points':>8}{'scalar (ms)':>14}{'numpy (ms)':>13}{'speedup':>10}")
+    for n in SIZES:
+        points = random_points(n, rng)
+
+        scalar = best_of(lambda: [[scalar_distance(p, l) for l in landmarks] for p in points])
+        vector = best_of(lambda: geo.distance_matrix(points, landmarks))
+        print(f"{'points x landmarks':<22}{n:>8}{scalar * 1e3:>14.2f}{vector * 1e3:>13.2f}{scalar / vector:>9.1f}x")
+
+        scalar = best_of(lambda: sum(scalar_distance(points[i], points[i + 1]) for i in range(n - 1)))
+        vector = best_of(lambda: geo.path_length(points))
+        print(f"{'polyline length':<22}{n:>8}{scalar * 1e3:>14.2f}{vector * 1e3:>13.2f}{scalar / vector:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
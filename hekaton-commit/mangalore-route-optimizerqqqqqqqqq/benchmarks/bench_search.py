@@ -0,0 +1,115 @@
+"""Location autocomplete latency at depot/customer-address scale.
+
+Builds a LocationSearchIndex over synthetic Mangalore-style names and times:
+  - keystroke autocomplete: every prefix of sampled names, typed one character at a time
+  - typo queries: one character of a sampled name swapped, dropped or replaced
+  - autocomplete within a radius of a point
+  - the old substring scan, for comparison
+
+Run from the route optimizer directory:
+    python benchmarks/bench_search.py --size 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import MANGALORE_CENTER  # noqa: E402
+from location_search import LocationSearchIndex, tokenize  # noqa: E402
+
+AREAS = [
+    'Kadri', 'Bejai', 'Lalbagh', 'Hampankatta', 'Balmatta', 'Attavar', 'Kankanady', 'Bendoor', 'Falnir',
+    'Kodialbail', 'Urwa', 'Ladyhill', 'Kottara', 'Derebail', 'Kulur', 'Panambur', 'Surathkal', 'Baikampady',
+    'Ullal', 'Thokkottu', 'Pumpwell', 'Nanthoor', 'Valencia', 'Jeppu', 'Mangaladevi', 'Bunder', 'Kudroli',
+    'Bolar', 'Kapikad', 'Pandeshwar', 'Shakthinagar', 'Vamanjoor', 'Padil', 'Kavoor', 'Bajpe', 'Mulki'
+]
+KINDS = ['Depot', 'Warehouse', 'Store', 'Customer', 'Furniture Mart', 'Showroom', 'Supplier', 'Outlet', 'Godown']
+STREETS = ['Main Road', 'Cross Road', 'Circle', 'Layout', 'Nagar', 'Colony', 'Junction', 'Market', 'Extension']
+
+
+def synthetic_locations(size, rng):
+    areas = rng.integers(len(AREAS), size=size)
+    kinds = rng.integers(len(KINDS), size=size)
+    streets = rng.integers(len(STREETS), size=size)
+    numbers = rng.integers(1, 5000, size=size)
+    names = [
+        f'{KINDS[k]} {n}, {AREAS[a]} {STREETS[s]}'
+        for k, n, a, s in zip(kinds, numbers, areas, streets)
+    ]
+    points = np.array(MANGALORE_CENTER) + rng.uniform(-0.2, 0.2, size=(size, 2))
+    return names, points
+
+
+def typo(word, rng):
+    i = int(rng.integers(1, len(word) - 1))
+    kind = rng.integers(3)
+    if kind == 0:
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    return word[:i] + 'x' + word[i + 1:]
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return {'p50_ms': float(np.percentile(samples, 50)), 'p99_ms': float(np.percentile(samples, 99)),
+            'max_ms': float(samples.max())}
+
+
+def timed(queries, run):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=100_000, help='number of named locations')
+    parser.add_argument('--queries', type=int, default=200, help='sampled names per workload')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    names, points = synthetic_locations(args.size, rng)
+
+    started = time.perf_counter()
+    index = LocationSearchIndex(names, points)
+    print(f'index build: {time.perf_counter() - started:.2f}s for {args.size:,} names, '
+          f'{len(index.vocabulary):,} distinct tokens')
+
+    sampled = [names[i] for i in rng.integers(args.size, size=args.queries)]
+
+    # Every keystroke of "<area> <kind>" style queries, e.g. "k", "ka", ..., "kadri dep"
+    keystrokes = []
+    for name in sampled:
+        tokens = tokenize(name)
+        text = f'{tokens[-2]} {tokens[0]}'
+        keystrokes += [text[:i] for i in range(1, len(text) + 1) if not text[:i].endswith(' ')]
+    typos = [f'{typo(tokenize(name)[-2], rng)} {tokenize(name)[0]}' for name in sampled]
+    lowered = [name.lower() for name in names]
+
+    results = {
+        'autocomplete': timed(keystrokes, lambda q: index.search(q, args.limit)),
+        'typo': timed(typos, lambda q: index.search(q, args.limit)),
+        'autocomplete_radius_3km': timed(
+            keystrokes, lambda q: index.search(q, args.limit, MANGALORE_CENTER, 3.0)
+        ),
+        'substring_scan': timed(
+            keystrokes[:200], lambda q: [name for name in lowered if q in name][:args.limit]
+        )
+    }
+
+    print(f"{'workload':<26}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for workload, stats in results.items():
+        print(f"{workload:<26}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Traffic stream fan-out with thousands of concurrent local clients.
+
+Each client is a thread holding an open GET /api/traffic/stream (through Flask's
+test client, so the real endpoint and generator run without sockets) and following
+one watched route. Every round moves the feed to another epoch (alternating a
+weekday 09:00 peak and 03:00 free flow, so every factor and ETA changes) and times:
+  - compute: the snapshot delta and ETAs, worked out once however many clients listen
+  - refresh: the whole refresh call, including handing the GIL to woken clients
+  - delivery: from the start of the refresh until each client has read its events
+For comparison, it also times the same number of clients polling /api/traffic once each.
+
+Run from the route optimizer directory:
+    python benchmarks/bench_traffic_stream.py --clients 100 1000 3000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app  # noqa: E402
+
+# Many mostly idle threads; keep their stacks small
+threading.stack_size(256 * 1024)
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return {'p50_ms': float(np.percentile(samples, 50)), 'p99_ms': float(np.percentile(samples, 99)),
+            'max_ms': float(samples.max())}
+
+
+def watched_routes(count, rng):
+    client = app.app.test_client()
+    watch_ids = []
+    for _ in range(count):
+        start, end = np.array(app.MANGALORE_CENTER) + rng.uniform(-0.08, 0.08, size=(2, 2))
+        payload = client.post('/api/route', json={'start': start.tolist(), 'end': end.tolist(), 'watch': True}).get_json()
+        watch_ids.append(payload['watch_ids']['fastest'])
+    return watch_ids
+
+
+def run(clients, rounds, watch_ids, epochs):
+    feed = app.traffic_feed
+    current = {'epoch': epochs[-1]}
+    feed.epoch_fn = lambda: current['epoch']
+    feed.refresh()
+
+    received = [[None] * clients for _ in range(rounds)]
+    ready = threading.Barrier(clients + 1)
+
+    def listen(index):
+        client = app.app.test_client()
+        response = client.get(f'/api/traffic/stream?watch={watch_ids[index % len(watch_ids)]}', buffered=False)
+        messages = iter(response.response)
+        next(messages)  # snapshot
+        ready.wait()
+        for round_index in range(rounds):
+            message = next(messages)
+            while message.startswith(b':'):  # keepalive
+                message = next(messages)
+            received[round_index][index] = time.perf_counter()
+        response.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=listen, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    connect_seconds = time.perf_counter() - started
+
+    compute_samples, refresh_samples, delivery_samples, all_delivered = [], [], [], []
+    for round_index in range(rounds):
+        current['epoch'] = epochs[round_index % 2]
+        published = time.perf_counter()
+        feed.refresh()
+        refresh_samples.append(time.perf_counter() - published)
+        compute_samples.append(feed.last_refresh_seconds)
+
+        deadline = time.time() + 60
+        while any(t is None for t in received[round_index]) and time.time() < deadline:
+            time.sleep(0.001)
+        arrivals = [t - published for t in received[round_index] if t is not None]
+        delivery_samples += arrivals
+        all_delivered.append(max(arrivals))
+
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # The same clients polling the full traffic dictionary once each
+    client = app.app.test_client()
+    polled = time.perf_counter()
+    for _ in range(clients):
+        client.get('/api/traffic')
+    poll_seconds = time.perf_counter() - polled
+
+    return {
+        'connect_s': connect_seconds,
+        'compute': percentiles(compute_samples),
+        'refresh': percentiles(refresh_samples),
+        'delivery': percentiles(delivery_samples),
+        'all_delivered': percentiles(all_delivered),
+        'poll_round_s': poll_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[100, 1000, 3000])
+    parser.add_argument('--watches', type=int, default=50, help='distinct routes followed by the clients')
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    watch_ids = watched_routes(args.watches, rng)
+    epochs = [app.traffic_epoch(app.parse_departure(t)) for t in ('2026-10-19T09:00', '2026-10-19T03:00')]
+
+    print(f"{'clients':>8}{'connect s':>11}{'compute p50':>13}{'refresh p50':>13}{'refresh max':>13}"
+          f"{'deliver p50':>13}{'deliver p99':>13}{'all recv p50':>14}{'poll once s':>13}")
+    for clients in args.clients:
+        result = run(clients, args.rounds, watch_ids, epochs)
+        print(f"{clients:>8}{result['connect_s']:>11.2f}{result['compute']['p50_ms']:>13.2f}"
+              f"{result['refresh']['p50_ms']:>13.2f}"
+              f"{result['refresh']['max_ms']:>13.2f}{result['delivery']['p50_ms']:>13.2f}"
+              f"{result['delivery']['p99_ms']:>13.2f}{result['all_delivered']['p50_ms']:>14.2f}"
+              f"{result['poll_round_s']:>13.2f}")
+    print('compute, refresh and delivery times are in ms')
+
+
+if __name__ == '__main__':
+    main()
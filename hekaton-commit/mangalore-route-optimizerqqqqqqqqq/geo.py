@@ -0,0 +1,70 @@
+import numpy as np
+
+# Earth's radius in kilometers
+EARTH_RADIUS_KM = 6371.0
+
+
+# Convert a point or list of [lat, lng] points to an (N, 2) array of radians
+def to_radians(points):
+    return np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+
+
+# Haversine distance in km for broadcastable lat/lng arrays given in radians
+def _haversine(lat1, lon1, lat2, lon2):
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    a = np.clip(a, 0.0, 1.0)
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# Initial bearing in degrees (0-360) for broadcastable lat/lng arrays given in radians
+def _bearing(lat1, lon1, lat2, lon2):
+    dlon = lon2 - lon1
+
+    y = np.sin(dlon) * np.cos(lat2)
+    x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+
+    return (np.degrees(np.arctan2(y, x)) + 360) % 360
+
+
+# Full N x M distance matrix (km) between two point sets; origins is reused when destinations is omitted
+def distance_matrix(origins, destinations=None):
+    a = to_radians(origins)
+    b = a if destinations is None else to_radians(destinations)
+    return _haversine(a[:, 0:1], a[:, 1:2], b[:, 0][None, :], b[:, 1][None, :])
+
+
+# Full N x M bearing matrix (degrees) between two point sets
+def bearing_matrix(origins, destinations=None):
+    a = to_radians(origins)
+    b = a if destinations is None else to_radians(destinations)
+    return _bearing(a[:, 0:1], a[:, 1:2], b[:, 0][None, :], b[:, 1][None, :])
+
+
+# Element-wise distances (km) between origins[i] and destinations[i]
+def pairwise_distances(origins, destinations):
+    a = to_radians(origins)
+    b = to_radians(destinations)
+    return _haversine(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+
+# Element-wise bearings (degrees) from origins[i] to destinations[i]
+def pairwise_bearings(origins, destinations):
+    a = to_radians(origins)
+    b = to_radians(destinations)
+    return _bearing(a[:, 0], a[:, 1], b[:, 0], b[:, 1])
+
+
+# Length of each consecutive segment of a polyline
+def segment_lengths(coordinates):
+    points = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    if len(points) < 2:
+        return np.zeros(0)
+    return pairwise_distances(points[:-1], points[1:])
+
+
+# Total length (km) of a polyline
+def path_length(coordinates):
+    return float(segment_lengths(coordinates).sum())
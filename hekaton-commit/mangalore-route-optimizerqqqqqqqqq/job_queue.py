@@ -0,0 +1,193 @@
+"""Bounded process pool and job table for CPU-heavy request work.
+
+CPU-bound work (model fits, route solves) runs in worker processes, so it
+never holds the GIL of the threads serving requests. Admission is bounded:
+- submit()/map() raise QueueFull once max_pending tasks are queued or running.
+  Request handlers turn that into a 429 with Retry-After.
+- start_job() runs a longer computation in the background and returns an id
+  to poll. It raises QueueFull once max_jobs jobs are unfinished. Inside a
+  job, submit()/map() wait for room instead of failing.
+Finished jobs stay readable for JOB_RESULT_TTL seconds.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+JOB_QUEUE_DEPTH = int(os.environ.get('JOB_QUEUE_DEPTH', 0))  # 0: four tasks per worker
+JOB_LIMIT = int(os.environ.get('JOB_LIMIT', 32))
+JOB_RESULT_TTL = float(os.environ.get('JOB_RESULT_TTL', 600))
+RETRY_AFTER_SECONDS = 1
+
+
+class QueueFull(Exception):
+    """The pool or the job table is at its limit; retry later."""
+
+
+def _iso(epoch):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch)) if epoch else None
+
+
+class JobQueue:
+    """A process pool with a queue-depth limit, plus background jobs polled by id."""
+
+    def __init__(self, workers, max_pending=JOB_QUEUE_DEPTH, max_jobs=JOB_LIMIT, result_ttl=JOB_RESULT_TTL,
+                 preload=(), initializer=None):
+        self.workers = workers
+        self.max_pending = max_pending or 4 * workers
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self.preload = list(preload)
+        self.initializer = initializer  # run once in each worker process, e.g. to warm caches
+        self._pool = None
+        self._pending = 0
+        self._capacity = threading.Condition()
+        self._local = threading.local()
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._job_threads = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='job')
+
+    def _executor(self):
+        with self._capacity:
+            if self._pool is None:
+                # Workers come from a clean fork server: forking this process directly could copy a lock
+                # held by another thread (e.g. mid lazy import) into a worker and hang it
+                context = None
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                    if self.preload:
+                        # Imported once in the fork server, so every worker starts with them loaded
+                        context.set_forkserver_preload(self.preload)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context, initializer=self.initializer
+                )
+            return self._pool
+
+    def _admit(self, count):
+        with self._capacity:
+            if getattr(self._local, 'in_job', False):
+                self._capacity.wait_for(lambda: self._pending < self.max_pending)
+            elif self._pending >= self.max_pending:
+                raise QueueFull(f'{self._pending} tasks queued, limit {self.max_pending}')
+            self._pending += count
+
+    def _release(self, _future):
+        with self._capacity:
+            self._pending -= 1
+            self._capacity.notify_all()
+
+    def submit(self, fn, *args):
+        """Run fn(*args) in a worker process; returns its Future."""
+        return self.map(fn, [args])[0]
+
+    def map(self, fn, arg_tuples):
+        """Submit fn once per argument tuple, admitted together; returns the Futures in order.
+
+        A batch is admitted while the pool is below its limit, whatever its size,
+        so a large catalog is throttled by the pool rather than rejected outright.
+        """
+        arg_tuples = list(arg_tuples)
+        if not arg_tuples:
+            return []
+        pool = self._executor()
+        self._admit(len(arg_tuples))
+        futures = []
+        try:
+            for args in arg_tuples:
+                future = pool.submit(fn, *args)
+                future.add_done_callback(self._release)
+                futures.append(future)
+        except Exception:
+            # Release the slots of tasks that never reached the pool
+            for _ in range(len(arg_tuples) - len(futures)):
+                self._release(None)
+            raise
+        return futures
+
+    def _expire(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] and job['finished_at'] < cutoff]:
+            del self._jobs[job_id]
+
+    def start_job(self, kind, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the background; returns the job id to poll."""
+        with self._jobs_lock:
+            self._expire()
+            unfinished = sum(1 for job in self._jobs.values() if job['finished_at'] is None)
+            if unfinished >= self.max_jobs:
+                raise QueueFull(f'{unfinished} jobs unfinished, limit {self.max_jobs}')
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'kind': kind,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+        self._job_threads.submit(self._run_job, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run_job(self, job_id, fn, args, kwargs):
+        job = self._jobs[job_id]
+        job['started_at'] = time.time()
+        job['status'] = 'running'
+        self._local.in_job = True
+        try:
+            job['result'] = fn(*args, **kwargs)
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            self._local.in_job = False
+            job['finished_at'] = time.time()
+
+    def job(self, job_id):
+        """A job's state, timings and (once done) result; None if unknown or expired."""
+        with self._jobs_lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+
+        now = time.time()
+        started, finished = job['started_at'], job['finished_at']
+        return {
+            'id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'submitted_at': _iso(job['submitted_at']),
+            'finished_at': _iso(finished),
+            'queued_seconds': round((started or now) - job['submitted_at'], 3),
+            'run_seconds': round((finished or now) - started, 3) if started else None,
+            'result': job['result'],
+            'error': job['error']
+        }
+
+    def stats(self):
+        with self._jobs_lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+        return {
+            'workers': self.workers,
+            'pending_tasks': self._pending,
+            'max_pending': self.max_pending,
+            'jobs': {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')},
+            'max_jobs': self.max_jobs
+        }
+
+    def register_metrics(self, registry, prefix):
+        """Expose queue depth and job counts through a metrics.Registry, read at scrape time."""
+        registry.callback(f'{prefix}_pending_tasks', 'Tasks queued or running in the process pool',
+                          lambda: {(): self._pending})
+        registry.callback(f'{prefix}_max_pending_tasks', 'Queue depth at which new tasks get a 429',
+                          lambda: {(): self.max_pending})
+        registry.callback(f'{prefix}_jobs', 'Background jobs by status',
+                          lambda: {(status,): count for status, count in self.stats()['jobs'].items()}, ('status',))
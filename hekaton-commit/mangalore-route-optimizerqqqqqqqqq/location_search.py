@@ -0,0 +1,232 @@
+import bisect
+import math
+import re
+
+import numpy as np
+
+import geo
+from spatial_index import KM_PER_DEGREE
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+TOKEN_ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+# Match weights per query token; a token in the same position as in the name gets a small bonus
+EXACT_WEIGHT = 3.0
+PREFIX_WEIGHT = 2.0
+FUZZY_WEIGHT = 1.0
+FUZZY_EDIT_PENALTY = 0.25
+POSITION_BONUS = 0.5
+# Every weight above is a multiple of this, and so is every score
+SCORE_STEP = 0.25
+
+# Typo tolerance starts at this many characters; longer tokens allow two edits
+FUZZY_MIN_LENGTH = 4
+FUZZY_TWO_EDITS_LENGTH = 8
+FUZZY_MAX_CANDIDATES = 200
+# Query trigrams one edit can break: three for a substitution, four for an adjacent swap
+TRIGRAMS_PER_EDIT = 4
+
+
+# Lowercase alphanumeric tokens of a name or query
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+# Leading-anchored character trigrams ("$ka", "kad", "adr", ...)
+def trigrams(token):
+    padded = '$' + token
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+# Every string one substitution, insertion, deletion or adjacent swap away from token
+def one_edit_variants(token):
+    splits = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+    variants = {head + tail[1:] for head, tail in splits if tail}
+    variants |= {head + tail[1] + tail[0] + tail[2:] for head, tail in splits if len(tail) > 1}
+    variants |= {head + char + tail[1:] for head, tail in splits if tail for char in TOKEN_ALPHABET}
+    variants |= {head + char + tail for head, tail in splits for char in TOKEN_ALPHABET}
+    variants.discard(token)
+    return variants
+
+
+# Optimal string alignment distance (edits plus adjacent swaps), giving up above max_distance
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+# Ranked autocomplete over location names: token prefixes, typo tolerance and an optional distance filter
+class LocationSearchIndex:
+    def __init__(self, names, points=None):
+        self.names = [str(name) for name in names]
+        self.points = None if points is None else np.asarray(points, dtype=float).reshape(-1, 2)
+        size = len(self.names)
+
+        # Postings sorted by token, so every token (and every prefix range of tokens) is one contiguous slice
+        postings = {}
+        for location, name in enumerate(self.names):
+            for position, token in enumerate(tokenize(name)):
+                postings.setdefault(token, []).append((location, position))
+
+        self.vocabulary = sorted(postings)
+        counts = [len(postings[token]) for token in self.vocabulary]
+        self.starts = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.starts[1:])
+        flat = np.array(
+            [entry for token in self.vocabulary for entry in postings[token]], dtype=np.int64
+        ).reshape(-1, 2)
+        self.locations = flat[:, 0]
+        self.positions = flat[:, 1]
+
+        # Static tie-break: shorter names first, then alphabetical
+        order = sorted(range(size), key=lambda i: (len(self.names[i]), self.names[i].lower()))
+        self.rank = np.empty(size, dtype=np.float64)
+        self.rank[order] = np.arange(size)
+
+        # Trigram -> vocabulary ids, for typo-tolerant lookups
+        grams = {}
+        for token_id, token in enumerate(self.vocabulary):
+            for gram in trigrams(token):
+                grams.setdefault(gram, []).append(token_id)
+        self.grams = {gram: np.array(ids, dtype=np.int64) for gram, ids in grams.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix_range(self, prefix):
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def _fuzzy_tokens(self, token):
+        """(vocabulary id, edits) for tokens whose start is within one or two edits of token."""
+        if len(token) < FUZZY_MIN_LENGTH:
+            return []
+        max_distance = 2 if len(token) >= FUZZY_TWO_EDITS_LENGTH else 1
+
+        query_grams = trigrams(token)
+        found = [self.grams[gram] for gram in query_grams if gram in self.grams]
+        min_shared = len(query_grams) - TRIGRAMS_PER_EDIT * max_distance
+        if min_shared < 1:
+            # Short enough for one edit to break every trigram ("kdari" shares none with "kadri"):
+            # also take the tokens that start with a one-edit variant of the query
+            for variant in one_edit_variants(token):
+                lo, hi = self._prefix_range(variant)
+                if lo < hi:
+                    found.append(np.arange(lo, hi))
+        if not found:
+            return []
+        ids, shared = np.unique(np.concatenate(found), return_counts=True)
+        keep = shared >= max(1, min_shared)
+        ids, shared = ids[keep], shared[keep]
+        ids = ids[np.argsort(-shared, kind='stable')[:FUZZY_MAX_CANDIDATES]]
+
+        matches = []
+        for token_id in ids:
+            candidate = self.vocabulary[token_id]
+            # Prefix-tolerant: compare with the candidate's start, allowing it to be a little longer or shorter
+            lengths = range(max(1, len(token) - max_distance), len(token) + max_distance + 1)
+            distance = min(edit_distance(token, candidate[:length], max_distance) for length in lengths)
+            if distance <= max_distance:
+                matches.append((int(token_id), distance))
+        return matches
+
+    def _token_matches(self, token, query_position):
+        """(locations, weights) of every posting matched by one query token; a location may repeat."""
+        lo, hi = self._prefix_range(token)
+        if lo < hi:
+            start, end = self.starts[lo], self.starts[hi]
+            exact_end = self.starts[lo + 1] if self.vocabulary[lo] == token else start
+            weights = np.full(end - start, PREFIX_WEIGHT)
+            weights[:exact_end - start] = EXACT_WEIGHT
+            weights += POSITION_BONUS * (self.positions[start:end] == query_position)
+            return self.locations[start:end], weights
+
+        fuzzy = self._fuzzy_tokens(token)
+        if not fuzzy:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        locations = np.concatenate([self.locations[self.starts[i]:self.starts[i + 1]] for i, _ in fuzzy])
+        weights = np.concatenate([
+            np.full(self.starts[i + 1] - self.starts[i], FUZZY_WEIGHT - FUZZY_EDIT_PENALTY * distance)
+            for i, distance in fuzzy
+        ])
+        return locations, weights
+
+    def _best_weights(self, locations, weights):
+        # Dense per-location best weight (0 = no match); a name can match one query token several times
+        best = np.zeros(len(self.names))
+        np.maximum.at(best, locations, weights)
+        return best
+
+    def search(self, query, limit=None, point=None, radius_km=None):
+        """Locations matching every query token, as (indices, scores, distances).
+
+        Results are ranked by score, or by distance from point when one is given;
+        radius_km drops anything farther away. distances is None without a point.
+        """
+        tokens = tokenize(query)
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0), (None if point is None else np.zeros(0))
+        if not tokens or not len(self.names) or (limit is not None and limit <= 0):
+            return empty
+
+        # Rarest token first: its matches are the candidates, the other tokens only filter and add weight
+        matched = sorted((self._token_matches(token, i) for i, token in enumerate(tokens)), key=lambda m: len(m[0]))
+        if not len(matched[0][0]):
+            return empty
+        locations, weights = matched[0]
+        best = self._best_weights(locations, weights)
+        if len(locations) < len(self.names) // 8:
+            # Few matches: sorting them beats scanning every location
+            locations = np.sort(locations)
+            candidates = locations[np.r_[True, locations[1:] != locations[:-1]]]
+        else:
+            candidates = np.flatnonzero(best > 0)
+        scores = best[candidates]
+        for locations, weights in matched[1:]:
+            token_scores = self._best_weights(locations, weights)[candidates]
+            keep = token_scores > 0
+            candidates, scores = candidates[keep], scores[keep] + token_scores[keep]
+        if not len(candidates):
+            return empty
+
+        if point is not None:
+            if radius_km is not None:
+                # Cheap lat/lng box first; the Haversine only runs on what can be inside the radius
+                lat_span = radius_km / KM_PER_DEGREE
+                lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(point[0])), 0.01))
+                points = self.points[candidates]
+                in_box = (np.abs(points[:, 0] - point[0]) <= lat_span) & (np.abs(points[:, 1] - point[1]) <= lng_span)
+                candidates, scores = candidates[in_box], scores[in_box]
+            distances = geo.distance_matrix([point], self.points[candidates])[0]
+            if radius_km is not None:
+                inside = distances <= radius_km
+                candidates, scores, distances = candidates[inside], scores[inside], distances[inside]
+            order = np.lexsort((self.rank[candidates], -scores, distances))
+        else:
+            distances = None
+            # Higher score first, then the static rank; only the top `limit` need a full sort.
+            # Scores are whole multiples of SCORE_STEP, so counting steps keeps one step worth more than any rank gap
+            key = -np.rint(scores / SCORE_STEP) * (len(self.names) + 1) + self.rank[candidates]
+            if limit is not None and limit < len(key):
+                top = np.argpartition(key, limit)[:limit]
+                order = top[np.argsort(key[top], kind='stable')]
+            else:
+                order = np.argsort(key, kind='stable')
+
+        if limit is not None:
+            order = order[:limit]
+        return candidates[order], scores[order], (None if distances is None else distances[order])
@@ -0,0 +1,276 @@
+"""In-process metrics in the Prometheus text format, plus a slow-request profiler.
+
+Counters and histograms are recorded as requests run. Values that already
+live elsewhere (cache hit counts, pool queue depth) are read at scrape time
+through callbacks. instrument(app) times every request by route and serves
+GET /metrics.
+
+The profiler is opt-in (PROFILE_SLOW_REQUESTS=true). A sampling thread then
+records the stacks of threads serving requests every PROFILE_INTERVAL_MS.
+Requests slower than PROFILE_THRESHOLD_MS are written to PROFILE_DIR as
+folded stacks ("frame;frame;frame count" lines). flamegraph.pl, speedscope
+and inferno all read that format directly.
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from config import Config
+    LOG_DIR = Config.LOG_DIR
+except ImportError:  # backend started on its own, outside the project root
+    LOG_DIR = os.environ.get('LOG_DIR', './logs')
+
+PROFILE_SLOW_REQUESTS = os.environ.get('PROFILE_SLOW_REQUESTS', 'false').lower() == 'true'
+PROFILE_THRESHOLD_MS = float(os.environ.get('PROFILE_THRESHOLD_MS', 500))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(LOG_DIR, 'profiles'))
+
+# Seconds; covers cached reads (sub-millisecond) through cold model fits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _label_text(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f'{self.name}{_label_text(self.labelnames, key)} {_number(value)}' for key, value in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}  # label values -> [per-bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += seconds
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labelnames, key, [('le', _number(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _label_text(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_number(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Callback:
+    """Gauge or counter whose samples are read at scrape time: fn() -> {label values tuple: value}."""
+
+    def __init__(self, name, help_text, fn, labelnames=(), kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        try:
+            samples = self.fn()
+        except Exception as e:
+            print(f"Error collecting metric {self.name}: {e}")
+            return lines
+        lines += [f'{self.name}{_label_text(self.labelnames, key)} {_number(value)}' for key, value in samples.items()]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        # Re-registering a name (e.g. a module reloaded by the debug server) returns the existing metric
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(self, name, help_text, fn, labelnames=(), kind='gauge'):
+        with self._lock:
+            self._metrics[name] = Callback(name, help_text, fn, labelnames, kind)
+            return self._metrics[name]
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route', ('method', 'endpoint', 'status')
+)
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight requests; keeps those of slow ones as folded stacks."""
+
+    def __init__(self, threshold_ms=PROFILE_THRESHOLD_MS, interval_ms=PROFILE_INTERVAL_MS, directory=PROFILE_DIR):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self._active = {}  # thread id -> {stack: samples}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dumped = 0
+
+    def _ensure_sampler(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+                    self._thread.start()
+
+    def _sample_loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                thread_ids = list(self._active)
+            if not thread_ids:
+                continue
+            frames = sys._current_frames()
+            samples = []
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                if names:
+                    samples.append((thread_id, ';'.join(reversed(names))))
+            with self._lock:
+                for thread_id, stack in samples:
+                    stacks = self._active.get(thread_id)
+                    if stacks is not None:
+                        stacks[stack] = stacks.get(stack, 0) + 1
+
+    def start_request(self):
+        self._ensure_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = {}
+
+    def finish_request(self, label, seconds):
+        """Stop sampling this thread; write its stacks if the request was slow. Returns the file path or None."""
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or seconds < self.threshold:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        safe_label = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'root'
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(seconds * 1000)}ms-{safe_label}.folded")
+        with open(path, 'w') as file:
+            for stack, count in sorted(stacks.items()):
+                file.write(f'{stack} {count}\n')
+        self.dumped += 1
+        return path
+
+
+profiler = SlowRequestProfiler() if PROFILE_SLOW_REQUESTS else None
+
+
+def instrument(app):
+    """Time every request of a Flask app by route and serve the registry at /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        if profiler is not None:
+            profiler.start_request()
+
+    @app.after_request
+    def _record_latency(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            seconds = time.perf_counter() - started
+            # The route template, not the raw path, keeps label cardinality bounded
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_SECONDS.observe(seconds, method=request.method, endpoint=endpoint, status=response.status_code)
+            if profiler is not None:
+                profiler.finish_request(f'{request.method} {endpoint}', seconds)
+        return response
+
+    if profiler is not None:
+        @app.teardown_request
+        def _stop_sampling(_error):
+            # A request that raised skips after_request; stop sampling its thread anyway
+            profiler.finish_request('', 0.0)
+
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return app
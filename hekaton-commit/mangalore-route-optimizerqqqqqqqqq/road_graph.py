@@ -0,0 +1,346 @@
+import csv
+import heapq
+import math
+import operator
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+
+import geo
+from spatial_index import GridIndex
+
+# Speed assumed for edges without one (km/h)
+DEFAULT_SPEED_KMH = 40
+
+# Typical urban speeds (km/h) for OpenStreetMap highway classes we route over
+OSM_SPEEDS = {
+    "motorway": 80, "trunk": 60, "primary": 50, "secondary": 40, "tertiary": 35,
+    "unclassified": 25, "residential": 25, "service": 15, "living_street": 10
+}
+
+WEIGHTS = ("distance", "time")
+
+# Stand-in for infinite landmark distances, so bound arithmetic never produces NaN
+UNREACHABLE = 1e18
+
+# Landmark bounds (of 2 per landmark) evaluated per node in a query
+ACTIVE_LANDMARK_COLUMNS = 4
+
+
+# Compressed sparse row adjacency: edges of node u are indices[indptr[u]:indptr[u + 1]]
+def _build_csr(node_count, sources, targets, weights):
+    order = np.argsort(sources, kind="stable")
+    indptr = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=indptr[1:])
+    return {
+        "indptr": indptr,
+        "indices": targets[order],
+        "weights": {name: values[order] for name, values in weights.items()}
+    }
+
+
+# Road network as CSR arrays with Dijkstra, A* and ALT (landmark) shortest paths
+class RoadGraph:
+    def __init__(self, coordinates, sources, targets, speeds=None, landmark_count=8):
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        node_count = len(self.coordinates)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        if speeds is None:
+            speeds = np.full(len(sources), DEFAULT_SPEED_KMH, dtype=float)
+        speeds = np.asarray(speeds, dtype=float)
+        lengths = geo.pairwise_distances(self.coordinates[sources], self.coordinates[targets])
+        weights = {"distance": lengths, "time": lengths / speeds * 60}
+        self.max_speed = float(speeds.max()) if len(speeds) else DEFAULT_SPEED_KMH
+
+        forward = _build_csr(node_count, sources, targets, weights)
+        backward = _build_csr(node_count, targets, sources, weights)
+
+        # Plain lists for the search loops; indexing NumPy scalars per edge is much slower
+        self._forward = self._as_lists(forward)
+        self._backward = self._as_lists(backward)
+        self.edge_count = len(sources)
+
+        self.node_index = GridIndex(self.coordinates)
+        radians = np.radians(self.coordinates)
+        self._latitudes = radians[:, 0].tolist()
+        self._longitudes = radians[:, 1].tolist()
+        self._cos_latitudes = np.cos(radians[:, 0]).tolist()
+        self.landmark_count = min(landmark_count, node_count)
+        self._landmarks = {}
+
+    @staticmethod
+    def _as_lists(csr):
+        return (
+            csr["indptr"].tolist(),
+            csr["indices"].tolist(),
+            {name: values.tolist() for name, values in csr["weights"].items()}
+        )
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    # Best-first search; heuristic maps a node to a lower bound on its cost to target (None = Dijkstra).
+    # Bounds are worked out only for nodes the search reaches, once each
+    def _search(self, adjacency, source, weight, target=None, heuristic=None):
+        indptr, indices, weights = adjacency
+        edge_weights = weights[weight]
+        distances = {source: 0.0}
+        previous = {}
+        bounds = {}
+        heap = [(heuristic(source) if heuristic else 0.0, 0.0, source)]
+
+        while heap:
+            _, distance, node = heapq.heappop(heap)
+            # Skip stale heap entries; a node is re-expanded if a cheaper path to it turns up
+            if distance > distances[node]:
+                continue
+            if node == target:
+                break
+
+            for edge in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[edge]
+                candidate = distance + edge_weights[edge]
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = node
+                    estimate = candidate
+                    if heuristic:
+                        bound = bounds.get(neighbour)
+                        if bound is None:
+                            bound = bounds[neighbour] = heuristic(neighbour)
+                        estimate += bound
+                    heapq.heappush(heap, (estimate, candidate, neighbour))
+
+        return distances, previous
+
+    # Spread landmarks out geographically: each new one is the node farthest from those chosen
+    def _select_landmarks(self):
+        chosen = [0]
+        nearest = geo.distance_matrix(self.coordinates[:1], self.coordinates)[0]
+        while len(chosen) < self.landmark_count:
+            candidate = int(nearest.argmax())
+            if nearest[candidate] == 0:
+                break
+            chosen.append(candidate)
+            nearest = np.minimum(nearest, geo.distance_matrix(self.coordinates[candidate:candidate + 1], self.coordinates)[0])
+        return chosen
+
+    # ALT preprocessing for one weight, built on first use: per node, the columns
+    # [-distance from each landmark..., distance to each landmark...] laid out flat (returned
+    # with their count), so the bound for node n towards target t is max(columns[n] - columns[t])
+    def _landmark_tables(self, weight):
+        if weight not in self._landmarks:
+            node_count = len(self.coordinates)
+            landmarks = self._select_landmarks() if self.landmark_count else []
+            from_landmark = np.full((node_count, len(landmarks)), np.inf)
+            to_landmark = np.full((node_count, len(landmarks)), np.inf)
+
+            for column, landmark in enumerate(landmarks):
+                distances, _ = self._search(self._forward, landmark, weight)
+                from_landmark[list(distances), column] = list(distances.values())
+                distances, _ = self._search(self._backward, landmark, weight)
+                to_landmark[list(distances), column] = list(distances.values())
+
+            columns = np.nan_to_num(np.hstack([-from_landmark, to_landmark]), posinf=UNREACHABLE, neginf=-UNREACHABLE)
+            self._landmarks[weight] = (array("d", columns.ravel().tobytes()), columns.shape[1])
+        return self._landmarks[weight]
+
+    def prepare(self):
+        """Run ALT preprocessing for every weight now instead of on the first query."""
+        for weight in WEIGHTS:
+            self._landmark_tables(weight)
+
+    # Lower bound on the cost from a node to target, as a function evaluated per node: straight-line
+    # (Haversine) distance, raised by the triangle inequality over the landmark columns that bound
+    # the source best (the rest rarely win and would only slow every evaluation down)
+    def _heuristic(self, source, target, weight):
+        latitudes, longitudes, cos_latitudes = self._latitudes, self._longitudes, self._cos_latitudes
+        target_lat, target_lng, target_cos = latitudes[target], longitudes[target], cos_latitudes[target]
+        scale = 2 * geo.EARTH_RADIUS_KM * (60 / self.max_speed if weight == "time" else 1)
+
+        columns, width = self._landmark_tables(weight)
+        target_columns = columns[target * width:(target + 1) * width]
+        source_bounds = list(map(operator.sub, columns[source * width:(source + 1) * width], target_columns))
+        active = sorted(range(width), key=source_bounds.__getitem__, reverse=True)[:ACTIVE_LANDMARK_COLUMNS]
+        active = [(column, target_columns[column]) for column in active]
+
+        def bound(node):
+            half_lat = math.sin((latitudes[node] - target_lat) * 0.5)
+            half_lng = math.sin((longitudes[node] - target_lng) * 0.5)
+            a = half_lat * half_lat + cos_latitudes[node] * target_cos * half_lng * half_lng
+            best = scale * math.asin(math.sqrt(a if a < 1.0 else 1.0))
+            base = node * width
+            for column, target_value in active:
+                landmark_bound = columns[base + column] - target_value
+                if landmark_bound > best:
+                    best = landmark_bound
+            return best
+
+        return bound
+
+    def shortest_path(self, source, target, weight="time", use_heuristic=True):
+        """Return (node path, cost) from source to target node, or (None, inf) if unreachable."""
+        heuristic = self._heuristic(source, target, weight) if use_heuristic else None
+        distances, previous = self._search(self._forward, source, weight, target, heuristic)
+        if target not in distances:
+            return None, math.inf
+
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path, distances[target]
+
+    def snap(self, point):
+        """Return (node, distance_km) of the graph node nearest to a [lat, lng] point."""
+        nodes, distances = self.node_index.nearest(point, 1)
+        return int(nodes[0]), float(distances[0])
+
+    def route(self, start, end, weight="time"):
+        """Route between two coordinates over the graph, or None if they are not connected."""
+        start_node, start_access = self.snap(start)
+        end_node, end_access = self.snap(end)
+
+        path, _ = self.shortest_path(start_node, end_node, weight)
+        if path is None:
+            return None
+
+        path_points = self.coordinates[path]
+        coordinates = path_points.tolist()
+
+        # Off-network access legs, skipped when the point already sits on a node
+        if start_access > 0.001:
+            coordinates.insert(0, list(start))
+        if end_access > 0.001:
+            coordinates.append(list(end))
+
+        segment_lengths = geo.segment_lengths(path_points)
+        access = start_access + end_access
+        distance = float(segment_lengths.sum()) + access
+
+        # Travel time along the path edges, plus the off-network access legs at the default speed
+        _, edge_minutes = self.path_cost(path, "time")
+        duration = edge_minutes + access / DEFAULT_SPEED_KMH * 60
+
+        return {"coordinates": coordinates, "distance": distance, "duration": duration, "nodes": path}
+
+    def path_cost(self, path, weight):
+        """Sum an edge weight along a node path (cheapest parallel edge); returns (edges, total)."""
+        indptr, indices, weights = self._forward
+        edge_weights = weights[weight]
+        edges = []
+        total = 0.0
+        for node, following in zip(path[:-1], path[1:]):
+            best_edge = min(
+                (edge for edge in range(indptr[node], indptr[node + 1]) if indices[edge] == following),
+                key=lambda edge: edge_weights[edge]
+            )
+            edges.append(best_edge)
+            total += edge_weights[best_edge]
+        return edges, total
+
+
+# Truthy values used for one-way flags in CSV and OSM data
+def _is_oneway(value):
+    return str(value).strip().lower() in ("1", "yes", "true")
+
+
+def _graph_from_edges(node_keys, edges, landmark_count):
+    coordinates = [None] * len(node_keys)
+    for key, node in node_keys.items():
+        coordinates[node] = key
+
+    sources, targets, speeds = [], [], []
+    for source, target, speed, oneway in edges:
+        sources.append(source)
+        targets.append(target)
+        speeds.append(speed)
+        if not oneway:
+            sources.append(target)
+            targets.append(source)
+            speeds.append(speed)
+
+    return RoadGraph(coordinates, sources, targets, speeds, landmark_count)
+
+
+def load_csv_edges(path, landmark_count=8):
+    """Load an edge list CSV: from_lat, from_lng, to_lat, to_lng[, speed_kmh][, oneway]."""
+    node_keys = {}
+    edges = []
+
+    def node_for(lat, lng):
+        key = (round(float(lat), 7), round(float(lng), 7))
+        if key not in node_keys:
+            node_keys[key] = len(node_keys)
+        return node_keys[key]
+
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            source = node_for(row["from_lat"], row["from_lng"])
+            target = node_for(row["to_lat"], row["to_lng"])
+            if source == target:
+                continue
+            speed = float(row.get("speed_kmh") or DEFAULT_SPEED_KMH)
+            edges.append((source, target, speed, _is_oneway(row.get("oneway", ""))))
+
+    return _graph_from_edges(node_keys, edges, landmark_count)
+
+
+def _osm_speed(tags):
+    maxspeed = tags.get("maxspeed", "")
+    digits = "".join(ch for ch in maxspeed.split(";")[0] if ch.isdigit())
+    if digits:
+        return float(digits)
+    highway = tags["highway"].replace("_link", "")
+    return OSM_SPEEDS.get(highway, DEFAULT_SPEED_KMH)
+
+
+def load_osm(path, landmark_count=8):
+    """Load drivable ways from an OpenStreetMap XML extract (.osm)."""
+    osm_nodes = {}
+    ways = []
+
+    for _, element in ET.iterparse(path, events=("end",)):
+        if element.tag == "node":
+            osm_nodes[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+            element.clear()
+        elif element.tag == "way":
+            tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+            highway = tags.get("highway", "").replace("_link", "")
+            if highway in OSM_SPEEDS:
+                refs = [nd.get("ref") for nd in element.iter("nd")]
+                ways.append((refs, tags))
+            element.clear()
+
+    node_keys = {}
+    edges = []
+    for refs, tags in ways:
+        speed = _osm_speed(tags)
+        oneway = tags.get("oneway", "")
+        if oneway == "-1":
+            refs = refs[::-1]
+
+        path = []
+        for ref in refs:
+            if ref not in osm_nodes:
+                continue
+            key = osm_nodes[ref]
+            if key not in node_keys:
+                node_keys[key] = len(node_keys)
+            path.append(node_keys[key])
+
+        for source, target in zip(path[:-1], path[1:]):
+            if source != target:
+                edges.append((source, target, speed, oneway == "-1" or _is_oneway(oneway)))
+
+    return _graph_from_edges(node_keys, edges, landmark_count)
+
+
+def load_road_graph(path, landmark_count=8):
+    """Load a road network from a .osm extract or a CSV edge list."""
+    if str(path).lower().endswith(".osm"):
+        return load_osm(path, landmark_count)
+    return load_csv_edges(path, landmark_count)
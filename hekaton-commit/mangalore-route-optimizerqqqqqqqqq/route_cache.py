@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+
+# Coordinates are snapped to this many decimal places (4 ~ 11 m) before keying the cache
+ROUTE_CACHE_PRECISION = 4
+
+
+# Rounded (lat, lng) tuple, so requests a few metres apart share a cache entry
+def snap_point(coordinates, precision=ROUTE_CACHE_PRECISION):
+    return round(float(coordinates[0]), precision), round(float(coordinates[1]), precision)
+
+
+def route_key(start_coords, end_coords, waypoints, route_type, epoch, precision=ROUTE_CACHE_PRECISION):
+    """Cache key for one route variant: snapped stops, route type and traffic epoch."""
+    stops = tuple(snap_point(point, precision) for point in [start_coords, *waypoints, end_coords])
+    return stops, route_type, epoch
+
+
+# Bounded least-recently-used cache of computed routes, with hit/miss counters
+class RouteCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached value, marked most recently used, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def register_metrics(self, registry, prefix):
+        """Expose hit/miss counts and the entry count through a metrics.Registry, read at scrape time."""
+        registry.callback(f'{prefix}_requests_total', 'Route cache lookups by result',
+                          lambda: {('hit',): self.hits, ('miss',): self.misses}, ('result',), 'counter')
+        registry.callback(f'{prefix}_entries', 'Routes held in the cache',
+                          lambda: {(): len(self._entries)})
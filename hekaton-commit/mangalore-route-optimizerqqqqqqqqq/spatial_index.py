@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+
+import geo
+
+# Kilometres per degree of latitude
+KM_PER_DEGREE = 111.32
+
+
+# Uniform lat/lng grid over a set of points, for radius and k-nearest queries
+class GridIndex:
+    def __init__(self, points, cell_size_km=0.5):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_size_km = cell_size_km
+
+        # Size cells in degrees so each cell is at least cell_size_km on both axes
+        reference_lat = float(np.abs(self.points[:, 0]).max()) if len(self.points) else 0.0
+        self.cell_lat = cell_size_km / KM_PER_DEGREE
+        self.cell_lng = cell_size_km / (KM_PER_DEGREE * max(math.cos(math.radians(reference_lat)), 0.01))
+
+        # Bucket point indices by cell: one sort, then a dict of contiguous slices
+        self._buckets = {}
+        if len(self.points):
+            rows = np.floor(self.points[:, 0] / self.cell_lat).astype(np.int64)
+            cols = np.floor(self.points[:, 1] / self.cell_lng).astype(np.int64)
+            order = np.lexsort((cols, rows))
+            cells = np.stack([rows[order], cols[order]], axis=1)
+            unique_cells, starts = np.unique(cells, axis=0, return_index=True)
+            ends = np.append(starts[1:], len(order))
+            for (row, col), start, end in zip(unique_cells, starts, ends):
+                self._buckets[(int(row), int(col))] = order[start:end]
+
+    def __len__(self):
+        return len(self.points)
+
+    # Indices of every point in the cells overlapping a radius_km box around point
+    def _candidates(self, point, radius_km):
+        lat, lng = point
+        lat_span = radius_km / KM_PER_DEGREE
+        lng_span = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+
+        row_min = math.floor((lat - lat_span) / self.cell_lat)
+        row_max = math.floor((lat + lat_span) / self.cell_lat)
+        col_min = math.floor((lng - lng_span) / self.cell_lng)
+        col_max = math.floor((lng + lng_span) / self.cell_lng)
+
+        # Wide searches scan the occupied buckets instead of enumerating every cell
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._buckets):
+            found = [
+                indices for (row, col), indices in self._buckets.items()
+                if row_min <= row <= row_max and col_min <= col <= col_max
+            ]
+        else:
+            found = [
+                self._buckets[(row, col)]
+                for row in range(row_min, row_max + 1)
+                for col in range(col_min, col_max + 1)
+                if (row, col) in self._buckets
+            ]
+
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(found)
+
+    def radius(self, point, radius_km):
+        """Return (indices, distances_km) of points within radius_km, nearest first."""
+        candidates = self._candidates(point, radius_km)
+        if len(candidates) == 0:
+            return candidates, np.zeros(0)
+
+        distances = geo.distance_matrix([point], self.points[candidates])[0]
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
+
+    def nearest(self, point, k=1, max_distance_km=None):
+        """Return (indices, distances_km) of the k nearest points, optionally capped by distance."""
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        # Grow the search radius until it holds k points; radius results are exact
+        search_km = self.cell_size_km
+        while True:
+            limit = search_km if max_distance_km is None else min(search_km, max_distance_km)
+            indices, distances = self.radius(point, limit)
+            if len(indices) >= k or limit == max_distance_km or search_km > 2 * math.pi * geo.EARTH_RADIUS_KM:
+                return indices[:k], distances[:k]
+            search_km *= 2
+
+    def nearest_within(self, points, max_distance_km):
+        """Nearest point to each query point within max_distance_km, as (indices, distances).
+
+        Index is -1 and distance inf where nothing is in range.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        indices = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+
+        for i, point in enumerate(points):
+            found, found_distances = self.radius(point, max_distance_km)
+            if len(found):
+                indices[i] = found[0]
+                distances[i] = found_distances[0]
+
+        return indices, distances
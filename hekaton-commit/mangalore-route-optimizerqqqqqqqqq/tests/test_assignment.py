@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import geo
+from assignment import assign_orders, nearest_facilities, order_blocks
+
+CENTER = np.array([12.8698, 74.8439])
+
+
+@pytest.fixture
+def sites():
+    rng = np.random.default_rng(9)
+    orders = CENTER + rng.uniform(-0.1, 0.1, size=(400, 2))
+    facilities = CENTER + rng.uniform(-0.1, 0.1, size=(6, 2))
+    return orders, facilities
+
+
+def test_nearest_facilities_match_brute_force(sites):
+    orders, facilities = sites
+    indices, distances = nearest_facilities(orders, facilities, k=3)
+    matrix = geo.distance_matrix(orders, facilities)
+    np.testing.assert_array_equal(indices, np.argsort(matrix, axis=1, kind='stable')[:, :3])
+    np.testing.assert_allclose(distances, np.sort(matrix, axis=1)[:, :3])
+
+
+def test_uncapacitated_assignment_is_the_nearest_facility(sites):
+    orders, facilities = sites
+    assignment, distance, loads = assign_orders(orders, facilities)
+    np.testing.assert_array_equal(assignment, geo.distance_matrix(orders, facilities).argmin(axis=1))
+    assert loads.sum() == len(orders)
+
+
+def test_capacities_are_respected(sites):
+    orders, facilities = sites
+    rng = np.random.default_rng(4)
+    demands = rng.integers(1, 4, size=len(orders)).astype(float)
+    capacities = np.full(len(facilities), demands.sum() / len(facilities) * 1.05)
+
+    assignment, distance, loads = assign_orders(orders, facilities, capacities, demands)
+    assert (assignment >= 0).all()
+    np.testing.assert_allclose(loads, np.bincount(assignment, weights=demands, minlength=len(facilities)))
+    assert (loads <= capacities + 1e-9).all()
+    np.testing.assert_allclose(distance, geo.pairwise_distances(orders, facilities[assignment]))
+
+
+def test_demand_over_total_capacity_is_rejected(sites):
+    orders, facilities = sites
+    with pytest.raises(ValueError):
+        assign_orders(orders, facilities, capacities=np.full(len(facilities), 10.0))
+
+
+def test_order_blocks_cover_every_order_once():
+    blocks = order_blocks(1000, 64, max_orders=300)
+    assert blocks[0][0] == 0 and blocks[-1][1] == 1000
+    assert all(end - start <= 300 for start, end in blocks)
+    assert all(a[1] == b[0] for a, b in zip(blocks, blocks[1:]))
@@ -0,0 +1,62 @@
+import pytest
+
+from location_search import LocationSearchIndex, edit_distance
+
+NAMES = [
+    'Kadri Park', 'Kadri Temple', 'Kankanady Market', 'Bejai Depot', 'Hampankatta Circle',
+    'Lalbagh Warehouse', 'Kottara Chowki Store', 'Surathkal Showroom', 'Pumpwell Circle'
+]
+POINTS = [[12.8857 + i * 0.01, 74.8553 - i * 0.01] for i in range(len(NAMES))]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return LocationSearchIndex(NAMES, POINTS)
+
+
+def names(index, query, **kwargs):
+    found, _, _ = index.search(query, **kwargs)
+    return [NAMES[i] for i in found]
+
+
+def test_prefix_matches_rank_exact_tokens_and_short_names_first(index):
+    assert names(index, 'ka') == ['Kadri Park', 'Kadri Temple', 'Kankanady Market']
+    assert names(index, 'kadri t') == ['Kadri Temple']
+    assert names(index, 'circle') == ['Pumpwell Circle', 'Hampankatta Circle']
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('kdari', 'Kadri Park'),        # adjacent swap
+    ('kadry', 'Kadri Park'),        # substitution
+    ('lalbag', 'Lalbagh Warehouse'),  # prefix of the name, nothing to fix
+    ('lalbgh', 'Lalbagh Warehouse'),  # dropped character
+    ('surathkall', 'Surathkal Showroom'),
+    ('hampnakatta', 'Hampankatta Circle'),
+])
+def test_typos_still_match(index, query, expected):
+    assert names(index, query)[0] == expected
+
+
+def test_short_tokens_are_not_fuzzy_matched(index):
+    assert names(index, 'kdr') == []
+
+
+def test_radius_filter_orders_by_distance(index):
+    point = POINTS[1]
+    assert names(index, 'kadri', point=point, radius_km=1.0) == ['Kadri Temple']
+    assert names(index, 'kadri', point=point) == ['Kadri Temple', 'Kadri Park']
+
+
+def test_edit_distance_counts_a_swap_as_one_edit():
+    assert edit_distance('kdari', 'kadri', 2) == 1
+    assert edit_distance('kadri', 'kottara', 1) == 2
+
+
+@pytest.mark.parametrize('limit', [None, 1, 2])
+def test_higher_score_beats_a_better_static_rank(limit):
+    # "Zz0 Road" is the shortest name (best static rank) but only matches "road" away from the query's position
+    names_ = ['Zz0 Road', 'Road Circle Junction Market Yard']
+    index = LocationSearchIndex(names_ + [f'Store {i} Road' for i in range(50)])
+    found, scores, _ = index.search('road', limit)
+    assert names_[1] == index.names[found[0]]
+    assert list(scores) == sorted(scores, reverse=True)
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+from road_graph import RoadGraph
+
+
+@pytest.fixture(scope='module')
+def grid_graph():
+    # 12 x 12 street grid with a few missing blocks, mixed speeds and both directions on every street
+    side = 12
+    rng = np.random.default_rng(11)
+    rows, cols = np.meshgrid(np.arange(side), np.arange(side), indexing='ij')
+    coordinates = np.stack([12.86 + rows.ravel() * 0.002, 74.84 + cols.ravel() * 0.002], axis=1)
+    nodes = np.arange(side * side).reshape(side, side)
+    sources = np.concatenate([nodes[:-1].ravel(), nodes[:, :-1].ravel()])
+    targets = np.concatenate([nodes[1:].ravel(), nodes[:, 1:].ravel()])
+    kept = rng.random(len(sources)) > 0.15
+    sources, targets = sources[kept], targets[kept]
+    speeds = rng.choice([25.0, 40.0, 60.0], size=len(sources))
+    return RoadGraph(
+        coordinates, np.concatenate([sources, targets]), np.concatenate([targets, sources]),
+        np.concatenate([speeds, speeds]), landmark_count=4
+    )
+
+
+@pytest.mark.parametrize('weight', ['time', 'distance'])
+def test_astar_matches_dijkstra(grid_graph, weight):
+    rng = np.random.default_rng(3)
+    for source, target in rng.integers(len(grid_graph), size=(40, 2)):
+        path, cost = grid_graph.shortest_path(int(source), int(target), weight)
+        _, dijkstra_cost = grid_graph.shortest_path(int(source), int(target), weight, use_heuristic=False)
+        assert cost == pytest.approx(dijkstra_cost, abs=1e-9)
+        if path is not None:
+            assert path[0] == source and path[-1] == target
+            assert grid_graph.path_cost(path, weight)[1] == pytest.approx(cost)
+
+
+def test_heuristic_is_a_lower_bound(grid_graph):
+    target = 77
+    exact, _ = grid_graph._search(grid_graph._backward, target, 'time')
+    bound = grid_graph._heuristic(0, target, 'time')
+    for node, cost in exact.items():
+        assert bound(node) <= cost + 1e-9
+
+
+def test_one_way_street_is_routed_around():
+    coordinates = [[12.86, 74.84], [12.86, 74.85], [12.87, 74.85], [12.88, 74.85]]
+    graph = RoadGraph(coordinates, [0, 1, 2, 2], [1, 2, 0, 3], landmark_count=2)
+    assert graph.shortest_path(1, 0)[0] == [1, 2, 0]
+    assert graph.shortest_path(3, 0) == (None, math.inf)
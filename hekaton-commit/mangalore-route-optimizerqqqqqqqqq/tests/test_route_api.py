@@ -0,0 +1,73 @@
+import pytest
+
+import app
+
+ROUTE = {'start': [12.8698, 74.8439], 'end': [12.9141, 74.856]}
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'vehicles': 'two'}, 'vehicles and time_budget_ms must be numeric'),
+    ({'time_budget_ms': [200]}, 'vehicles and time_budget_ms must be numeric'),
+    ({'vehicles': 0}, 'vehicles and time_budget_ms must be positive'),
+    ({'time_budget_ms': -5}, 'vehicles and time_budget_ms must be positive'),
+    ({'departure_time': 'soon'}, 'departure_time must be an ISO 8601 time or Unix seconds'),
+])
+def test_bad_route_parameters_get_400(client, overrides, error):
+    response = client.post('/api/route', json={**ROUTE, **overrides})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
+
+
+def test_time_budget_is_capped(monkeypatch):
+    budgets = []
+    monkeypatch.setattr(app.vrp, 'optimize_order',
+                        lambda start, end, waypoints, budget: budgets.append(budget) or (list(range(len(waypoints))), {
+                            'distance_before': 1.0, 'distance_after': 1.0, 'solve_time_ms': 0.0}))
+    payload, status = app.route_response({**ROUTE, 'waypoints': [[12.88, 74.85]], 'optimize': True,
+                                          'time_budget_ms': 10 ** 9})
+    assert status == 200
+    assert budgets == [app.MAX_TIME_BUDGET_MS]
+
+
+def test_route_pool_at_capacity_gets_429(client, monkeypatch):
+    def saturated(*args):
+        raise app.QueueFull('full')
+
+    monkeypatch.setattr(app.route_jobs, 'submit', saturated)
+    response = client.post('/api/route', json={**ROUTE, 'waypoints': [[12.88, 74.85]], 'optimize': True})
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+
+
+def test_vehicles_split_the_stops_and_report_totals(client):
+    waypoints = [[12.88, 74.85], [12.90, 74.86], [12.87, 74.84], [12.91, 74.85]]
+    response = client.post('/api/route', json={**ROUTE, 'waypoints': waypoints, 'optimize': True, 'vehicles': 2})
+    assert response.status_code == 200
+    payload = response.get_json()
+
+    plans = payload['vehicles']
+    assert len(plans) == 2
+    assert sorted(stop for plan in plans for stop in plan['waypoint_order']) == [0, 1, 2, 3]
+    assert sum(plan['load'] for plan in plans) == 4
+
+    matrix = app.geo.distance_matrix([ROUTE['start']] + waypoints + [ROUTE['end']])
+    optimization = payload['optimization']
+    assert optimization['distance_before'] == pytest.approx(app.vrp.path_length([0, 1, 2, 3, 4, 5], matrix))
+    driven = [[0] + [stop + 1 for stop in plan['waypoint_order']] + [5] for plan in plans if not plan.get('idle')]
+    assert optimization['distance_after'] == pytest.approx(sum(app.vrp.path_length(path, matrix) for path in driven))
+    assert optimization['distance_saved'] == pytest.approx(optimization['distance_before'] - optimization['distance_after'])
+
+
+def test_vehicles_without_stops_are_marked_idle(client):
+    response = client.post('/api/route', json={**ROUTE, 'waypoints': [[12.88, 74.85]], 'optimize': True, 'vehicles': 3})
+    assert response.status_code == 200
+    plans = response.get_json()['vehicles']
+
+    busy = [plan for plan in plans if not plan.get('idle')]
+    assert len(busy) == 1 and busy[0]['waypoint_order'] == [0] and 'fastest' in busy[0]
+    assert [plan for plan in plans if plan.get('idle')] == [{'waypoint_order': [], 'load': 0.0, 'idle': True}] * 2
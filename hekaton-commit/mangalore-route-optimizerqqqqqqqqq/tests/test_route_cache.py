@@ -0,0 +1,68 @@
+import pytest
+
+import app
+from route_cache import RouteCache, route_key
+
+START, END = [12.8698, 74.8439], [12.9141, 74.856]
+DEPARTURE = 1_700_000_000
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    app.route_cache.clear()
+    yield
+    app.route_cache.clear()
+
+
+def test_stops_a_few_metres_apart_share_a_key():
+    nearby = [START[0] + 0.00002, START[1] - 0.00002]
+    assert route_key(START, END, [], 'fastest', 7) == route_key(nearby, END, [], 'fastest', 7)
+    assert route_key(START, END, [], 'fastest', 7) != route_key(START, END, [], 'shortest', 7)
+
+
+def test_repeated_snapped_stops_hit_the_cache():
+    first, _ = app.plan_routes(START, END, [[12.88, 74.85]], DEPARTURE)
+    second, _ = app.plan_routes([START[0] + 0.00002, START[1]], END, [[12.88001, 74.85]], DEPARTURE + 1)
+
+    assert not any(route['cache_hit'] for route in first.values())
+    assert all(route['cache_hit'] for route in second.values())
+    assert second['fastest']['coordinates'] == first['fastest']['coordinates']
+
+
+def test_a_new_traffic_epoch_misses():
+    app.plan_routes(START, END, [], DEPARTURE)
+    routes, _ = app.plan_routes(START, END, [], DEPARTURE + app.TRAFFIC_EPOCH_SECONDS)
+
+    assert not any(route['cache_hit'] for route in routes.values())
+    assert routes['fastest']['traffic_epoch'] == app.traffic_epoch(DEPARTURE) + 1
+    assert len(app.route_cache) == 2 * len(app.ROUTE_TYPES)
+
+
+def test_least_recently_used_entry_is_evicted_at_capacity():
+    cache = RouteCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats() == {'entries': 2, 'max_entries': 2, 'hits': 3, 'misses': 1}
+
+
+def test_zero_capacity_disables_the_cache():
+    cache = RouteCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None and len(cache) == 0
+
+
+def test_delete_empties_the_cache():
+    client = app.app.test_client()
+    app.plan_routes(START, END, [], DEPARTURE)
+    assert client.get('/api/route/cache').get_json()['entries'] == len(app.ROUTE_TYPES)
+
+    response = client.delete('/api/route/cache')
+    assert response.status_code == 200
+    assert response.get_json()['entries'] == 0
+    routes, _ = app.plan_routes(START, END, [], DEPARTURE)
+    assert not any(route['cache_hit'] for route in routes.values())
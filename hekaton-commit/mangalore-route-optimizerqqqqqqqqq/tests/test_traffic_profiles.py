@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+import app
+
+
+def test_synthesized_profiles_stay_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app, 'TRAFFIC_PROFILE_FILE', None)
+    monkeypatch.setattr(app, '_traffic_profiles', None)
+
+    profiles, rows = app.get_traffic_profiles()
+    assert len(profiles) == len(app.MANGALORE_ROADS)
+    assert (rows >= 0).all()
+    assert not os.path.exists(app.DEFAULT_TRAFFIC_PROFILE_FILE)
+
+
+def test_profiles_are_saved_to_an_explicit_file_and_reloaded(tmp_path, monkeypatch):
+    path = str(tmp_path / 'profiles' / 'traffic.npy')
+    monkeypatch.setattr(app, 'TRAFFIC_PROFILE_FILE', path)
+    monkeypatch.setattr(app, '_traffic_profiles', None)
+    synthesized, _ = app.get_traffic_profiles()
+    assert os.path.exists(path)
+
+    monkeypatch.setattr(app, '_traffic_profiles', None)
+    loaded, _ = app.get_traffic_profiles()
+    np.testing.assert_array_equal(np.asarray(loaded.levels), np.asarray(synthesized.levels))
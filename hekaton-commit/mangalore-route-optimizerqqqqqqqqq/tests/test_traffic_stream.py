@@ -0,0 +1,98 @@
+import json
+import time
+
+import pytest
+
+import app
+from traffic_stream import SSE_KEEPALIVE, TrafficFeed, sse_event
+
+
+def parse(frame):
+    assert frame.endswith(b'\n\n')
+    event, data = frame[:-2].decode().split('\n')
+    assert event.startswith('event: ') and data.startswith('data: ')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+@pytest.fixture
+def clock():
+    return {'epoch': 1}
+
+
+@pytest.fixture
+def feed(clock):
+    return TrafficFeed(
+        lambda: clock['epoch'],
+        lambda epoch: {'Hampankatta': {'factor': 1 + epoch / 10, 'level': 'moderate'}},
+        lambda state, epoch: {'duration': state * epoch},
+        interval=60, keepalive=0.2, history=4
+    )
+
+
+def publish(feed, clock, epoch):
+    clock['epoch'] = epoch
+    return feed.refresh()
+
+
+def test_sse_event_is_one_compact_frame():
+    assert sse_event('traffic', {'epoch': 3, 'changed': {}}) == b'event: traffic\ndata: {"epoch":3,"changed":{}}\n\n'
+
+
+def test_subscriber_gets_a_snapshot_then_deltas_and_etas(feed, clock):
+    watch_id = feed.watch(10)
+    stream = feed.subscribe([watch_id, 'gone'])
+
+    event, data = parse(next(stream))
+    assert event == 'snapshot'
+    assert data == {'epoch': 1, 'traffic': {'Hampankatta': {'factor': 1.1, 'level': 'moderate'}},
+                    'etas': {watch_id: {'duration': 10}}, 'unknown_watches': ['gone']}
+    assert feed.stats()['subscribers'] == 1
+
+    assert publish(feed, clock, 2)
+    assert not publish(feed, clock, 2)
+    frames = next(stream).split(b'\n\n')[:-1]
+    assert [parse(frame + b'\n\n') for frame in frames] == [
+        ('traffic', {'epoch': 2, 'changed': {'Hampankatta': {'factor': 1.2}}}),
+        ('eta', {'epoch': 2, 'watch_id': watch_id, 'duration': 20}),
+    ]
+
+    assert next(stream) == SSE_KEEPALIVE
+    stream.close()
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_a_subscriber_that_stops_reading_is_dropped_without_blocking_publishers(feed, clock):
+    stalled = feed.subscribe()
+    next(stalled)
+    reader = feed.subscribe()
+    next(reader)
+
+    started = time.perf_counter()
+    for epoch in range(2, 12):
+        assert publish(feed, clock, epoch)
+        assert parse(next(reader))[1]['epoch'] == epoch
+    assert time.perf_counter() - started < 1.0
+
+    # Ten updates overran the four retained; the stalled stream ends instead of replaying stale deltas
+    with pytest.raises(StopIteration):
+        next(stalled)
+    assert feed.stats()['subscribers'] == 1
+    reader.close()
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_stream_endpoint_serves_event_stream():
+    response = app.app.test_client().get('/api/traffic/stream?watch=unknown', buffered=False)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+        event, data = parse(next(iter(response.response)))
+        assert event == 'snapshot'
+        assert data['epoch'] == app.traffic_epoch()
+        assert data['unknown_watches'] == ['unknown']
+        assert data['traffic']
+    finally:
+        response.close()
+    assert app.traffic_feed.stats()['subscribers'] == 0
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import geo
+import vrp
+
+CENTER = np.array([12.8698, 74.8439])
+
+
+@pytest.fixture
+def stops():
+    rng = np.random.default_rng(21)
+    return (CENTER + rng.uniform(-0.05, 0.05, size=(14, 2))).tolist()
+
+
+def test_local_search_shortens_a_shuffled_path(stops):
+    points = [CENTER.tolist()] + stops + [CENTER.tolist()]
+    matrix = geo.distance_matrix(points)
+    shuffled = [0] + list(range(1, len(points) - 1))[::-1] + [len(points) - 1]
+
+    improved = vrp.or_opt(vrp.two_opt(shuffled, matrix, float('inf')), matrix, float('inf'))
+    assert vrp.path_length(improved, matrix) < vrp.path_length(shuffled, matrix)
+    assert improved[0] == 0 and improved[-1] == len(points) - 1
+    assert sorted(improved) == list(range(len(points)))
+
+
+def test_optimize_order_never_makes_the_route_longer(stops):
+    order, summary = vrp.optimize_order(CENTER.tolist(), stops[0], stops[1:], time_budget_ms=500)
+    assert sorted(order) == list(range(len(stops) - 1))
+    assert summary['distance_after'] <= summary['distance_before'] + 1e-9
+
+
+def test_vehicle_routes_respect_capacity(stops):
+    demands = [1, 2, 3] * 4 + [1, 2]
+    routes, summary = vrp.solve_vehicle_routes(
+        CENTER.tolist(), CENTER.tolist(), stops, vehicles=3, capacity=10, demands=demands, time_budget_ms=500
+    )
+    assert sorted(stop for route in routes for stop in route) == list(range(len(stops)))
+    for route, load in zip(routes, summary['loads']):
+        assert load == sum(demands[stop] for stop in route)
+        assert load <= 10
+
+
+def test_vehicle_routes_reject_demands_over_capacity(stops):
+    with pytest.raises(ValueError):
+        vrp.solve_vehicle_routes(CENTER.tolist(), CENTER.tolist(), stops, vehicles=2, capacity=5)
@@ -0,0 +1,234 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+
+from spatial_index import KM_PER_DEGREE
+
+# Route segments within this distance (km) of a congested road pick up its traffic factor
+TRAFFIC_MATCH_TOLERANCE_KM = 0.1
+
+# Time-of-day profiles: 96 fifteen-minute slots for each day of the week (Monday first)
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAYS_PER_WEEK = 7
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+
+
+# Equirectangular projection to planar km around a reference latitude (accurate at city scale)
+def project_km(points, reference_lat):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    x = points[:, 1] * KM_PER_DEGREE * math.cos(math.radians(reference_lat))
+    y = points[:, 0] * KM_PER_DEGREE
+    return np.stack([x, y], axis=1)
+
+
+# Distance from points p to segments a-b, element-wise over (N, 2) arrays
+def _point_segment_distances(p, a, b):
+    ab = b - a
+    length_sq = (ab ** 2).sum(axis=1)
+    t = np.where(length_sq > 0, ((p - a) * ab).sum(axis=1) / np.where(length_sq > 0, length_sq, 1), 0.0)
+    closest = a + np.clip(t, 0.0, 1.0)[:, None] * ab
+    return np.sqrt(((p - closest) ** 2).sum(axis=1))
+
+
+def _cross(o, a, b):
+    return (a[:, 0] - o[:, 0]) * (b[:, 1] - o[:, 1]) - (a[:, 1] - o[:, 1]) * (b[:, 0] - o[:, 0])
+
+
+def segment_distances(p0, p1, q0, q1):
+    """Minimum distance between planar segments p0-p1 and q0-q1, element-wise over (N, 2) arrays."""
+    # Proper crossings are distance 0; touching/collinear cases fall out of the endpoint distances
+    d1 = _cross(q0, q1, p0)
+    d2 = _cross(q0, q1, p1)
+    d3 = _cross(p0, p1, q0)
+    d4 = _cross(p0, p1, q1)
+    crossing = (d1 * d2 < 0) & (d3 * d4 < 0)
+
+    endpoint = np.minimum.reduce([
+        _point_segment_distances(p0, q0, q1),
+        _point_segment_distances(p1, q0, q1),
+        _point_segment_distances(q0, p0, p1),
+        _point_segment_distances(q1, p0, p1)
+    ])
+    return np.where(crossing, 0.0, endpoint)
+
+
+# Road polylines bucketed into a planar grid so a route only tests roads in the cells it crosses
+class TrafficOverlay:
+    def __init__(self, roads, cell_size_km=1.0, tolerance_km=TRAFFIC_MATCH_TOLERANCE_KM):
+        self.names = list(roads)
+        self.cell_size_km = cell_size_km
+        self.tolerance_km = tolerance_km
+
+        all_points = [point for coordinates in roads.values() for point in coordinates]
+        self.reference_lat = float(np.mean([point[0] for point in all_points])) if all_points else 0.0
+
+        starts, ends, road_ids = [], [], []
+        for road_id, coordinates in enumerate(roads.values()):
+            projected = project_km(coordinates, self.reference_lat)
+            starts.append(projected[:-1])
+            ends.append(projected[1:])
+            road_ids.append(np.full(len(projected) - 1, road_id, dtype=np.int64))
+
+        self.segment_starts = np.concatenate(starts) if starts else np.zeros((0, 2))
+        self.segment_ends = np.concatenate(ends) if ends else np.zeros((0, 2))
+        self.segment_roads = np.concatenate(road_ids) if road_ids else np.zeros(0, dtype=np.int64)
+
+        # Each road segment goes into every cell its tolerance-padded bounding box touches
+        buckets = {}
+        for segment, (start, end) in enumerate(zip(self.segment_starts, self.segment_ends)):
+            col_min, col_max, row_min, row_max = self._cell_range(start, end, self.tolerance_km)
+            for col in range(col_min, col_max + 1):
+                for row in range(row_min, row_max + 1):
+                    buckets.setdefault((col, row), []).append(segment)
+        self._buckets = {cell: np.array(segments, dtype=np.int64) for cell, segments in buckets.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell_range(self, start, end, padding):
+        low = np.minimum(start, end) - padding
+        high = np.maximum(start, end) + padding
+        col_min, row_min = np.floor(low / self.cell_size_km).astype(int)
+        col_max, row_max = np.floor(high / self.cell_size_km).astype(int)
+        return int(col_min), int(col_max), int(row_min), int(row_max)
+
+    # Road segments bucketed in the cells covering a route segment's bounding box
+    def _candidates(self, start, end):
+        col_min, col_max, row_min, row_max = self._cell_range(start, end, 0.0)
+
+        # Long segments scan the occupied buckets instead of enumerating every cell they span
+        if (col_max - col_min + 1) * (row_max - row_min + 1) > len(self._buckets):
+            found = [
+                segments for (col, row), segments in self._buckets.items()
+                if col_min <= col <= col_max and row_min <= row <= row_max
+            ]
+        else:
+            found = [
+                self._buckets[(col, row)]
+                for col in range(col_min, col_max + 1)
+                for row in range(row_min, row_max + 1)
+                if (col, row) in self._buckets
+            ]
+
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def near_pairs(self, route_coordinates):
+        """(route segment, road) index pairs closer than tolerance_km; a pair can repeat."""
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if len(route_coordinates) < 2 or not self._buckets:
+            return empty
+
+        projected = project_km(route_coordinates, self.reference_lat)
+        route_starts, route_ends = projected[:-1], projected[1:]
+
+        # Candidate (route segment, road segment) pairs from the grid, then one vectorized exact test
+        route_ids, road_segments = [], []
+        for index, (start, end) in enumerate(zip(route_starts, route_ends)):
+            candidates = self._candidates(start, end)
+            if len(candidates):
+                road_segments.append(candidates)
+                route_ids.append(np.full(len(candidates), index, dtype=np.int64))
+
+        if not road_segments:
+            return empty
+
+        route_ids = np.concatenate(route_ids)
+        road_segments = np.concatenate(road_segments)
+        distances = segment_distances(
+            route_starts[route_ids], route_ends[route_ids],
+            self.segment_starts[road_segments], self.segment_ends[road_segments]
+        )
+        near = distances < self.tolerance_km
+        return route_ids[near], self.segment_roads[road_segments[near]]
+
+    def roads_near(self, route_coordinates):
+        """Indices of roads passing within tolerance_km of any segment of the route."""
+        return np.unique(self.near_pairs(route_coordinates)[1])
+
+    def road_names_near(self, route_coordinates):
+        return [self.names[road] for road in self.roads_near(route_coordinates)]
+
+
+# Congestion factor per road, day of week and 15-minute slot, stored as uint8 hundredths above 1.0
+class TrafficProfiles:
+    def __init__(self, names, levels, utc_offset_minutes=0):
+        self.names = list(names)
+        self.levels = levels  # (roads, DAYS_PER_WEEK, SLOTS_PER_DAY) uint8, possibly memory-mapped
+        self.utc_offset_minutes = utc_offset_minutes
+        self._rows = {name: row for row, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def synthetic(cls, factor_ranges, utc_offset_minutes=0):
+        """Profiles from (off-peak, peak) factor ranges: free flow at night, morning and evening peaks, lighter weekends."""
+        hours = (np.arange(SLOTS_PER_DAY) + 0.5) * SLOT_MINUTES / 60
+        daytime = 1 / (1 + np.exp(-(hours - 7) * 2)) - 1 / (1 + np.exp(-(hours - 22) * 2))
+        peaks = np.maximum(np.exp(-((hours - 9) / 1.2) ** 2), np.exp(-((hours - 18.5) / 1.5) ** 2))
+        peak_weight = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.6, 0.4])[:, None]
+
+        levels = np.empty((len(factor_ranges), DAYS_PER_WEEK, SLOTS_PER_DAY), dtype=np.uint8)
+        for row, (low, high) in enumerate(factor_ranges.values()):
+            factors = 1 + (low - 1) * daytime + (high - low) * peaks * peak_weight
+            levels[row] = np.clip(np.rint((factors - 1) * 100), 0, 255)
+        return cls(factor_ranges, levels, utc_offset_minutes)
+
+    @classmethod
+    def load(cls, path, utc_offset_minutes=0):
+        """Memory-map a profile array (.npy); road names are in the .json file beside it."""
+        path = Path(path)
+        levels = np.load(path, mmap_mode='r')
+        with open(path.with_suffix('.json'), 'r') as f:
+            names = json.load(f)
+        if levels.shape != (len(names), DAYS_PER_WEEK, SLOTS_PER_DAY):
+            raise ValueError(f'{path}: expected {len(names)}x{DAYS_PER_WEEK}x{SLOTS_PER_DAY} levels, got {levels.shape}')
+        return cls(names, levels, utc_offset_minutes)
+
+    def save(self, path):
+        path = Path(path)
+        np.save(path, np.asarray(self.levels, dtype=np.uint8))
+        with open(path.with_suffix('.json'), 'w') as f:
+            json.dump(self.names, f)
+
+    def rows(self, names):
+        """Profile row for each road name, -1 where the road has no profile."""
+        return np.array([self._rows.get(name, -1) for name in names], dtype=np.int64)
+
+    def slots(self, timestamps):
+        """(day of week, slot) for Unix timestamps, in the profiles' local time."""
+        local = np.asarray(timestamps, dtype=float) + self.utc_offset_minutes * 60
+        days = (np.floor_divide(local, 86400).astype(np.int64) + EPOCH_WEEKDAY) % DAYS_PER_WEEK
+        slots = (np.mod(local, 86400) // (SLOT_MINUTES * 60)).astype(np.int64)
+        return days, slots
+
+    def factors(self, rows, timestamps):
+        """Congestion factor of each road row at the matching timestamp (element-wise)."""
+        days, slots = self.slots(timestamps)
+        return 1.0 + self.levels[rows, days, slots] / 100.0
+
+
+def travel_minutes(free_minutes, pair_segments, pair_rows, profiles, departure, scale=1.0, passes=2):
+    """Minutes per route segment, each slowed by its worst nearby road at the time the vehicle enters it.
+
+    Entry times depend on the congested times before them, so the whole route is
+    re-evaluated from the previous pass's entry times; two passes settle all but
+    slot-boundary cases. Returns (minutes, factors) per segment.
+    """
+    free_minutes = np.asarray(free_minutes, dtype=float)
+    minutes = free_minutes
+    factors = np.ones(len(free_minutes))
+    for _ in range(passes):
+        entry = departure + 60 * np.concatenate([[0.0], np.cumsum(minutes)[:-1]])
+        factors = np.ones(len(free_minutes))
+        if len(pair_segments):
+            road_factors = np.maximum(1.0, profiles.factors(pair_rows, entry[pair_segments]) * scale)
+            np.maximum.at(factors, pair_segments, road_factors)
+        minutes = free_minutes * factors
+    return minutes, factors
@@ -0,0 +1,168 @@
+import json
+import threading
+import time
+import uuid
+from collections import deque
+
+
+# One Server-Sent Events message, encoded once and written as-is to every subscriber
+def sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+
+SSE_KEEPALIVE = b': keepalive\n\n'
+
+
+# Traffic snapshots and route ETAs computed once per epoch and pushed to every subscriber.
+# Subscribers only wait on a condition and copy already-encoded events, so refresh work does not grow with them
+class TrafficFeed:
+    def __init__(self, epoch_fn, snapshot_fn, eta_fn, interval=1.0, keepalive=15.0, watch_ttl=3600.0, history=64):
+        self.epoch_fn = epoch_fn        # () -> current epoch
+        self.snapshot_fn = snapshot_fn  # epoch -> {road: {"factor", ...}}
+        self.eta_fn = eta_fn            # (watch state, epoch) -> ETA dict
+        self.interval = interval
+        self.keepalive = keepalive
+        self.watch_ttl = watch_ttl
+
+        self._cond = threading.Condition()
+        self._refresh_lock = threading.Lock()
+        self._version = 0
+        self._events = deque(maxlen=history)  # (version, [(watch id or None for everyone, encoded event)])
+        self._epoch = None
+        self._snapshot = {}
+        self._watches = {}  # id -> [state, expires at, last ETA]
+        self._thread = None
+        self.subscribers = 0
+        self.refreshes = 0
+        self.last_refresh_seconds = 0.0  # snapshot, delta and ETA work of the latest refresh, before fan-out
+
+    def _start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='traffic-feed', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing traffic feed: {e}")
+            time.sleep(self.interval)
+
+    def watch(self, state):
+        """Follow a route's ETA; returns the watch id subscribers pass to the stream."""
+        watch_id = uuid.uuid4().hex[:12]
+        epoch = self.epoch_fn()
+        eta = self.eta_fn(state, epoch)
+        with self._cond:
+            self._watches[watch_id] = [state, time.time() + self.watch_ttl, eta]
+        return watch_id
+
+    def refresh(self, epoch=None):
+        """Publish the traffic delta and changed ETAs if the epoch moved on; returns whether it did."""
+        with self._refresh_lock:
+            return self._refresh(self.epoch_fn() if epoch is None else epoch)
+
+    def _refresh(self, epoch):
+        if epoch == self._epoch:
+            return False
+
+        started = time.perf_counter()
+        snapshot = self.snapshot_fn(epoch)
+        changed = {
+            road: {"factor": data["factor"]} for road, data in snapshot.items()
+            if self._snapshot.get(road, {}).get("factor") != data["factor"]
+        }
+        events = [(None, sse_event('traffic', {"epoch": epoch, "changed": changed}))] if changed else []
+
+        now = time.time()
+        with self._cond:
+            expired = [watch_id for watch_id, (_, expires, _) in self._watches.items() if expires < now]
+            for watch_id in expired:
+                del self._watches[watch_id]
+            watches = list(self._watches.items())
+
+        for watch_id, entry in watches:
+            eta = self.eta_fn(entry[0], epoch)
+            if eta != entry[2]:
+                entry[2] = eta
+                events.append((watch_id, sse_event('eta', {"epoch": epoch, "watch_id": watch_id, **eta})))
+
+        with self._cond:
+            self._epoch, self._snapshot = epoch, snapshot
+            self.refreshes += 1
+            self.last_refresh_seconds = time.perf_counter() - started
+            if events:
+                self._version += 1
+                self._events.append((self._version, events))
+                self._cond.notify_all()
+        return True
+
+    def _initial(self, watch_ids):
+        # Full snapshot and current ETAs, sent on connect
+        with self._cond:
+            version, epoch, snapshot = self._version, self._epoch, self._snapshot
+            watched = {watch_id: self._watches.get(watch_id) for watch_id in watch_ids}
+            for entry in watched.values():
+                if entry is not None:
+                    entry[1] = max(entry[1], time.time() + self.watch_ttl)
+        etas = {watch_id: entry[2] for watch_id, entry in watched.items() if entry is not None}
+        missing = [watch_id for watch_id, entry in watched.items() if entry is None]
+        return version, sse_event('snapshot', {"epoch": epoch, "traffic": snapshot, "etas": etas, "unknown_watches": missing})
+
+    def subscribe(self, watch_ids=()):
+        """Generator of encoded SSE messages: a snapshot, then traffic deltas and ETAs for watch_ids as they change.
+
+        Publishers never wait on subscribers. A subscriber that falls behind the retained history is
+        dropped: the stream ends, and the client reconnects for a fresh snapshot.
+        """
+        watch_ids = set(watch_ids)
+        self._start()
+        if self._epoch is None:
+            self.refresh()
+
+        with self._cond:
+            self.subscribers += 1
+        try:
+            version, message = self._initial(watch_ids)
+            yield message
+            while True:
+                with self._cond:
+                    if not self._cond.wait_for(lambda: self._version > version, self.keepalive):
+                        pending = None
+                    elif not self._events or self._events[0][0] > version + 1:
+                        return
+                    else:
+                        pending = [
+                            event for event_version, events in self._events if event_version > version
+                            for watch_id, event in events if watch_id is None or watch_id in watch_ids
+                        ]
+                        version = self._version
+
+                if pending is None:
+                    yield SSE_KEEPALIVE
+                elif pending:
+                    yield b''.join(pending)
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "epoch": self._epoch,
+                "subscribers": self.subscribers,
+                "watches": len(self._watches),
+                "refreshes": self.refreshes,
+                "last_refresh_ms": round(self.last_refresh_seconds * 1000, 3)
+            }
+
+    def register_metrics(self, registry, prefix):
+        """Expose subscriber, watch and refresh counts through a metrics.Registry, read at scrape time."""
+        registry.callback(f'{prefix}_subscribers', 'Connected traffic stream clients',
+                          lambda: {(): self.subscribers})
+        registry.callback(f'{prefix}_watches', 'Routes whose ETA is being followed',
+                          lambda: {(): len(self._watches)})
+        registry.callback(f'{prefix}_refreshes_total', 'Traffic snapshots computed for the stream',
+                          lambda: {(): self.refreshes}, (), 'counter')
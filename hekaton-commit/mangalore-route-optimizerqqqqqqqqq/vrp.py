@@ -0,0 +1,193 @@
+import time
+
+import numpy as np
+
+import geo
+
+
+# Length of a path (list of matrix indices) under a distance matrix
+def path_length(order, matrix):
+    if len(order) < 2:
+        return 0.0
+    order = np.asarray(order)
+    return float(matrix[order[:-1], order[1:]].sum())
+
+
+# Nearest-neighbour seed for an open path that must start at start and finish at end
+def nearest_neighbour(matrix, start, end, nodes):
+    order = [start]
+    remaining = list(nodes)
+    while remaining:
+        distances = matrix[order[-1], remaining]
+        order.append(remaining.pop(int(distances.argmin())))
+    order.append(end)
+    return order
+
+
+# 2-opt with fixed endpoints: reverse order[i:j + 1] whenever it shortens the path
+def two_opt(order, matrix, deadline):
+    order = np.asarray(order)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(order) - 2):
+            a, b = order[i - 1], order[i]
+            c = order[i + 1:-1]
+            e = order[i + 2:]
+
+            # Gain of reversing order[i:j + 1] for every j at once
+            deltas = matrix[a, c] + matrix[b, e] - matrix[a, b] - matrix[c, e]
+            best = int(deltas.argmin())
+            if deltas[best] < -1e-9:
+                j = i + 1 + best
+                order[i:j + 1] = order[i:j + 1][::-1]
+                improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return order.tolist()
+
+
+# Or-opt: move chains of 1-3 consecutive stops to the best other position in the path
+def or_opt(order, matrix, deadline):
+    order = list(order)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for length in (1, 2, 3):
+            for i in range(1, len(order) - length):
+                if time.perf_counter() >= deadline:
+                    return order
+                chain = order[i:i + length]
+                before, after = order[i - 1], order[i + length]
+                removal_gain = matrix[before, chain[0]] + matrix[chain[-1], after] - matrix[before, after]
+
+                rest = order[:i] + order[i + length:]
+                left = np.asarray(rest[:-1])
+                right = np.asarray(rest[1:])
+                insert_cost = matrix[left, chain[0]] + matrix[chain[-1], right] - matrix[left, right]
+                best = int(insert_cost.argmin())
+                if insert_cost[best] < removal_gain - 1e-9:
+                    order = rest[:best + 1] + chain + rest[best + 1:]
+                    improved = True
+                    break
+            if improved:
+                break
+    return order
+
+
+# Local search on one open path until it stops improving or time runs out
+def improve_path(order, matrix, deadline):
+    while time.perf_counter() < deadline:
+        before = path_length(order, matrix)
+        order = or_opt(two_opt(order, matrix, deadline), matrix, deadline)
+        if path_length(order, matrix) >= before - 1e-9:
+            break
+    return order
+
+
+def optimize_order(start, end, waypoints, time_budget_ms=200):
+    """Reorder waypoints to shorten start -> waypoints -> end.
+
+    Returns the new waypoint order as indices into waypoints, plus a summary of the gain.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    points = [start] + list(waypoints) + [end]
+    matrix = geo.distance_matrix(points)
+    start_index, end_index = 0, len(points) - 1
+    nodes = list(range(1, end_index))
+
+    original = [start_index] + nodes + [end_index]
+    order = nearest_neighbour(matrix, start_index, end_index, nodes)
+    order = improve_path(order, matrix, deadline)
+    if path_length(order, matrix) > path_length(original, matrix):
+        order = original
+
+    return [index - 1 for index in order[1:-1]], {
+        "distance_before": path_length(original, matrix),
+        "distance_after": path_length(order, matrix),
+        "solve_time_ms": (time.perf_counter() - started) * 1000
+    }
+
+
+def solve_vehicle_routes(start, end, waypoints, vehicles, capacity=None, demands=None, time_budget_ms=200):
+    """Split waypoints across vehicles (each runs start -> stops -> end) under a capacity limit.
+
+    Returns a list of waypoint-index lists (one per vehicle) and a summary, or raises
+    ValueError when the demands cannot fit.
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    points = [start] + list(waypoints) + [end]
+    matrix = geo.distance_matrix(points)
+    start_index, end_index = 0, len(points) - 1
+
+    demands = np.ones(len(waypoints)) if demands is None else np.asarray(demands, dtype=float)
+    if len(demands) != len(waypoints):
+        raise ValueError("demands must have one entry per waypoint")
+    capacity = float("inf") if capacity is None else float(capacity)
+    if (demands > capacity).any() or demands.sum() > capacity * vehicles:
+        raise ValueError("waypoint demands exceed the fleet capacity")
+
+    # Parallel nearest neighbour: always extend the vehicle with the cheapest feasible next stop
+    routes = [[start_index] for _ in range(vehicles)]
+    loads = [0.0] * vehicles
+    remaining = set(range(1, end_index))
+    while remaining:
+        best = None
+        candidates = sorted(remaining)
+        for vehicle in range(vehicles):
+            feasible = [node for node in candidates if loads[vehicle] + demands[node - 1] <= capacity]
+            if not feasible:
+                continue
+            distances = matrix[routes[vehicle][-1], feasible]
+            nearest = int(distances.argmin())
+            if best is None or distances[nearest] < best[0]:
+                best = (distances[nearest], vehicle, feasible[nearest])
+        if best is None:
+            raise ValueError("waypoint demands exceed the fleet capacity")
+
+        _, vehicle, node = best
+        routes[vehicle].append(node)
+        loads[vehicle] += demands[node - 1]
+        remaining.remove(node)
+
+    routes = [route + [end_index] for route in routes]
+
+    # Intra-route local search, then relocate single stops between vehicles when capacity allows
+    routes = [improve_path(route, matrix, deadline) for route in routes]
+    moved = True
+    while moved and time.perf_counter() < deadline:
+        moved = False
+        for source in range(vehicles):
+            for position in range(1, len(routes[source]) - 1):
+                node = routes[source][position]
+                before, after = routes[source][position - 1], routes[source][position + 1]
+                gain = matrix[before, node] + matrix[node, after] - matrix[before, after]
+
+                for target in range(vehicles):
+                    if target == source or loads[target] + demands[node - 1] > capacity:
+                        continue
+                    left = np.asarray(routes[target][:-1])
+                    right = np.asarray(routes[target][1:])
+                    cost = matrix[left, node] + matrix[node, right] - matrix[left, right]
+                    slot = int(cost.argmin())
+                    if cost[slot] < gain - 1e-9:
+                        routes[source].pop(position)
+                        routes[target].insert(slot + 1, node)
+                        loads[source] -= demands[node - 1]
+                        loads[target] += demands[node - 1]
+                        moved = True
+                        break
+                if moved:
+                    break
+            if moved:
+                break
+
+    # Gain is measured against one vehicle visiting the stops as submitted; idle vehicles do not drive
+    return [[node - 1 for node in route[1:-1]] for route in routes], {
+        "loads": [float(load) for load in loads],
+        "distance_before": path_length(list(range(len(points))), matrix),
+        "distance_after": sum(path_length(route, matrix) for route in routes if len(route) > 2),
+        "solve_time_ms": (time.perf_counter() - started) * 1000
+    }